@@ -1,87 +1,469 @@
 import random
 import argparse
+import array
+import bisect
+import collections
+import functools
+import hashlib
+import heapq
+import importlib
+import inspect
+import itertools
+import json
+import math
+import multiprocessing
+import operator
+import os
+import re
+import sqlite3
 import sys
+import textwrap
+import time
+import types
+import wave
+
+try:
+    import numpy as np
+except ImportError:  # Only the batch (vectorised) paths need NumPy.
+    np = None
+
+
+# Pitch model: divisions of the octave (equal temperament). The tables below are written
+# for 12-TET; set_temperament() loads those derived for another temperament into
+# temperament, which everything else reads them from.
+standard_temperament = {
+    # Divisions of the octave.
+    "divisions": 12,
+
+    # Note names by note index (C = 0) over three octaves.
+    "notes": {
+        0: ["C"],
+        1: ["C#", "Db"],
+        2: ["D"],
+        3: ["D#", "Eb"],
+        4: ["E"],
+        5: ["F"],
+        6: ["F#", "Gb"],
+        7: ["G"],
+        8: ["G#", "Ab"],
+        9: ["A"],
+        10: ["A#", "Bb"],
+        11: ["B"],
+        12: ["C"],
+        13: ["C#", "Db"],
+        14: ["D"],
+        15: ["D#", "Eb"],
+        16: ["E"],
+        17: ["F"],
+        18: ["F#", "Gb"],
+        19: ["G"],
+        20: ["G#", "Ab"],
+        21: ["A"],
+        22: ["A#", "Bb"],
+        23: ["B"],
+        24: ["C"],
+        25: ["C#", "Db"],
+        26: ["D"],
+        27: ["D#", "Eb"],
+        28: ["E"],
+        29: ["F"],
+        30: ["F#", "Gb"],
+        31: ["G"],
+        32: ["G#", "Ab"],
+        33: ["A"],
+        34: ["A#", "Bb"],
+        35: ["B"],
+        36: ["C"],
+    },
+
+    # Steps each string covers (a perfect fourth), and the open strings, lowest (E) first,
+    # as note indices.
+    "string_steps": 5,
+    "open_strings": (4, 9, 2, 7, 11, 4),
+
+    # Per string grouping: the ceiling (maximum interval) passed to unearth_skeleton(),
+    # the lengths a user may ask for, and the lengths drawn at random.
+    # Each string of a group covers string_steps (five semitones),
+    # so a grouping's ceiling is string_steps * strings - 1.
+    "ceilings": {1: 4, 2: 9, 3: 14, 4: 19, 5: 24, 6: 29},
+    "lengths": {
+        1: range(2, 5), 2: range(2, 9), 3: range(3, 13),
+        4: range(4, 16), 5: range(5, 20), 6: range(6, 24),
+    },
+    # Limiting max skel lengths to avoid chromatic slop.
+    "random_lengths": {
+        1: range(2, 5), 2: range(2, 9), 3: range(3, 12),
+        4: range(4, 16), 5: range(5, 20), 6: range(6, 24),
+    },
+
+    # String groupings small enough to enumerate: form_skeleton() draws them by rejection
+    # sampling, and valid_skeletons() and everything built on it catalogs them.
+    # Wider groupings are drawn by draw_skeleton() instead.
+    "catalog_groupings": (1, 2, 3),
+
+    # String groupings with hand-tuned layouts in skeleton_to_fretboard() (12-TET only).
+    # Every other grouping plays each note in the string_steps window that holds it.
+    "hand_layout_groupings": (1, 2, 3),
+
+    # Every starting fret set_start_fret() accepts, and those it picks at random.
+    "start_frets": range(0, 21 - 4 + 1),
+    "random_start_frets": range(0, 21 - 4),
+
+    # Strings (indices into starting_notes, lowest first) by position within their string group,
+    # and each position's offset from the group's first string as used by skeleton_to_fretboard().
+    "group_positions": {
+        1: [((0, 1, 2, 3, 4, 5), 0)],
+        2: [((0, 2, 4), 0), ((1, 3, 5), -5)],
+        3: [((0, 3), 0), ((1, 4), -5), ((2, 5), -10)],
+        4: [((0, 4), 0), ((1, 5), -5), ((2,), -10), ((3,), -15)],
+        5: [((0, 5), 0), ((1,), -5), ((2,), -10), ((3,), -15), ((4,), -20)],
+        6: [((0,), 0), ((1,), -5), ((2,), -10), ((3,), -15), ((4,), -20), ((5,), -25)],
+    },
+
+    # Widest fretted distance one hand position covers (index to little finger, as in
+    # "Avoiding FRETTED distances of over 4 frets" below).
+    "finger_span": 4,
+}
 
-
-notes = {
-    0: ["C"],
-    1: ["C#", "Db"],
-    2: ["D"],
-    3: ["D#", "Eb"],
-    4: ["E"],
-    5: ["F"],
-    6: ["F#", "Gb"],
-    7: ["G"],
-    8: ["G#", "Ab"],
-    9: ["A"],
-    10: ["A#", "Bb"],
-    11: ["B"],
-    12: ["C"],
-    13: ["C#", "Db"],
-    14: ["D"],
-    15: ["D#", "Eb"],
-    16: ["E"],
-    17: ["F"],
-    18: ["F#", "Gb"],
-    19: ["G"],
-    20: ["G#", "Ab"],
-    21: ["A"],
-    22: ["A#", "Bb"],
-    23: ["B"],
-    24: ["C"],
-    25: ["C#", "Db"],
-    26: ["D"],
-    27: ["D#", "Eb"],
-    28: ["E"],
-    29: ["F"],
-    30: ["F#", "Gb"],
-    31: ["G"],
-    32: ["G#", "Ab"],
-    33: ["A"],
-    34: ["A#", "Bb"],
-    35: ["B"],
-    36: ["C"],
+# The pitch model in use: standard_temperament's tables, or set_temperament()'s.
+temperament = types.SimpleNamespace(**standard_temperament)
+
+# Indices into a cipher for each string, lowest (E) to highest (e), per string grouping.
+cipher_string_order = {
+    1: (0, 1, 2, 3, 4, 5),
+    2: (0, 3, 1, 4, 2, 5),
+    3: (0, 2, 4, 1, 3, 5),
+    4: (0, 2, 4, 5, 1, 3),
+    5: (0, 2, 3, 4, 5, 1),
+    6: (0, 1, 2, 3, 4, 5),
 }
 
 
-def main():
-    """
-    The skeleton comes to life.
+def tuning_cache(function=None, *, maxsize=None):
+    """functools.lru_cache (unbounded by default) for anything built from the pitch model:
+    results are cached per temperament, so set_temperament() never leaves one serving
+    another's tables.
     """
-
-    tab_print, cipher, starting_notes, start_fret, string_grouping, skeleton = (
-        skeleton_to_fretboard(*form_skeleton(*optional_arguments()[0:3]))
+    if function is None:
+        return functools.partial(tuning_cache, maxsize=maxsize)
+    cached = functools.lru_cache(maxsize)(
+        lambda divisions, *args, **kwargs: function(*args, **kwargs)
     )
 
-    skel_notes = get_skel_notes(
-        cipher, starting_notes, start_fret, string_grouping, optional_arguments()[3]
-    )
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        return cached(temperament.divisions, *args, **kwargs)
 
-    print(
-        f"\n{tab_print}\n"
+    wrapper.cache_clear = cached.cache_clear
+    return wrapper
 
-        f"\nSkeleton:\n{", ".join(map(str, skeleton))}"
 
-        f"\nNotes:\n{", ".join(skel_notes)}"
+def main():
+    """
+    The skeleton comes to life.
+    """
 
-        # f"\nStarting fret: {start_fret}"
+    args = optional_arguments()
+
+    try:
+        set_temperament(args.divisions)
+    except ValueError as error:
+        sys.exit(f"Error. {error}")
+    for name in args.enable_rule:
+        set_rule_enabled(name, True)
+    for name in args.disable_rule:
+        set_rule_enabled(name, False)
+    if args.list_rules:
+        print(describe_rules())
+        return
+
+    if args.exercises:
+        try:
+            for pattern in args.exercises.split(","):
+                parse_pattern(pattern)
+        except ValueError as error:
+            sys.exit(f"Error. {error}")
+
+    if args.format == "worksheet":
+        try:
+            worksheet_column_width(args.columns, args.width, args.page_lines)
+        except ValueError as error:
+            sys.exit(f"Error. {error}")
+
+    # A checkpoint resumes tab or JSON output by regenerating it, which these outputs
+    # bypass and a practice log (updated as voicings are written) would not reproduce.
+    if args.checkpoint:
+        for option, value in (
+            ("--exercises", args.exercises), ("--wav", args.wav), ("--svg", args.svg),
+            ("--all-positions", args.all_positions), ("--practice-log", args.practice_log),
+        ):
+            if value:
+                sys.exit(f"Error. --checkpoint does not support {option}.")
+
+    # These search the catalog, which only holds catalog_groupings.
+    if isinstance(args.grouping, int) and args.grouping not in temperament.catalog_groupings:
+        for option, value in (
+            ("--find-notes", args.find_notes), ("--where", args.where), ("--tour-to", args.tour_to)
+        ):
+            if value is not None:
+                sys.exit(
+                    f"Error. {option} only searches cataloged string groupings "
+                    f"({", ".join(map(str, temperament.catalog_groupings))} "
+                    f"in {temperament.divisions}-TET), not {args.grouping}."
+                )
 
-        # f"\nString grouping: {string_grouping}"
-    )
+    if args.check_equivalence:
+        if not differential_check(args.samples, args.workers, args.seed):
+            sys.exit("Differential check failed.")
+        return
+
+    if args.find_notes:
+        try:
+            realizations = find_realizations(
+                args.find_notes,
+                "within" if args.find_within else "exact",
+                [args.grouping] if isinstance(args.grouping, int) else None,
+            )
+        except ValueError as error:
+            sys.exit(f"Error. {error}")
+        for skeleton, string_grouping, start_fret in realizations:
+            print(
+                f"Skeleton: {", ".join(map(str, skeleton))} | "
+                f"string grouping {string_grouping} | fret {start_fret}"
+            )
+        return
+
+    if args.review:
+        try:
+            review_session(args.review, args.grade, args.count, args.shflat, args.format)
+        except ValueError as error:
+            sys.exit(f"Error. {error}")
+        return
+
+    if args.neighbours:
+        if not isinstance(args.grouping, int) or not isinstance(args.fret, int):
+            sys.exit("Error. --neighbours needs a string grouping (-g) and starting fret (-f).")
+        notes = args.neighbours.replace(",", " ").split()
+        if not all(note.isdigit() for note in notes):
+            sys.exit("Error. --neighbours takes a skeleton as note numbers, e.g. '0 4 7'.")
+        skeleton = [int(note) for note in notes]
+        if (
+            args.grouping not in temperament.ceilings
+            or skeleton[:1] != [0]
+            or skeleton != sorted(set(skeleton))
+            or skeleton[-1] > temperament.ceilings[args.grouping]
+            or len(skeleton) not in temperament.lengths[args.grouping]
+            or not is_valid_skeleton(skeleton, args.grouping, args.fret)
+        ):
+            sys.exit("Error. Not a valid skeleton for that string grouping and starting fret.")
+        for edit, index, neighbour in valid_neighbours(skeleton, args.grouping, args.fret):
+            print(f"{edit:<7}{index:<3}{", ".join(map(str, neighbour))}")
+        return
+
+    if args.shard:
+        if args.seed is None:
+            sys.exit("Error. --shard needs a --seed shared by every shard.")
+        try:
+            shard, shards = parse_shard(args.shard)
+            size, items = shard_skeletons(
+                shard, shards, args.count, args.seed, args.grouping, args.length, args.fret,
+                args.where, args.ordered,
+            )
+        except ValueError as error:
+            sys.exit(f"Error. {error}")
+        if args.checkpoint:
+            if not args.output:
+                sys.exit("Error. --checkpoint needs --output.")
+            write_checkpointed(
+                items,
+                lambda item, file: write_shard_item(item, file, args.shflat, args.fingering),
+                size,
+                args.output,
+                args.checkpoint,
+                run_fingerprint(args),
+                args.checkpoint_every,
+                header=shard_header(shard, shards, size),
+            )
+            return
+        file = open(args.output, "w", buffering=1 << 16) if args.output else sys.stdout
+        try:
+            write_shard(items, shard, shards, size, file, args.shflat, args.fingering)
+        finally:
+            if args.output:
+                file.close()
+        return
+
+    rng = random.Random(args.seed)
+    skeletons = plain = iter_skeletons(args.grouping, args.length, args.fret, rng=rng)
+
+    if args.merge:
+        skeletons = merge_shards(args.merge)
+        args.count = sys.maxsize
+    elif args.practice_log:
+        try:
+            log = PracticeLog(args.practice_log)
+        except ValueError as error:
+            sys.exit(f"Error. {error}")
+        skeletons = unseen_skeletons(log, args.user, random.Random(args.seed))
+    elif args.quota or args.stratify:
+        try:
+            quotas = parse_quotas(args.quota) if args.quota else balanced_quotas(
+                args.count,
+                args.stratify,
+                args.grouping if isinstance(args.grouping, int) else None,
+                args.length if isinstance(args.length, int) else None,
+                args.fret if isinstance(args.fret, int) else None,
+            )
+        except ValueError as error:
+            sys.exit(f"Error. {error}")
+        args.count = sum(quotas.values())
+        skeletons = stratified_skeletons(quotas, random.Random(args.seed))
+    elif args.where:
+        settings = [
+            f"{attribute} = {value}"
+            for attribute, value in (
+                ("grouping", args.grouping), ("length", args.length), ("fret", args.fret)
+            )
+            if isinstance(value, int)
+        ]
+        try:
+            skeletons = where_skeletons(
+                " and ".join([f"({args.where})", *settings]),
+                args.count,
+                random.Random(args.seed),
+                args.ordered,
+            )
+        except ValueError as error:
+            sys.exit(f"Error. {error}")
+    elif args.optimize:
+        try:
+            skeletons = optimize_skeletons(
+                args.optimize,
+                args.count,
+                args.grouping if isinstance(args.grouping, int) else None,
+                args.length if isinstance(args.length, int) else None,
+                args.fret if isinstance(args.fret, int) else None,
+                args.population,
+                args.generations,
+                args.seed,
+                args.workers,
+            )
+        except ValueError as error:
+            sys.exit(f"Error. {error}")
+    if args.one_per_family:
+        skeletons = unique_families(skeletons, args.one_per_family)
+    if args.tour_to is not None:
+        try:
+            skeletons = practice_tour(
+                args.count,
+                args.fret if isinstance(args.fret, int) else None,
+                args.tour_to,
+                args.grouping if isinstance(args.grouping, int) else None,
+                args.length if isinstance(args.length, int) else None,
+                random.Random(args.seed),
+            )
+        except ValueError as error:
+            sys.exit(f"Error. {error}")
+    elif args.voice_lead:
+        skeletons = voice_lead(
+            [skeleton for skeleton, _, _ in itertools.islice(skeletons, args.count)],
+            args.grouping if isinstance(args.grouping, int) else None,
+            args.fret if isinstance(args.fret, int) else None,
+        )
+
+    if args.all_positions:
+        for skeleton, string_grouping, start_fret in itertools.islice(skeletons, args.count):
+            print(f"\n{neck_chart(skeleton, string_grouping)}")
+            if args.practice_log:
+                log.record(args.user, [(skeleton, string_grouping, start_fret)])
+        return
+
+    # Batches read ahead of the output, which a checkpoint's rng state cannot allow.
+    fretboards = with_fretboard(skeletons, 1 if args.checkpoint else min(args.count, 256))
+    if args.max_stretch is not None:
+        fretboards = filter_playable(fretboards, args.max_stretch)
+    if args.contains_chord or args.within_scale:
+        try:
+            fretboards = filter_harmonic(fretboards, args.contains_chord, args.within_scale)
+        except ValueError as error:
+            sys.exit(f"Error. {error}")
+
+    if args.checkpoint:
+        if not args.output or args.format == "worksheet":
+            sys.exit("Error. --checkpoint needs --output and tab or json format.")
+        # Plain generation draws one skeleton at a time from rng, so its state marks the place;
+        # anything else is regenerated up to the checkpoint, which needs a seed.
+        plain = skeletons is plain and not (
+            args.max_stretch is not None or args.contains_chord or args.within_scale
+        )
+        if not plain and args.seed is None and not args.merge:
+            sys.exit("Error. --checkpoint needs --seed with these options.")
+        writer = write_json_lines if args.format == "json" else write_skeletons
+        write_checkpointed(
+            fretboards,
+            lambda fretboard, file: writer(
+                with_notes([fretboard], args.shflat), file, fingering=args.fingering
+            ),
+            args.count,
+            args.output,
+            args.checkpoint,
+            run_fingerprint(args),
+            args.checkpoint_every,
+            rng if plain else None,
+        )
+        return
+
+    fretboards = itertools.islice(fretboards, args.count)
+    if args.practice_log:
+        fretboards = record_seen(fretboards, log, args.user)
+    if args.wav:
+        write_wav_batch(fretboards, args.wav, stereo=args.stereo)
+        return
+    if args.svg:
+        write_svg_batch(fretboards, args.svg, args.shflat)
+        return
+    if args.exercises and args.count_exercises:
+        totals = [0, 0, 0]
+        for _, cipher, *_ in fretboards:
+            counts = exercise_count(sum(map(len, cipher)), args.exercises.split(","))
+            totals = [totals[0] + 1, totals[1] + counts[0], totals[2] + counts[1]]
+        print(f"{totals[0]} skeletons, {totals[1]} exercises, {totals[2]} events")
+        return
+
+    annotated = with_notes(fretboards, args.shflat)
+    file = open(args.output, "w", buffering=1 << 16) if args.output else sys.stdout
+    try:
+        if args.format == "worksheet":
+            write_worksheet(
+                annotated, file, args.fingering, args.columns, args.width, args.page_lines
+            )
+        elif args.exercises:
+            write_exercises(
+                annotated, args.exercises.split(","), file, args.fingering, args.format == "json"
+            )
+        else:
+            writer = write_json_lines if args.format == "json" else write_skeletons
+            writer(annotated, file, fingering=args.fingering)
+    except ValueError as error:  # Raised while reading --merge files.
+        sys.exit(f"Error. {error}")
+    finally:
+        if args.output:
+            file.close()
 
 
 def optional_arguments():
     """Optional command-line skeleton customisation.
 
     Returns:
-        tuple: Values for the form_skeleton() function's start_fret, length, and string_grouping parameters.
+        argparse.Namespace: Values for the form_skeleton() function's start_fret, length,
+        and string_grouping parameters, plus output options (shflat, count, seed).
     """
     parser = argparse.ArgumentParser()
 
     parser.add_argument(
         "-f", "--fret",
         help="Starting fret: number or 'r' for random (no argument defaults to random). "
-        "Highest allowed fret is 17.",
+        "Highest allowed fret is 17 (in 12-TET).",
         default=""
     )
 
@@ -91,7 +473,8 @@ def optional_arguments():
         help=(
             "Skeleton length: number or 'r' for random (no argument defaults to random). "
             "Minimum and maximum length dictated by string grouping: "
-            "2-4, 2-8, and 3-12 for string groupings 1, 2, and 3 respectively."
+            "2-4, 2-8, 3-12, 4-15, 5-19 and 6-23 for string groupings 1 to 6 respectively "
+            "(in 12-TET)."
         ),
         default=""
     )
@@ -99,7 +482,8 @@ def optional_arguments():
     parser.add_argument(
         "-g",
         "--grouping",
-        help="String grouping size. 1 to 3 or 'r' for random (no argument defaults to random).",
+        help="String grouping size. 1 to 6 or 'r' for random between 1 and 3 "
+        "(no argument defaults to random).",
         default=""
     )
 
@@ -109,6 +493,324 @@ def optional_arguments():
         help="'#' or 'b'. Display sharps or flats for letter notation output. Defaults to sharps.",
         default="#")
 
+    parser.add_argument(
+        "--divisions",
+        help="Divisions of the octave for an equal-tempered neck, e.g. 19, 22 or 24 "
+        "(5 to 72). Fret, length and grouping limits scale with it. Defaults to 12.",
+        type=int,
+        default=12
+    )
+
+    parser.add_argument(
+        "--max-stretch",
+        help="Only keep skeletons whose widest fretted stretch across two adjacent strings "
+        "is at most this many frets (requires NumPy).",
+        type=int,
+        default=None
+    )
+
+    parser.add_argument(
+        "--format",
+        help="'tab' (default), 'json' (one JSON object per skeleton per line) "
+        "or 'worksheet' (paginated columns of tabs).",
+        choices=["tab", "json", "worksheet"],
+        default="tab"
+    )
+
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="Write to a file instead of the terminal.",
+        default=None
+    )
+
+    parser.add_argument(
+        "--columns",
+        help="Worksheet tabs per row. Defaults to 3.",
+        type=int,
+        default=3
+    )
+
+    parser.add_argument(
+        "--width",
+        help="Worksheet line width. Defaults to 80.",
+        type=int,
+        default=80
+    )
+
+    parser.add_argument(
+        "--page-lines",
+        help="Worksheet lines per page. Defaults to 66.",
+        type=int,
+        default=66
+    )
+
+    parser.add_argument(
+        "--fingering",
+        help="Suggest left-hand fingers (1-4) for every fretted note.",
+        action="store_true"
+    )
+
+    parser.add_argument(
+        "--wav",
+        help="Directory to write an audio example (WAV) of each skeleton to (requires NumPy).",
+        default=None
+    )
+
+    parser.add_argument(
+        "--exercises",
+        help="Expand each skeleton into exercises: comma-separated patterns among ascending, "
+        "descending, groups-n, skips-n and permutations-n. "
+        f"Defaults to {",".join(exercise_patterns)}.",
+        nargs="?",
+        const=",".join(exercise_patterns),
+        default=None
+    )
+
+    parser.add_argument(
+        "--count-exercises",
+        help="With --exercises, only count the exercises and events.",
+        action="store_true"
+    )
+
+    parser.add_argument(
+        "--svg",
+        help="Directory to write a fretboard diagram (SVG) of each skeleton to.",
+        default=None
+    )
+
+    parser.add_argument(
+        "--stereo",
+        help="Write stereo WAV files, panning low notes left and high notes right.",
+        action="store_true"
+    )
+
+    parser.add_argument(
+        "-n",
+        "--count",
+        help="Number of skeletons to generate. Defaults to 1.",
+        type=int,
+        default=1
+    )
+
+    parser.add_argument(
+        "-s",
+        "--seed",
+        help="Seed for the random number generator, for reproducible output.",
+        type=int,
+        default=None
+    )
+
+    parser.add_argument(
+        "--find-notes",
+        help="List every skeleton, string grouping and starting fret that plays exactly these "
+        "notes, e.g. 'C E G A' or pitch classes '0 4 7 9'.",
+        default=None
+    )
+
+    parser.add_argument(
+        "--find-within",
+        help="With --find-notes, also list those that play only some of the notes.",
+        action="store_true"
+    )
+
+    parser.add_argument(
+        "--contains-chord",
+        help="Only keep skeletons whose notes contain this chord, e.g. 'minor', 'D minor', "
+        "'maj7' or 'F# dim7'.",
+        default=None
+    )
+
+    parser.add_argument(
+        "--within-scale",
+        help="Only keep skeletons whose notes all fit in this scale, e.g. 'D dorian' "
+        "or 'minor-pentatonic' (any key).",
+        default=None
+    )
+
+    parser.add_argument(
+        "--one-per-family",
+        help="Skip skeletons from a family already shown: 'transposition' (same pitch "
+        "classes above the root) or 'mode' (rotations of the same pitch-class set).",
+        choices=["transposition", "mode"],
+        default=None
+    )
+
+    parser.add_argument(
+        "--disable-rule",
+        help="Turn off a curation rule by name (repeatable). See --list-rules.",
+        action="append",
+        default=[]
+    )
+
+    parser.add_argument(
+        "--enable-rule",
+        help="Turn on a curation rule by name (repeatable). See --list-rules.",
+        action="append",
+        default=[]
+    )
+
+    parser.add_argument(
+        "--list-rules",
+        help="List the curation rules and where they apply.",
+        action="store_true"
+    )
+
+    parser.add_argument(
+        "--all-positions",
+        help="Show each skeleton at every starting fret where it is valid, as a neck chart.",
+        action="store_true"
+    )
+
+    parser.add_argument(
+        "--stratify",
+        help="Fill (string grouping, length, starting fret) strata with exact quotas adding up "
+        "to --count: 'legacy' (form_skeleton()'s expected mix), 'uniform' or 'proportional' "
+        "(to each stratum's number of valid skeletons). --grouping, --length and --fret narrow the strata.",
+        choices=["legacy", "uniform", "proportional"],
+        default=None
+    )
+
+    parser.add_argument(
+        "--quota",
+        help="Exact number of skeletons for one stratum, as 'grouping,length,fret=count' "
+        "(repeatable). Replaces --count.",
+        action="append",
+        default=[]
+    )
+
+    parser.add_argument(
+        "--practice-log",
+        help="SQLite practice log: draw skeletons this --user has not seen yet, and record them.",
+        default=None
+    )
+
+    parser.add_argument(
+        "--user",
+        help="Student name for --practice-log. Defaults to 'default'.",
+        default="default"
+    )
+
+    parser.add_argument(
+        "--neighbours",
+        help="List valid skeletons one edit away (add, remove or shift a note) "
+        "from a skeleton such as '0,3,4'. Needs -g and -f.",
+        default=None
+    )
+
+    parser.add_argument(
+        "--where",
+        help="Draw skeletons matching a filter such as 'length >= 5 and has = 7 and span <= 4 "
+        f"and not ic = 6'. Attributes: {", ".join(where_attributes)}.",
+        default=None
+    )
+
+    parser.add_argument(
+        "--ordered",
+        help="With --where, take the first --count matches in catalog order instead of random draws.",
+        action="store_true"
+    )
+
+    parser.add_argument(
+        "--shard",
+        help="Write shard k of n ('k/n', from 0) of a batch of --count skeletons "
+        "(or of --where --ordered matches) as a shard file for --merge. Needs --seed.",
+        default=None
+    )
+
+    parser.add_argument(
+        "--merge",
+        help="Combine shard files into one ordered output, in any --format.",
+        nargs="+",
+        default=None
+    )
+
+    parser.add_argument(
+        "--checkpoint",
+        help="Record export progress in this file so that an interrupted run, restarted "
+        "with the same options, resumes where it stopped. Needs --output (tab or json, or --shard).",
+        default=None
+    )
+
+    parser.add_argument(
+        "--checkpoint-every",
+        help="Skeletons written between checkpoints. Defaults to 1000.",
+        type=int,
+        default=1000
+    )
+
+    parser.add_argument(
+        "--optimize",
+        help="Search for the --count best skeletons by an objective: "
+        f"{", ".join(objectives)} or 'module:function' scoring a with_fretboard() tuple.",
+        default=None
+    )
+
+    parser.add_argument(
+        "--generations",
+        help="Generations of --optimize search. Defaults to 40.",
+        type=int,
+        default=40
+    )
+
+    parser.add_argument(
+        "--population",
+        help="Population size of --optimize search. Defaults to 64.",
+        type=int,
+        default=64
+    )
+
+    parser.add_argument(
+        "--review",
+        help="Spaced-repetition schedule file: show up to --count skeletons due for review.",
+        default=None
+    )
+
+    parser.add_argument(
+        "--grade",
+        help="With --review, grade your recall of a skeleton as 'id=quality' (0-5, repeatable). "
+        "Ungraded skeletons are added to the schedule.",
+        action="append",
+        default=[]
+    )
+
+    parser.add_argument(
+        "--voice-lead",
+        help="Choose string grouping and starting fret for each generated skeleton "
+        "so the hand moves as little as possible between consecutive skeletons.",
+        action="store_true"
+    )
+
+    parser.add_argument(
+        "--tour-to",
+        help="Build a practice tour of --count skeletons with the smallest hand movements, "
+        "from --fret (if set) to this starting fret.",
+        type=int,
+        default=None
+    )
+
+    parser.add_argument(
+        "--check-equivalence",
+        help="Check the registered fast paths against form_skeleton(), skeleton_to_fretboard() "
+        "and get_skel_notes() over the whole valid-skeleton space, and report speedups.",
+        action="store_true"
+    )
+
+    parser.add_argument(
+        "--samples",
+        help="Draws per sampler for --check-equivalence. Defaults to 20000.",
+        type=int,
+        default=20000
+    )
+
+    parser.add_argument(
+        "-w",
+        "--workers",
+        help="Worker processes for parallel modes. Defaults to the number of CPUs.",
+        type=int,
+        default=os.cpu_count()
+    )
+
     args = parser.parse_args()
 
     if args.fret and args.fret.isdigit():
@@ -129,11 +831,14 @@ def optional_arguments():
     if args.shflat in ["#", "b"]:
         args.shflat = args.shflat
 
-    return args.fret, args.length, args.grouping, args.shflat
+    return args
 
 
 def form_skeleton(
-    start_fret: int | str = "r", length: int | str = "r", string_grouping: int = "r"
+    start_fret: int | str = "r",
+    length: int | str = "r",
+    string_grouping: int = "r",
+    rng: random.Random = random,
 ):
     """Skeleton generator and gatekeeper. Conformity with curation criteria is checked here.
     If necessary, new skeletons are unearthed (i.e. generated).
@@ -147,13 +852,16 @@ def form_skeleton(
         Upper and lower limits depend on string grouping.
         Defaults to "r" for random.
 
-        string_grouping (int, optional): Sets string group size (between 1 and 3). Defaults to 3.
+        string_grouping (int, optional): Sets string group size (between 1 and 6;
+        random picks between 1 and 3). Defaults to 3.
+
+        rng (random.Random, optional): Source of randomness. Defaults to the random module.
 
     Raises:
         ValueError: If string_grouping == 1 and length not between 2 and 4.
         ValueError: If string_grouping == 2 and length not between 2 and 8.
         ValueError: If string_grouping == 3 and length not between 3 and 12.
-        ValueError: If string_grouping not "r" or between 1 and 3.
+        ValueError: If string_grouping not "r" or between 1 and 6.
 
     Returns:
         skeleton [list]: Curated skeleton ready for fretboard formatting.
@@ -164,407 +872,283 @@ def form_skeleton(
         start_fret [int].
     """
 
-    start_fret = set_start_fret(start_fret)
+    start_fret = set_start_fret(start_fret, rng)
     if string_grouping in ["r", ""]:
-        string_grouping = random.choice(range(1, 4))
-    match string_grouping:
-
-        case 1:
-            ceiling = 4
-            if length in ["r", ""]:
-                length = random.choice(range(2, 5))
-            elif isinstance(length, str):
-                raise ValueError("See help (-h or --help) for rules regarding length.")
-            elif 2 <= length <= 4:
-                pass
-            else:
-                # Handling length being set by user in command line and string_grouping being random.
-                length = random.choice(range(2, 5))
-                print(
-                    "\nWARNING! ValueError: Length for a string grouping of 1 can be between 2 and 4"
-                )
-            while True:
-                skeleton = unearth_skeleton(length, ceiling)
-                for i in range(3, len(skeleton)):
-                    a, b, c, d = chromatic_slop_check(skeleton, i)
-                    if b == a + 1 and c == b + 1 and d == c + 1:
-                        break
-                else:
-                    return skeleton, string_grouping, start_fret
+        string_grouping = rng.choice(range(1, 4))
+    if string_grouping not in temperament.ceilings:
+        sys.exit(
+            "Error. String grouping: 1 to 6 or 'r' for random (no argument defaults to random)."
+        )
+    length = set_length(length, string_grouping, rng)
+    if string_grouping not in temperament.catalog_groupings:
+        return draw_skeleton(string_grouping, start_fret, length, rng), string_grouping, start_fret
+    ceiling = temperament.ceilings[string_grouping]
+    while True:
+        skeleton = unearth_skeleton(length, ceiling, rng)
+        if is_valid_skeleton(skeleton, string_grouping, start_fret):
+            return skeleton, string_grouping, start_fret
+
+
+def is_valid_skeleton(skeleton: list, string_grouping: int, start_fret: int) -> bool:
+    """Curation criteria applied by form_skeleton() to each unearthed skeleton.
+    Runs the enabled curation_rules that apply, in rule_plan() order.
 
-        case 2:
-            ceiling = 9
-            if length in ["r", ""]:
-                length = random.choice(range(2, 9))
-            elif isinstance(length, str):
-                raise ValueError("See help (-h or --help) for rules regarding length.")
-            elif 2 <= length <= 8:
-                pass
-            else:
-                # Handling length being set by user in command line and string_grouping being random.
-                length = random.choice(range(2, 9))
-                print(
-                    "\nWARNING! ValueError: Length for a string grouping of 2 can be between 2 and 8"
-                )
-            while True:
-                skeleton = unearth_skeleton(length, ceiling)
-                # Potentially optional avoidance of severe chromatic slop at start and end of skeleton.
-                if skeleton[-3:-1] == [7,8] and skeleton[-1] == 9 and skeleton[1] == 1:
-                    continue
-                # Ensuring no skeletons over 2 in length have 9 (maj 6) as second note.
-                elif len(skeleton) > 2 and skeleton[1] == 9:
-                    continue
-                # Ensuring valid skeletons of 2 in length.
-                elif (
-                    (len(skeleton) == 2 and start_fret == 0 and skeleton[1] < 5)
-                    or (len(skeleton) == 2 and start_fret == 1 and skeleton[1] < 4)
-                    or (len(skeleton) == 2 and start_fret == 2 and skeleton[1] < 3)
-                    or (len(skeleton) == 2 and start_fret == 3 and skeleton[1] < 2)
-                ):
-                    continue
-                # Ensuring valid skeletons of 3 in length.
-                elif (
-                    (len(skeleton) == 3 and start_fret == 0 and skeleton[2] < 5)
-                    or (len(skeleton) == 3 and start_fret == 1 and skeleton[2] < 4)
-                    or (len(skeleton) == 3 and start_fret == 2 and skeleton[2] < 3)
-                ):
-                    continue
+    Args:
+        skeleton (list): Candidate skeleton, as returned by unearth_skeleton().
 
-                # Ensuring valid skeletons of 4 and over in length.
-                elif len(skeleton) == 4 and start_fret == 0 and skeleton[-1] < 5:
-                    continue
+        string_grouping (int): String group size (between 1 and 6).
 
-                for i in range(3, len(skeleton)):
-                    a, b, c, d = chromatic_slop_check(skeleton, i)
-                    if b == a + 1 and c == b + 1 and d == c + 1:
-                        break
-                else:
-                    return skeleton, string_grouping, start_fret
+        start_fret (int): Starting fret for skeleton.
 
-        case 3:
-            ceiling = 14
-            if length in ["r", ""]:
-                # Limiting max skel lengths to avoid chromatic slop.
-                length = random.choice(range(3, 12))
-            elif isinstance(length, str):
-                raise ValueError("See help (-h or --help) for rules regarding length.")
-            elif 3 <= length <= 12:
-                pass
-            else:
-                # Handling length being set by user in command line and string_grouping being random.
-                length = random.choice(range(3, 12))
-                print(
-                    "\nWARNING! ValueError: Length for a string grouping of 3 can be between 3 and 12."
-                )
-            while True:
-                skeleton = unearth_skeleton(length, ceiling)
-                # Potentially optional avoidance of severe chromatic slop at start and end of skeleton.
-                if skeleton[-3:-1] == [12,13] and skeleton[-1] == 14 and skeleton[1] == 1:
-                    continue
-                if skeleton[1] > 9:
-                    continue
-                if start_fret == 0:
-                    # Ensuring valid skeletons of 3 in length.
-                    if len(skeleton) == 3 and (skeleton[1] < 5 or skeleton[2] < 10):
-                        continue
-                    # Ensuring valid skeletons of 4 in length.
-                    if len(skeleton) == 4:
-                        if (
-                            (skeleton[-1] < 10)
-                            or (skeleton[1] < 5 and skeleton[2] < 5 and skeleton[3] > 9)
-                            or (skeleton[1] < 5 and skeleton[2] > 9 and skeleton[3] > 9)
-                        ):
-                            continue
-                    # Ensuring valid skeletons of 5 (and above) in length.
-                    elif len(skeleton) >= 5:
-                        if (
-                            (skeleton[1] < 5 and skeleton[2] > 9)
-                            or (skeleton[2] < 5 and skeleton[3] > 9)
-                            or (skeleton[-1] < 10)
-                            or (skeleton[-2] < 5 and skeleton[-1] > 10)
-                            # Ensuring valid skeletons of 6 in length.
-                            or (
-                                len(skeleton) == 6
-                                and (skeleton[-3] < 5 and skeleton[-2] > 9)
-                            )
-                            # Ensuring valid skeletons of 7 in length.
-                            or (
-                                len(skeleton) == 7
-                                and skeleton[-4] < 5
-                                and skeleton[-3] > 9
-                            )
-                            # Ensuring valid skeletons of 8 in length.
-                            or (
-                                len(skeleton) == 8
-                                and skeleton[-5] < 5
-                                and skeleton[-4] > 9
-                            )
-                        ):
-                            continue
+    Raises:
+        ValueError: If string_grouping not between 1 and 6.
 
-                if start_fret == 1:
-                    # Ensuring valid skeletons of 3 in length.
-                    if len(skeleton) == 3 and (skeleton[1] < 4 or skeleton[2] < 9):
-                        continue
+    Returns:
+        bool: Whether the skeleton conforms.
+    """
+    if string_grouping not in temperament.ceilings:
+        raise ValueError("String grouping: 1 to 6.")
+
+    plan = rule_plan(string_grouping, len(skeleton), start_fret)
+    plan[0] += 1
+    if plan[0] % reorder_interval == 0:
+        plan[1].sort(key=rule_priority)
+    timed = plan[0] % timing_interval == 0
+
+    for rule in plan[1]:
+        rule["checks"] += 1
+        if timed:
+            start = time.perf_counter()
+            rejected = rule["check"](skeleton, string_grouping, start_fret)
+            rule["seconds"] += time.perf_counter() - start
+            rule["timed"] += 1
+        else:
+            rejected = rule["check"](skeleton, string_grouping, start_fret)
+        if rejected:
+            rule["rejections"] += 1
+            return False
+    return True
 
-                    elif len(skeleton) == 4:
-                        if (
-                            (skeleton[-1] < 10)
-                            or (skeleton[1] < 5 and skeleton[2] < 5)
-                            or (skeleton[1] < 5 and skeleton[2] > 9 and skeleton[3] > 9)
-                        ):
-                            continue
-                    # Ensuring valid skeletons of 5 (and above) in length.
-                    elif len(skeleton) >= 5:
-                        if (
-                            (skeleton[1] < 5 and skeleton[2] > 9)
-                            or (skeleton[2] < 5 and skeleton[3] > 9)
-                            or (skeleton[3] < 5 and skeleton[4] > 9)
-                            or (skeleton[-1] < 10)
-                            or (skeleton[-2] < 5 and skeleton[-1] > 10)
-                        ):
-                            continue
 
-                    elif (
-                        # Ensuring valid skeletons of 6 in length.
-                        (len(skeleton) == 6 and skeleton[-3] < 5 and skeleton[-2] > 9)
-                        # Ensuring valid skeletons of 7 in length.
-                        or (
-                            len(skeleton) == 7 and skeleton[-4] < 5 and skeleton[-3] > 9
-                        )
-                        # Ensuring valid skeletons of 8 in length.
-                        or (
-                            len(skeleton) == 8 and skeleton[-5] < 5 and skeleton[-4] > 9
-                        )
-                    ):
-                        continue
+# Curation rules by name. Each rule's check returns True to reject a skeleton;
+# "groupings", "lengths" and "start_frets" say where it applies (None: everywhere).
+curation_rules = {}
 
-                if start_fret == 2:
-                    # Ensuring valid skeletons of 3 in length.
-                    if len(skeleton) == 3 and (skeleton[1] < 3 or skeleton[2] < 8):
-                        continue
-                    # Avoiding FRETTED distances of over 4 frets (i.e. major third)
-                    if skeleton[1] == 4 and skeleton[2] > 13:
-                        continue
-                    # Subtract based on allowable notes (1 per fret?)
-                    # Ensuring valid skeletons of 4 in length.
-                    elif len(skeleton) == 4:
-                        if (
-                            (skeleton[-1] < 10)
-                            or (skeleton[1] < 5 and skeleton[2] < 5 and skeleton[3] > 9)
-                            or (skeleton[1] < 5 and skeleton[2] > 9 and skeleton[3] > 9)
-                        ):
-                            continue
-                    # Ensuring valid skeletons of 5 (and above) in length.
-                    elif len(skeleton) >= 5:
-                        if (
-                            (skeleton[1] < 5 and skeleton[2] > 9)
-                            or (skeleton[2] < 5 and skeleton[3] > 9)
-                            or (skeleton[3] < 5 and skeleton[4] > 9)
-                            or (skeleton[-1] < 10)
-                            or (skeleton[-2] < 5 and skeleton[-1] > 10)
-                        ):
-                            continue
+# Rule evaluation order per (divisions, string_grouping, length, start_fret):
+# [validations, rules].
+rule_plans = {}
 
-                    elif (
-                        # Ensuring valid skeletons of 6 in length.
-                        (len(skeleton) == 6 and skeleton[-3] < 5 and skeleton[-2] > 9)
-                        # Ensuring valid skeletons of 7 in length.
-                        or (
-                            len(skeleton) == 7 and skeleton[-4] < 5 and skeleton[-3] > 9
-                        )
-                        # Ensuring valid skeletons of 8 in length.
-                        or (
-                            len(skeleton) == 8 and skeleton[-5] < 5 and skeleton[-4] > 9
-                        )
-                    ):
-                        continue
+# Validations between re-orderings of a plan, and between timed rule checks.
+reorder_interval = 4096
+timing_interval = 64
 
-                elif start_fret == 3:
-                    # Ensuring valid skeletons of 3 in length.
-                    if len(skeleton) == 3 and (skeleton[1] < 2 or skeleton[2] < 7):
-                        continue
-                    # Avoiding FRETTED distances of over 4 frets (i.e. major third)
-                    elif skeleton[1] == 3 and skeleton[2] > 12:
-                        continue
-                    elif skeleton[1] == 4 and skeleton[2] > 13:
-                        continue
-                    # Subtract based on allowable notes (1 per fret?)
-                    # Ensuring valid skeletons of 4 in length.
-                    elif len(skeleton) == 4:
-                        if (
-                            (skeleton[-1] < 10)
-                            or (skeleton[1] < 5 and skeleton[2] < 5 and skeleton[3] > 9)
-                            or (skeleton[1] < 5 and skeleton[2] > 9 and skeleton[3] > 9)
-                        ):
-                            continue
-                    # Ensuring valid skeletons of 5 (and above) in length.
-                    elif len(skeleton) >= 5:
-                        if (
-                            (skeleton[1] < 5 and skeleton[2] > 9)
-                            or (skeleton[2] < 5 and skeleton[3] > 9)
-                            or (skeleton[3] < 5 and skeleton[4] > 9)
-                            or (skeleton[-1] < 10)
-                            or (skeleton[-2] < 5 and skeleton[-1] > 10)
-                        ):
-                            continue
 
-                    elif (
-                        # Ensuring valid skeletons of 6 in length.
-                        (len(skeleton) == 6 and skeleton[-3] < 5 and skeleton[-2] > 9)
-                        # Ensuring valid skeletons of 7 in length.
-                        or (
-                            len(skeleton) == 7 and skeleton[-4] < 5 and skeleton[-3] > 9
-                        )
-                        # Ensuring valid skeletons of 8 in length.
-                        or (
-                            len(skeleton) == 8 and skeleton[-5] < 5 and skeleton[-4] > 9
-                        )
-                    ):
-                        continue
+def curation_rule(
+    name: str,
+    groupings,
+    lengths=None,
+    start_frets=None,
+    enabled: bool = True,
+):
+    """Registers the decorated function in curation_rules.
 
-                elif start_fret == 4:
-                    # Ensuring valid skeletons of 3 in length.
-                    if len(skeleton) == 3 and skeleton[-1] < 6:
-                        continue
-                    # Avoiding FRETTED distances of over 4 frets (i.e. major third)
-                    elif skeleton[1] == 2 and skeleton[2] > 11:
-                        continue
-                    elif skeleton[1] == 3 and skeleton[2] > 12:
-                        continue
-                    elif skeleton[1] == 4 and skeleton[2] > 13:
-                        continue
-                    # Subtract based on allowable notes (1 per fret?)
-                    # Ensuring valid skeletons of 4 in length.
-                    elif len(skeleton) == 4:
-                        if (
-                            (skeleton[-1] < 10)
-                            or (skeleton[1] < 5 and skeleton[2] < 5 and skeleton[3] > 9)
-                            or (skeleton[1] < 5 and skeleton[2] > 9 and skeleton[3] > 9)
-                        ):
-                            continue
-                    # Ensuring valid skeletons of 5 (and above) in length.
-                    elif len(skeleton) >= 5:
-                        if (
-                            (skeleton[1] < 5 and skeleton[2] > 9)
-                            or (skeleton[2] < 5 and skeleton[3] > 9)
-                            or (skeleton[3] < 5 and skeleton[4] > 9)
-                            or (skeleton[-1] < 10)
-                            or (skeleton[-2] < 5 and skeleton[-1] > 10)
-                        ):
-                            continue
+    Args:
+        name (str): Rule name, as used by --disable-rule and --enable-rule.
 
-                    elif (
-                        # Ensuring valid skeletons of 6 in length.
-                        (len(skeleton) == 6 and skeleton[-3] < 5 and skeleton[-2] > 9)
-                        # Ensuring valid skeletons of 7 in length.
-                        or (
-                            len(skeleton) == 7 and skeleton[-4] < 5 and skeleton[-3] > 9
-                        )
-                        # Ensuring valid skeletons of 8 in length.
-                        or (
-                            len(skeleton) == 8 and skeleton[-5] < 5 and skeleton[-4] > 9
-                        )
-                    ):
-                        continue
+        groupings (iterable): String groupings the rule applies to.
 
-                elif start_fret == 5:
-                    # Ensuring valid skeletons of 3 in length.
-                    if len(skeleton) == 3 and skeleton[-1] < 5:
-                        continue
-                    elif skeleton[2] - skeleton[1] > 9:
-                        continue
-                    # Subtract based on allowable notes (1 per fret?)
-                    # Ensuring valid skeletons of 4 in length.
-                    elif len(skeleton) == 4:
-                        if (
-                            (skeleton[-1] < 10)
-                            or (skeleton[1] < 5 and skeleton[2] < 5 and skeleton[3] > 9)
-                            or (skeleton[1] < 5 and skeleton[2] > 9 and skeleton[3] > 9)
-                        ):
-                            continue
-                    # Ensuring valid skeletons of 5 (and above) in length.
-                    elif len(skeleton) >= 5:
-                        if (
-                            (skeleton[1] < 5 and skeleton[2] > 9)
-                            or (skeleton[2] < 5 and skeleton[3] > 9)
-                            or (skeleton[3] < 5 and skeleton[4] > 9)
-                            or (skeleton[-1] < 10)
-                            or (skeleton[-2] < 5 and skeleton[-1] > 10)
-                        ):
-                            continue
+        lengths (iterable, optional): Skeleton lengths it applies to. Defaults to all.
 
-                    elif (
-                        # Ensuring valid skeletons of 6 in length.
-                        (len(skeleton) == 6 and skeleton[-3] < 5 and skeleton[-2] > 9)
-                        # Ensuring valid skeletons of 7 in length.
-                        or (
-                            len(skeleton) == 7 and skeleton[-4] < 5 and skeleton[-3] > 9
-                        )
-                        # Ensuring valid skeletons of 8 in length.
-                        or (
-                            len(skeleton) == 8 and skeleton[-5] < 5 and skeleton[-4] > 9
-                        )
-                    ):
-                        continue
+        start_frets (iterable, optional): Starting frets it applies to. Defaults to all.
 
-                elif start_fret > 5:
-                    # Ensuring valid skeletons of 3 in length.
-                    if len(skeleton) == 3 and skeleton[-1] < 6:
-                        continue
-                    elif len(skeleton) == 3 and skeleton[2] - skeleton[1] > 9:
-                        continue
-                    # Subtract based on allowable notes (1 per fret?)
-                    # Ensuring valid skeletons of 4 in length.
-                    elif len(skeleton) == 4:
-                        if (
-                            (skeleton[-1] < 10)
-                            or (skeleton[1] < 5 and skeleton[2] < 5 and skeleton[3] > 9)
-                            or (skeleton[1] < 5 and skeleton[2] > 9 and skeleton[3] > 9)
-                        ):
-                            continue
-                    # Ensuring valid skeletons of 5 (and above) in length.
-                    elif len(skeleton) >= 5:
-                        if (
-                            (skeleton[1] < 5 and skeleton[2] > 9)
-                            or (skeleton[2] < 5 and skeleton[3] > 9)
-                            or (skeleton[3] < 5 and skeleton[4] > 9)
-                            or (skeleton[-1] < 10)
-                            or (skeleton[-2] < 5 and skeleton[-1] > 10)
-                        ):
-                            continue
+        enabled (bool, optional): Whether it runs by default. Defaults to True.
 
-                    elif (
-                        # Ensuring valid skeletons of 6 in length.
-                        (len(skeleton) == 6 and skeleton[-3] < 5 and skeleton[-2] > 9)
-                        # Ensuring valid skeletons of 7 in length.
-                        or (
-                            len(skeleton) == 7 and skeleton[-4] < 5 and skeleton[-3] > 9
-                        )
-                        # Ensuring valid skeletons of 8 in length.
-                        or (
-                            len(skeleton) == 8 and skeleton[-5] < 5 and skeleton[-4] > 9
-                        )
-                    ):
-                        continue
+    Returns:
+        Callable: Decorator taking check(skeleton, string_grouping, start_fret) -> bool.
+    """
+    def register(check):
+        curation_rules[name] = {
+            "name": name,
+            "check": check,
+            "groupings": frozenset(groupings),
+            "lengths": None if lengths is None else frozenset(lengths),
+            "start_frets": None if start_frets is None else frozenset(start_frets),
+            "enabled": enabled,
+            "checks": 0,
+            "rejections": 0,
+            "seconds": 0.0,
+            "timed": 0,
+        }
+        rule_plans.clear()
+        return check
+    return register
+
+
+def rule_plan(string_grouping: int, length: int, start_fret: int) -> list:
+    """Enabled rules that apply to a setting, in evaluation order (cached in rule_plans)."""
+    key = temperament.divisions, string_grouping, length, start_fret
+    if key not in rule_plans:
+        rules = [
+            rule for rule in curation_rules.values()
+            if rule["enabled"]
+            and rule_grouping(string_grouping) in rule["groupings"]
+            and (rule["lengths"] is None or length in rule["lengths"])
+            and (rule["start_frets"] is None or start_fret in rule["start_frets"])
+        ]
+        rule_plans[key] = [0, sorted(rules, key=rule_priority)]
+    return rule_plans[key]
+
+
+def rule_grouping(string_grouping: int) -> int:
+    """Grouping whose curation rules apply to string_grouping. Outside 12-TET no grouping
+    has a hand-tuned layout (or rules of its own): each is curated like the widest one.
+    """
+    return string_grouping if temperament.divisions == 12 else max(temperament.ceilings)
 
-                for i in range(3, len(skeleton)):
-                    a, b, c, d = chromatic_slop_check(skeleton, i)
-                    if b == a + 1 and c == b + 1 and d == c + 1:
-                        break
-                else:
-                    return skeleton, string_grouping, start_fret
 
+def rule_priority(rule: dict) -> float:
+    """Expected cost of a rule per rejection, from its running statistics.
+    Cheap, highly selective rules come first; rules yet to be measured keep their place.
+    """
+    if not rule["timed"] or not rule["checks"]:
+        return 0.0
+    cost = rule["seconds"] / rule["timed"]
+    return cost / max(rule["rejections"] / rule["checks"], 1e-6)
 
-        case _:
-            sys.exit(
-                "Error. String grouping: 1 to 3 or 'r' for random (no argument defaults to random)."
-            )
 
+def set_rule_enabled(name: str, enabled: bool):
+    """Enables or disables a curation rule (and drops anything built with the old rules).
 
-def chromatic_slop_check(skeleton, i):
+    Raises:
+        ValueError: If no rule has that name.
     """
-    Checks to ensure no more than three notes a semi-tone apart can occur in the skeleton set.
+    if name not in curation_rules:
+        raise ValueError(
+            f"Unknown rule '{name}'. Rules: {", ".join(curation_rules)}."
+        )
+    curation_rules[name]["enabled"] = enabled
+    rule_plans.clear()
+    valid_skeletons.cache_clear()
+    voicing_buckets.cache_clear()
+    voicing_catalog.cache_clear()
+    attribute_bitmaps.cache_clear()
+
+
+def describe_rules() -> str:
+    """One line per curation rule: name, state, where it applies and its running statistics."""
+    lines = []
+    for rule in curation_rules.values():
+        where = [f"groupings {",".join(map(str, sorted(rule["groupings"])))}"]
+        if rule["lengths"] is not None:
+            where.append(f"lengths {",".join(map(str, sorted(rule["lengths"])))}")
+        if rule["start_frets"] is not None:
+            where.append(f"frets {",".join(map(str, sorted(rule["start_frets"])))}")
+        line = f"{rule["name"]:<24}{"on" if rule["enabled"] else "off":<5}{"; ".join(where)}"
+        if rule["checks"]:
+            line += f" (rejects {rule["rejections"] / rule["checks"]:.1%})"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+@curation_rule("chromatic-slop", groupings=[1, 2, 3, 4, 5, 6])
+def rule_chromatic_slop(skeleton, string_grouping, start_fret):
+    for i in range(3, len(skeleton)):
+        a, b, c, d = chromatic_slop_check(skeleton, i)
+        if b == a + 1 and c == b + 1 and d == c + 1:
+            return True
+    return False
+
+
+@curation_rule("slop-at-ends", groupings=[2, 3], lengths=range(4, 13))
+def rule_slop_at_ends(skeleton, string_grouping, start_fret):
+    # Potentially optional avoidance of severe chromatic slop at start and end of skeleton.
+    ceiling = temperament.ceilings[string_grouping]
+    return (
+        skeleton[-3:-1] == [ceiling - 2, ceiling - 1]
+        and skeleton[-1] == ceiling
+        and skeleton[1] == 1
+    )
+
+
+@curation_rule("major-sixth-second", groupings=[2], lengths=range(3, 9))
+def rule_major_sixth_second(skeleton, string_grouping, start_fret):
+    # Ensuring no skeletons over 2 in length have 9 (maj 6) as second note.
+    return skeleton[1] == 9
+
+
+@curation_rule("two-string-reach", groupings=[2], lengths=[2, 3, 4], start_frets=range(0, 4))
+def rule_two_string_reach(skeleton, string_grouping, start_fret):
+    # Ensuring valid skeletons of 2, 3 and 4 in length:
+    # near the nut, the last note must reach the second string.
+    highest_fret = {2: 3, 3: 2, 4: 0}[len(skeleton)]
+    return start_fret <= highest_fret and skeleton[-1] < 5 - start_fret
+
+
+@curation_rule("wide-second", groupings=[3])
+def rule_wide_second(skeleton, string_grouping, start_fret):
+    return skeleton[1] > 9
+
+
+@curation_rule("three-string-length-3", groupings=[3], lengths=[3])
+def rule_three_string_length_3(skeleton, string_grouping, start_fret):
+    # Ensuring valid skeletons of 3 in length: one note per string.
+    second, third = {0: (5, 10), 1: (4, 9), 2: (3, 8), 3: (2, 7), 4: (0, 6), 5: (0, 5)}.get(
+        start_fret, (0, 6)
+    )
+    return skeleton[1] < second or skeleton[2] < third
+
+
+@curation_rule("fretted-stretch", groupings=[3], start_frets=[2, 3, 4])
+def rule_fretted_stretch(skeleton, string_grouping, start_fret):
+    # Avoiding FRETTED distances of over 4 frets (i.e. major third)
+    return 6 - start_fret <= skeleton[1] <= 4 and skeleton[2] > skeleton[1] + 9
+
+
+@curation_rule("wide-upper-gap", groupings=[3], start_frets=range(5, 21 - 4 + 1))
+def rule_wide_upper_gap(skeleton, string_grouping, start_fret):
+    return (start_fret == 5 or len(skeleton) == 3) and skeleton[2] - skeleton[1] > 9
+
+
+@curation_rule("three-string-top-reach", groupings=[3], lengths=range(4, 13))
+def rule_three_string_top_reach(skeleton, string_grouping, start_fret):
+    # Ensuring valid skeletons of 4 (and above) in length: the top string is used.
+    return skeleton[-1] < 10
+
+
+@curation_rule("three-string-length-4", groupings=[3], lengths=[4])
+def rule_three_string_length_4(skeleton, string_grouping, start_fret):
+    # Ensuring valid skeletons of 4 in length: no skipped or overcrowded strings.
+    return (
+        (skeleton[1] < 5 and skeleton[2] > 9 and skeleton[3] > 9)
+        or (skeleton[1] < 5 and skeleton[2] < 5 and (start_fret == 1 or skeleton[3] > 9))
+    )
+
+
+@curation_rule("three-string-skips", groupings=[3], lengths=range(5, 13))
+def rule_three_string_skips(skeleton, string_grouping, start_fret):
+    # Ensuring valid skeletons of 5 (and above) in length: no skipped middle string.
+    return (
+        (skeleton[1] < 5 and skeleton[2] > 9)
+        or (skeleton[2] < 5 and skeleton[3] > 9)
+        or (skeleton[-2] < 5 and skeleton[-1] > 10)
+        or (
+            (start_fret > 0 or 6 <= len(skeleton) <= 8)
+            and skeleton[3] < 5
+            and skeleton[4] > 9
+        )
+    )
+
+
+@curation_rule("every-string", groupings=[4, 5, 6])
+def rule_every_string(skeleton, string_grouping, start_fret):
+    # Ensuring wide groupings use every string of the group (each string covers string_steps).
+    return len({i // temperament.string_steps for i in skeleton}) < string_grouping
+
+
+def chromatic_slop_check(skeleton, i):
+    """
+    Checks to ensure no more than three notes a step (a semi-tone in 12-TET) apart
+    can occur in the skeleton set.
     e.g. [0, 1, 2] == thumbs up; [0, 1, 2, 3] == thumbs down.
     """
     a = skeleton[i - 3]
@@ -574,7 +1158,7 @@ def chromatic_slop_check(skeleton, i):
     return a,b,c,d
 
 
-def set_start_fret(fret: int | str) -> int:
+def set_start_fret(fret: int | str, rng: random.Random = random) -> int:
     """Sets starting fret for skeleton and validates optional_arguments().
     For use within form_skeleton() only.
 
@@ -584,6 +1168,8 @@ def set_start_fret(fret: int | str) -> int:
         to allow adequate room for skeletons
         (the ceiling is frets - 4). Defaults to "r" for random choice.
 
+        rng (random.Random, optional): Source of randomness. Defaults to the random module.
+
     Returns:
         int | str: Chosen int or random int.
     """
@@ -592,27 +1178,63 @@ def set_start_fret(fret: int | str) -> int:
             raise ValueError(
                 "Starting fret: number or 'r' for random (defaults to random)."
             )
-        if fret > 21 - 4:
+        if fret > temperament.start_frets[-1]:
             sys.exit(
                 "ValueError: Starting fret too high — you'll run out of frets!"
             )
         return fret
     elif isinstance(fret, str):
         if fret in ("r", ""):
-            return random.choice(range(0, 21 - 4))
+            return rng.choice(temperament.random_start_frets)
         else:
             raise ValueError(
                 "Starting fret: number or 'r' for random (defaults to random)."
             )
 
 
-def unearth_skeleton(length: int, ceiling: int) -> list[int]:
+def set_length(length: int | str, string_grouping: int, rng: random.Random = random) -> int:
+    """Sets skeleton length and validates optional_arguments().
+    For use within form_skeleton() only.
+
+    Args:
+        length (int | str): Length or "r" for random.
+
+        string_grouping (int): String group size (between 1 and 6).
+
+        rng (random.Random, optional): Source of randomness. Defaults to the random module.
+
+    Raises:
+        ValueError: If length is a string other than "r".
+
+    Returns:
+        int: Chosen int or random int.
+    """
+    if length in ["r", ""]:
+        return rng.choice(temperament.random_lengths[string_grouping])
+    elif isinstance(length, str):
+        raise ValueError("See help (-h or --help) for rules regarding length.")
+    elif length in temperament.lengths[string_grouping]:
+        return length
+    # Handling length being set by user in command line and string_grouping being random.
+    allowed = temperament.lengths[string_grouping]
+    length = rng.choice(temperament.random_lengths[string_grouping])
+    print(
+        f"\nWARNING! ValueError: Length for a string grouping of {string_grouping} "
+        f"can be between {allowed[0]} and {allowed[-1]}"
+    )
+    return length
+
+
+def unearth_skeleton(
+    length: int, ceiling: int, rng: random.Random = random
+) -> list[int]:
     """Generates list of unique integers for validation within form_skeleton().
 
     Args:
         length (int): Skeleton length.
         ceiling (int): Maximum allowed interval (i.e. relative note).
         Valid values vary based on string_grouping set by form_skeleton().
+        rng (random.Random, optional): Source of randomness. Defaults to the random module.
 
     Returns:
         list[int]: List of unique integers.
@@ -630,7 +1252,7 @@ def unearth_skeleton(length: int, ceiling: int) -> list[int]:
         raise ValueError("Ceiling must be at least length - 1")
 
 
-    skeleton = sorted(random.sample(range(1, ceiling + 1), k=length-1))
+    skeleton = sorted(rng.sample(range(1, ceiling + 1), k=length-1))
     skeleton.extend([0])
     skeleton = sorted(skeleton)
     if len(skeleton) == 1:
@@ -647,12 +1269,13 @@ def skeleton_to_fretboard(
         skeleton (list): Pattern whose constituent indices will
         be assigned to frets or open strings.
 
-        string_grouping (int): String group size (between 1 and 3).
+        string_grouping (int): String group size (between 1 and 6).
 
         start_fret (int): Starting fret for skeleton.
 
     Raises:
         ValueError: If start_fret is a negative number.
+        ValueError: If string_grouping not between 1 and 6.
 
     Returns:
         tuple[str, list, list, int, int, list]:
@@ -674,10 +1297,10 @@ def skeleton_to_fretboard(
     if start_fret < 0:
         raise ValueError("Starting fret: number or 'r' for random (defaults to random).")
     starting_notes = [
-        (open_string + start_fret - 1) % 12 + 1
+        (open_string + start_fret - 1) % temperament.divisions + 1
         
         # For each string in indices of notes in E standard
-        for open_string in [4, 9, 2, 7, 11, 4]
+        for open_string in temperament.open_strings
     ]
 
     string_one, string_two, string_three = (
@@ -696,11 +1319,11 @@ def skeleton_to_fretboard(
 
     match string_grouping:
 
-        case 1:
+        case 1 if string_grouping in temperament.hand_layout_groupings:
             for _ in starting_notes:
                 cipher.append([start_fret + i for i in skeleton])
 
-        case 2:
+        case 2 if string_grouping in temperament.hand_layout_groupings:
             if len(skeleton) == 2:
                 for _ in strings_one_three_five:
                     cipher.append([start_fret + skeleton[0]])
@@ -1298,7 +1921,7 @@ def skeleton_to_fretboard(
                                     ]
                                 )
 
-        case 3:
+        case 3 if string_grouping in temperament.hand_layout_groupings:
 
             if len(skeleton) == 3:
 
@@ -1390,16 +2013,16 @@ def skeleton_to_fretboard(
                 f"| {"--".join(map(str, cipher[5]))}\n"
 
                 f"{"b":<{pad}}"
-                f"| {"--".join(map(str, cipher[2]))}\n"
+                f"| {"--".join(map(str, cipher[3]))}\n"
 
                 f"{"g":<{pad}}"
-                f"| {"--".join(map(str, cipher[4]))}\n"
+                f"| {"--".join(map(str, cipher[1]))}\n"
 
                 f"{"D":<{pad}}"
-                f"| {"--".join(map(str, cipher[1]))}\n"
+                f"| {"--".join(map(str, cipher[4]))}\n"
 
                 f"{"A":<{pad}}"
-                f"| {"--".join(map(str, cipher[3]))}\n"
+                f"| {"--".join(map(str, cipher[2]))}\n"
 
                 f"{"E":<{pad}}"
                 f"| {"--".join(map(str, cipher[0]))}"
@@ -1407,6 +2030,26 @@ def skeleton_to_fretboard(
 
             return tab_print, cipher, starting_notes, start_fret, string_grouping, skeleton
 
+        case _:
+            # Window layout (wider groupings, and every grouping outside 12-TET): each string
+            # of a group plays its own string_steps. The last group on the neck may be cut
+            # short; it keeps the strings it has.
+            if string_grouping not in temperament.ceilings:
+                raise ValueError("String grouping: 1 to 6.")
+            order = cipher_string_order[string_grouping]
+            cipher = [[] for _ in starting_notes]
+            for strings, offset in temperament.group_positions[string_grouping]:
+                for string in strings:
+                    cipher[order[string]] = [
+                        start_fret + offset + i for i in skeleton
+                        if 0 <= i + offset < temperament.string_steps
+                    ]
+            tab_print = "\n".join(
+                f"{name:<{pad}}| {"--".join(map(str, cipher[order[string]]))}"
+                for string, name in reversed(list(enumerate("EADgbe")))
+            )
+            return tab_print, cipher, starting_notes, start_fret, string_grouping, skeleton
+
     tab_print = (
         f"{"e":<{pad}}"
         f"| {"--".join(map(str, cipher[5]))}\n"
@@ -1430,39 +2073,18 @@ def skeleton_to_fretboard(
     return tab_print, cipher, starting_notes, start_fret, string_grouping, skeleton
 
 
-def get_skel_notes(
-    cipher: list,
-    starting_notes: list,
-    start_fret: int,
-    string_grouping: int,
-    shflat: str = "#",
-):
-    """Provides all notes of a given skeleton.
+def get_skel_note_indices(
+    cipher: list, starting_notes: list, start_fret: int, string_grouping: int
+) -> list[int]:
+    """Indices (into notes) of all notes of a given skeleton, in the order get_skel_notes() lists them.
 
     Args:
-        cipher (list): Somewhat cryptic lists of integers representing fret numbers
-        to be put in the correct order and applied to appropriate strings.
-        Returned by skeleton_to_fretboard().
-
-        starting_notes (list): Indices of the notes resulting from the transposition of all open strings to the starting fret,
-        i.e. open string + starting fret, bearing in mind that C = 0.
-        As returned by skeleton_to_fretboard().
-
-        string_grouping (int): As returned by form_skeleton().
-
-        start_fret (int): As returned by form_skeleton().
-
-        shflat (str, optional): Whether to display sharps or flats.
-        "#" for sharps, "b" for flats. Defaults to "#".
+        As for get_skel_notes().
 
     Returns:
-        list: All notes of the Skeleton after being
-        appropriately applied to every string.
+        list[int]: Note indices, C = 0.
     """
-
-    notes_dict = notes
     all_idx = []
-    skel_notes = []
     match string_grouping:
 
         case 1:
@@ -1502,6 +2124,51 @@ def get_skel_notes(
                 + all_idx[5]
             )
 
+        case _:
+            order = cipher_string_order[string_grouping]
+            all_idx = [
+                starting_note - start_fret + i
+                for string, starting_note in enumerate(starting_notes)
+                for i in cipher[order[string]]
+            ]
+
+    return all_idx
+
+
+def get_skel_notes(
+    cipher: list,
+    starting_notes: list,
+    start_fret: int,
+    string_grouping: int,
+    shflat: str = "#",
+):
+    """Provides all notes of a given skeleton.
+
+    Args:
+        cipher (list): Somewhat cryptic lists of integers representing fret numbers
+        to be put in the correct order and applied to appropriate strings.
+        Returned by skeleton_to_fretboard().
+
+        starting_notes (list): Indices of the notes resulting from the transposition of all open strings to the starting fret,
+        i.e. open string + starting fret, bearing in mind that C = 0.
+        As returned by skeleton_to_fretboard().
+
+        string_grouping (int): As returned by form_skeleton().
+
+        start_fret (int): As returned by form_skeleton().
+
+        shflat (str, optional): Whether to display sharps or flats.
+        "#" for sharps, "b" for flats. Defaults to "#".
+
+    Returns:
+        list: All notes of the Skeleton after being
+        appropriately applied to every string.
+    """
+
+    notes_dict = temperament.notes
+    all_idx = get_skel_note_indices(cipher, starting_notes, start_fret, string_grouping)
+    skel_notes = []
+
     for idx in all_idx:
         for pos, note in notes_dict.items():
             if idx == pos:
@@ -1518,5 +2185,3591 @@ def get_skel_notes(
     return skel_notes
 
 
+@tuning_cache
+def note_names(shflat: str = "#") -> dict[int, str]:
+    """Note index -> name, spelled as get_skel_notes() spells it."""
+    return {
+        pos: note[1] if len(note) == 2 and shflat == "b" else note[0]
+        for pos, note in temperament.notes.items()
+    }
+
+
+def lookup_skel_notes(
+    cipher: list,
+    starting_notes: list,
+    start_fret: int,
+    string_grouping: int,
+    shflat: str = "#",
+):
+    """Table-driven get_skel_notes(): each note index is looked up in note_names()
+    rather than searched for in notes.
+
+    Args:
+        As for get_skel_notes().
+
+    Returns:
+        list: As returned by get_skel_notes().
+    """
+    names = note_names(shflat)
+    return [
+        names[idx]
+        for idx in get_skel_note_indices(cipher, starting_notes, start_fret, string_grouping)
+        if idx in names
+    ]
+
+def iter_skeletons(
+    grouping: int | str = "r",
+    length: int | str = "r",
+    fret: int | str = "r",
+    rng: random.Random | int | None = None,
+):
+    """Endless stream of curated skeletons. Each item is drawn independently by form_skeleton(),
+    so memory use stays constant however many skeletons are consumed.
+    Use itertools.islice() (or a filter) to take as many as needed.
+
+    Args:
+        grouping (int | str, optional): As for form_skeleton()'s string_grouping. Defaults to "r".
+
+        length (int | str, optional): As for form_skeleton(). Defaults to "r".
+
+        fret (int | str, optional): As for form_skeleton()'s start_fret. Defaults to "r".
+
+        rng (random.Random | int | None, optional): Source of randomness,
+        or an int to seed a fresh random.Random. Defaults to the random module.
+
+    Yields:
+        tuple[list, int, int]: skeleton, string_grouping and start_fret, as returned by form_skeleton().
+    """
+    if rng is None:
+        rng = random
+    elif isinstance(rng, int):
+        rng = random.Random(rng)
+
+    while True:
+        yield form_skeleton(fret, length, grouping, rng)
+
+
+def batched(iterable, size: int):
+    """Splits an iterable (possibly endless) into lists of at most size items."""
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def with_fretboard(skeletons, batch_size: int = 1):
+    """Lazy fretboard stage for iter_skeletons(). skeleton_to_fretboard() only runs
+    for the skeletons actually pulled through the stage.
+    With a batch_size above 1 (and NumPy), skeletons are pulled batch_size at a time
+    and laid out by fretboard_batch() instead, with the same output.
+
+    Args:
+        skeletons (iterable): (skeleton, string_grouping, start_fret) tuples.
+
+        batch_size (int, optional): Skeletons laid out per fretboard_batch() call. Defaults to 1.
+
+    Yields:
+        tuple: tab_print, cipher, starting_notes, start_fret, string_grouping, skeleton,
+        as returned by skeleton_to_fretboard().
+    """
+    if batch_size <= 1 or np is None:
+        for skeleton, string_grouping, start_fret in skeletons:
+            yield skeleton_to_fretboard(skeleton, string_grouping, start_fret)
+        return
+    for batch in batched(skeletons, batch_size):
+        frets, string_lengths, tab_prints = fretboard_batch(*zip(*batch), tab=True)
+        for (skeleton, string_grouping, start_fret), tab_print, row, row_lengths in zip(
+            batch, tab_prints, frets.tolist(), string_lengths.tolist()
+        ):
+            cipher = [None] * 6
+            for string, index in enumerate(cipher_string_order[string_grouping]):
+                cipher[index] = row[string][:row_lengths[string]]
+            yield (
+                tab_print, cipher, list(starting_notes_at(start_fret)), start_fret,
+                string_grouping, skeleton,
+            )
+
+
+def with_notes(fretboards, shflat: str = "#"):
+    """Lazy note stage for with_fretboard(). Appends the output of get_skel_notes(),
+    looked up by lookup_skel_notes().
+
+    Args:
+        fretboards (iterable): Tuples as yielded by with_fretboard().
+
+        shflat (str, optional): "#" for sharps, "b" for flats. Defaults to "#".
+
+    Yields:
+        tuple: The with_fretboard() tuple with skel_notes [list] appended.
+    """
+    for fretboard in fretboards:
+        tab_print, cipher, starting_notes, start_fret, string_grouping, skeleton = fretboard
+        skel_notes = lookup_skel_notes(
+            cipher, starting_notes, start_fret, string_grouping, shflat
+        )
+        yield *fretboard, skel_notes
+
+
+def write_skeletons(annotated, file=sys.stdout, fingering: bool = False):
+    """Output writer for with_notes(). Writes each skeleton's tab, intervals and notes.
+
+    Args:
+        annotated (iterable): Tuples as yielded by with_notes().
+
+        file (optional): Writable text stream. Defaults to sys.stdout.
+
+        fingering (bool, optional): Add a row of fingers (see finger_cipher()) under the tab.
+        Defaults to False.
+    """
+    for (
+        tab_print, cipher, starting_notes, start_fret, string_grouping, skeleton, skel_notes
+    ) in annotated:
+        if fingering:
+            fingers = finger_cipher(cipher, string_grouping)
+            tab_print += f"\n{fingering_row(fingers, string_grouping)}"
+        print(
+            f"\n{tab_print}\n"
+
+            f"\nSkeleton:\n{", ".join(map(str, skeleton))}"
+
+            f"\nNotes:\n{", ".join(skel_notes)}",
+
+            # f"\nStarting fret: {start_fret}"
+
+            # f"\nString grouping: {string_grouping}"
+
+            file=file,
+        )
+
+
+def skeleton_record(annotated: tuple, fingering: bool = False) -> dict:
+    """Structured form of a with_notes() tuple. Per-string lists run from the lowest string (E).
+
+    Args:
+        annotated (tuple): As yielded by with_notes().
+
+        fingering (bool, optional): Include a "fingering" field. Defaults to False.
+
+    Returns:
+        dict: skeleton, string_grouping, start_fret, frets, notes (and fingering).
+    """
+    tab_print, cipher, starting_notes, start_fret, string_grouping, skeleton, skel_notes = (
+        annotated
+    )
+    record = {
+        "skeleton": skeleton,
+        "string_grouping": string_grouping,
+        "start_fret": start_fret,
+        "frets": string_frets(cipher, string_grouping),
+        "notes": skel_notes,
+    }
+    if fingering:
+        record["fingering"] = string_frets(
+            finger_cipher(cipher, string_grouping), string_grouping
+        )
+    return record
+
+
+def write_json_lines(annotated, file=sys.stdout, fingering: bool = False):
+    """Output writer for with_notes(): one skeleton_record() per line, as JSON.
+
+    Args:
+        annotated (iterable): Tuples as yielded by with_notes().
+
+        file (optional): Writable text stream. Defaults to sys.stdout.
+
+        fingering (bool, optional): Include fingering. Defaults to False.
+    """
+    for item in annotated:
+        file.write(json.dumps(skeleton_record(item, fingering)) + "\n")
+
+
+def worksheet_cell(number: int, annotated: tuple, width: int, fingering: bool = False) -> list:
+    """Lines of one worksheet exercise, wrapped to width: heading, tab, skeleton and notes."""
+    tab_print, cipher, starting_notes, start_fret, string_grouping, skeleton, skel_notes = annotated
+    lines = [f"{number}. Grouping {string_grouping}, fret {start_fret}", *tab_print.split("\n")]
+    if fingering:
+        lines.append(fingering_row(finger_cipher(cipher, string_grouping), string_grouping))
+    lines += [
+        f"Skeleton: {", ".join(map(str, skeleton))}",
+        f"Notes: {", ".join(skel_notes)}",
+    ]
+    return [
+        fragment
+        for line in lines
+        for fragment in textwrap.wrap(
+            line, width, subsequent_indent="    ", break_on_hyphens=False
+        ) or [""]
+    ]
+
+
+# Spaces between worksheet columns.
+worksheet_gap = 3
+
+
+def write_worksheet(
+    annotated,
+    file=sys.stdout,
+    fingering: bool = False,
+    columns: int = 3,
+    width: int = 80,
+    page_lines: int = 66,
+    title: str = "Skeletons",
+):
+    """Output writer for with_notes(): printable pages with columns of exercises side by side.
+    Streams one row of exercises at a time, so memory stays constant however many pages
+    are written. Pages are headed by title and page number and end with a form feed.
+
+    Args:
+        annotated (iterable): Tuples as yielded by with_notes().
+
+        file (optional): Writable text stream. Defaults to sys.stdout.
+
+        fingering (bool, optional): Add fingering rows. Defaults to False.
+
+        columns (int, optional): Exercises per row. Defaults to 3.
+
+        width (int, optional): Line width. Defaults to 80.
+
+        page_lines (int, optional): Lines per page. Defaults to 66.
+
+        title (str, optional): Page heading. Defaults to "Skeletons".
+
+    Rows start on a new page unless they fit on the current one; a row taller than
+    a whole page carries on over the next.
+
+    Raises:
+        ValueError: As for worksheet_column_width().
+    """
+    gap = worksheet_gap
+    column_width = worksheet_column_width(columns, width, page_lines)
+    page, used = 0, page_lines
+
+    def new_page():
+        nonlocal page, used
+        if page:
+            file.write("\f")
+        page += 1
+        file.write(f"{title}{f"Page {page}":>{width - len(title)}}\n\n")
+        used = 2
+
+    numbered = enumerate(annotated, start=1)
+    while row := list(itertools.islice(numbered, columns)):
+        cells = [worksheet_cell(number, item, column_width, fingering) for number, item in row]
+        height = max(map(len, cells))
+        if used + height + 1 > page_lines and used > 2:
+            new_page()
+        for i in range(height):
+            if used >= page_lines:
+                new_page()
+            fragments = [
+                f"{cell[i] if i < len(cell) else "":<{column_width}}" for cell in cells
+            ]
+            file.write((" " * gap).join(fragments).rstrip() + "\n")
+            used += 1
+        if used < page_lines:
+            file.write("\n")
+            used += 1
+    if page:
+        file.write("\f")
+
+
+def worksheet_column_width(columns: int, width: int = 80, page_lines: int = 66) -> int:
+    """Width of each write_worksheet() column.
+
+    Raises:
+        ValueError: If the columns would be narrower than 24 characters,
+        or pages shorter than 16 lines.
+    """
+    column_width = (width - worksheet_gap * (columns - 1)) // max(columns, 1)
+    if columns < 1 or column_width < 24:
+        raise ValueError("Worksheet columns must be at least 24 characters wide.")
+    if page_lines < 16:
+        raise ValueError("Worksheet pages must be at least 16 lines long.")
+    return column_width
+
+
+def require_numpy():
+    """Raises ImportError when NumPy, needed by the batch paths, is missing."""
+    if np is None:
+        raise ImportError("NumPy is required for batch processing: pip install numpy")
+
+
+def string_frets(cipher: list, string_grouping: int) -> list[list[int]]:
+    """Reorders a cipher so that each list holds the frets of one string,
+    lowest (E) to highest (e) string.
+
+    Args:
+        cipher (list): As returned by skeleton_to_fretboard().
+
+        string_grouping (int): As returned by skeleton_to_fretboard().
+
+    Returns:
+        list[list[int]]: Frets per string, in playing order.
+    """
+    return [cipher[i] for i in cipher_string_order[string_grouping]]
+
+
+def layout_positions(values, string_groupings, start_frets):
+    """Group position (0 for the first group of strings) that skeleton_to_fretboard() gives
+    every note of a batch, in closed form. A note in position p sits at
+    start_fret + value - string_steps * p. Window layouts take value // string_steps;
+    the hand-tuned ones (hand_layout_groupings) are its branches written as array conditions.
+
+    Args:
+        values (np.ndarray): Skeletons as rows padded with -1.
+
+        string_groupings (np.ndarray): String group size per skeleton.
+
+        start_frets (np.ndarray): Starting fret per skeleton.
+
+    Returns:
+        np.ndarray: Position per note (-1 for padding).
+    """
+    present = values >= 0
+    length = present.sum(axis=1)[:, None]
+    fret = start_frets[:, None]
+    index = np.arange(values.shape[1])[None, :]
+    padded = np.pad(values, ((0, 0), (0, max(0, 3 - values.shape[1]))), constant_values=-1)
+    second, third = padded[:, 1:2], padded[:, 2:3]
+    last = np.take_along_axis(values, (length - 1).clip(0), axis=1)
+
+    # Grouping 2 splits a skeleton between positions 0 and 1: a note moves up from a split
+    # value (or, for a few short layouts, a split index) on, and one exception value may move
+    # up early. First matching branch wins, as in skeleton_to_fretboard().
+    never = np.iinfo(values.dtype).max
+    branches = [
+        # (condition, split value, split index, exception)
+        (length == 2, never, 1, -1),
+        ((length == 3) & (fret == 0), 5, never, -1),
+        ((length == 3) & (fret == 1), 4, never, -1),
+        ((length == 3) & (fret == 2) & (third == 9), 5, never, 3),
+        ((length == 3) & (fret == 2), 3, never, -1),
+        ((length == 3) & (fret == 3) & (third == 9), 5, never, 2),
+        ((length == 3) & (fret == 3), 2, never, -1),
+        ((length == 3) & (fret == 4) & (third == 9), 5, never, 1),
+        (
+            (length == 3) & (fret == 4)
+            & (((second == 1) & ((third == 2) | (third == 3))) | ((second == 2) & (third == 3))),
+            1, never, -1,
+        ),
+        ((length == 3) & (fret == 4), 4, never, 1),
+        ((length == 3) & (second <= 4) & (third <= 4), never, 2, -1),
+        (length == 3, 5, never, -1),
+        ((fret == 1) & (last == 4), 4, never, -1),
+        ((fret == 2) & (last == 4), 3, never, -1),
+        ((fret == 2) & (last == 9), 5, never, -1),
+        (fret == 2, 3, never, -1),
+        ((fret >= 3) & (last == 4), 3, never, -1),
+    ]
+    conditions = [condition for condition, *_ in branches]
+    split_value, split_index, exception = (
+        np.select(conditions, [row[k] for row in branches], default)
+        for k, default in ((1, 5), (2, never), (3, -1))
+    )
+    pair_positions = (
+        (values >= split_value) | (index >= split_index) | (values == exception)
+    ).astype(values.dtype)
+
+    hand = np.isin(string_groupings, temperament.hand_layout_groupings)[:, None]
+    positions = np.where(
+        hand & (string_groupings[:, None] == 2),
+        pair_positions,
+        np.where(
+            # Grouping 3 places a three-note skeleton one note per position.
+            hand & (string_groupings[:, None] == 3) & (length == 3),
+            index,
+            values // temperament.string_steps,
+        ),
+    )
+    return np.where(present, positions, -1)
+
+
+def fretboard_batch(skeletons, string_groupings, start_frets, tab: bool = False) -> tuple:
+    """Vectorised skeleton_to_fretboard() for a batch of skeletons. layout_positions() gives
+    every note its group position, and each note is placed on every string of that position
+    at once, by broadcasting against the strings' fret offsets.
+
+    Args:
+        skeletons (list | np.ndarray): Skeletons, either as sequences or as rows padded with -1.
+
+        string_groupings (list | np.ndarray): String group size per skeleton.
+
+        start_frets (list | np.ndarray): Starting fret per skeleton.
+
+        tab (bool, optional): Also render each skeleton's tab_print. Defaults to False.
+
+    Raises:
+        ValueError: If a start fret is negative.
+        ValueError: If a string grouping is not between 1 and 6.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, list[str] | None]:
+
+        frets [np.ndarray]: Frets per string, padded with -1 (shape: n x 6 x widest string),
+        lowest (E) string first, as string_frets() orders them.
+
+        string_lengths [np.ndarray]: Notes on each string (shape: n x 6).
+
+        tab_prints [list[str] | None]: As returned by skeleton_to_fretboard(), if tab is set.
+    """
+    require_numpy()
+    if isinstance(skeletons, np.ndarray):
+        values = skeletons.astype(int).reshape(len(skeletons), -1)
+    else:
+        skeletons = list(skeletons)
+        columns = list(itertools.zip_longest(*skeletons, fillvalue=-1))
+        values = np.array(columns, dtype=int).T.reshape(len(skeletons), len(columns))
+    groupings = np.asarray(string_groupings, dtype=int).reshape(len(values))
+    frets_from = np.asarray(start_frets, dtype=int).reshape(len(values))
+    if (frets_from < 0).any():
+        raise ValueError("Starting fret: number or 'r' for random (defaults to random).")
+    if not np.isin(groupings, list(temperament.ceilings)).all():
+        raise ValueError("String grouping: 1 to 6.")
+
+    positions = layout_positions(values, groupings, frets_from)
+
+    # Strings repeat their group's layout: string s plays group position s % grouping.
+    string_positions = np.arange(6)[None, :] % groupings[:, None]
+    on_string = positions[:, None, :] == string_positions[:, :, None]
+    placed = (
+        frets_from[:, None, None] + values[:, None, :]
+        - temperament.string_steps * string_positions[:, :, None]
+    )
+    # Notes keep skeleton order on their string; the rest are dropped into a spare last column.
+    slots = np.where(on_string, on_string.cumsum(axis=2) - 1, values.shape[1])
+    frets = np.full((*on_string.shape[:2], values.shape[1] + 1), -1)
+    np.put_along_axis(frets, slots, np.where(on_string, placed, -1), axis=2)
+    string_lengths = on_string.sum(axis=2)
+
+    frets = frets[:, :, : max(int(string_lengths.max(initial=0)), 1)]
+    tab_prints = None
+    if tab:
+        # Tab lines run from the highest (e) string down to the lowest (E).
+        tab_prints = [
+            "\n".join(
+                f"{name:<2}| {"--".join(map(str, row[s][:row_lengths[s]]))}"
+                for s, name in zip(range(5, -1, -1), "ebgDAE")
+            )
+            for row, row_lengths in zip(frets.tolist(), string_lengths.tolist())
+        ]
+    return frets, string_lengths, tab_prints
+
+
+def playability_batch(fretboards) -> tuple:
+    """Vectorised playability scores for a batch of ciphers.
+    Open strings need no finger, so only fretted notes (fret > 0) count towards stretches.
+
+    Args:
+        fretboards (list): (cipher, string_grouping) pairs, e.g. from skeleton_to_fretboard().
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]:
+
+        string_spans [np.ndarray]: Fret span of each string (shape: n x 6), lowest string first.
+
+        max_stretch [np.ndarray]: Widest fret span across any two adjacent strings (shape: n).
+
+        shifts [np.ndarray]: Hand position shifts needed to play the notes in order,
+        counted greedily with a hand position spanning finger_span frets (shape: n).
+    """
+    require_numpy()
+    rows = [string_frets(cipher, string_grouping) for cipher, string_grouping in fretboards]
+    width = max((len(string) for row in rows for string in row), default=0) or 1
+    frets = np.full((len(rows), 6, width), -1)
+    for r, row in enumerate(rows):
+        for s, string in enumerate(row):
+            frets[r, s, :len(string)] = string
+
+    fretted = frets > 0
+    has_fretted = fretted.any(axis=2)
+    highest = np.where(fretted, frets, -1).max(axis=2)
+    lowest = np.where(fretted, frets, np.iinfo(frets.dtype).max).min(axis=2)
+    string_spans = np.where(has_fretted, highest - lowest, 0)
+
+    pair_highest = np.maximum(highest[:, :-1], highest[:, 1:])
+    pair_lowest = np.minimum(lowest[:, :-1], lowest[:, 1:])
+    pair_fretted = has_fretted[:, :-1] | has_fretted[:, 1:]
+    max_stretch = np.where(pair_fretted, pair_highest - pair_lowest, 0).max(axis=1)
+
+    # Walking every skeleton's notes in step: index finger position per skeleton (-1 until placed).
+    position = np.full(len(rows), -1)
+    shifts = np.zeros(len(rows), dtype=int)
+    for fret in frets.reshape(len(rows), -1).T:
+        fretted_note = fret > 0
+        position = np.where(fretted_note & (position < 0), fret, position)
+        below = fretted_note & (fret < position)
+        above = fretted_note & (fret > position + temperament.finger_span)
+        shifts += below | above
+        position = np.where(below, fret, position)
+        position = np.where(above, fret - temperament.finger_span, position)
+
+    return string_spans, max_stretch, shifts
+
+
+def playability(cipher: list, string_grouping: int) -> tuple[list[int], int, int]:
+    """Playability scores for a single cipher. See playability_batch().
+
+    Returns:
+        tuple[list[int], int, int]: string_spans, max_stretch and shifts.
+    """
+    string_spans, max_stretch, shifts = playability_batch([(cipher, string_grouping)])
+    return string_spans[0].tolist(), int(max_stretch[0]), int(shifts[0])
+
+
+def filter_playable(fretboards, max_stretch: int, batch_size: int = 64):
+    """Lazy stage for with_fretboard() output, scored in batches by playability_batch().
+    Skeletons whose widest adjacent-string stretch exceeds max_stretch are dropped.
+
+    Args:
+        fretboards (iterable): Tuples as yielded by with_fretboard().
+
+        max_stretch (int): Widest allowed stretch in frets.
+
+        batch_size (int, optional): Fretboards scored per vectorised call. Defaults to 64.
+
+    Yields:
+        tuple: The with_fretboard() tuples that pass.
+    """
+    if max_stretch < 0:
+        raise ValueError("Maximum stretch cannot be negative.")
+    for batch in batched(fretboards, batch_size):
+        _, stretches, _ = playability_batch(
+            [(fretboard[1], fretboard[4]) for fretboard in batch]
+        )
+        for fretboard, stretch in zip(batch, stretches):
+            if stretch <= max_stretch:
+                yield fretboard
+
+
+@tuning_cache
+def valid_skeletons(
+    string_grouping: int, start_fret: int, length: int
+) -> tuple[tuple[int, ...], ...]:
+    """Catalog of every skeleton form_skeleton() can return for the given settings,
+    in lexicographic order. Built once per setting by enumerating unearth_skeleton()'s
+    candidates and keeping those is_valid_skeleton() accepts.
+
+    Args:
+        string_grouping (int): String group size (between 1 and 3).
+
+        start_fret (int): Starting fret for skeleton.
+
+        length (int): Skeleton length.
+
+    Raises:
+        ValueError: If string_grouping is too wide to enumerate (not in catalog_groupings).
+
+    Returns:
+        tuple[tuple[int, ...], ...]: Valid skeletons (possibly none).
+    """
+    if string_grouping not in temperament.catalog_groupings:
+        raise ValueError(
+            f"String grouping {string_grouping} is too wide to enumerate; see draw_skeleton()."
+        )
+    return tuple(
+        (0, *intervals)
+        for intervals in itertools.combinations(
+            range(1, temperament.ceilings[string_grouping] + 1), length - 1
+        )
+        if is_valid_skeleton([0, *intervals], string_grouping, start_fret)
+    )
+
+
+@tuning_cache
+def completion_counts(string_grouping: int, length: int, slop: bool, every_string: bool) -> list:
+    """Counts of the ways to finish a skeleton, for draw_skeleton(). Skeletons are read as
+    paths through (note, run) states, run being how many single steps lead up to the note,
+    so the chromatic-slop and every-string rules become local constraints on each step.
+
+    Args:
+        string_grouping (int): String group size.
+
+        length (int): Skeleton length.
+
+        slop (bool): Whether runs of four chromatic notes are barred (chromatic-slop).
+
+        every_string (bool): Whether every string must be used (every-string):
+        no string's string_steps may be skipped and the last note must reach the top string.
+
+    Returns:
+        list: counts[k][note][run], the ways to add k more notes after note.
+    """
+    ceiling = temperament.ceilings[string_grouping]
+    runs = range(3)
+    counts = [
+        [
+            [
+                int(not every_string or note // temperament.string_steps == string_grouping - 1)
+                for run in runs
+            ]
+            for note in range(ceiling + 1)
+        ]
+    ]
+    for _ in range(length - 1):
+        previous = counts[-1]
+        counts.append(
+            [
+                [
+                    sum(
+                        previous[after][run + 1 if after == note + 1 else 0]
+                        for after in range(note + 1, ceiling + 1)
+                        if not (slop and after == note + 1 and run == 2)
+                        and not (
+                            every_string
+                            and after // temperament.string_steps > note // temperament.string_steps + 1
+                        )
+                    )
+                    for run in runs
+                ]
+                for note in range(ceiling + 1)
+            ]
+        )
+    return counts
+
+
+def draw_skeleton(
+    string_grouping: int, start_fret: int, length: int, rng: random.Random = random
+) -> list[int]:
+    """Uniform draw from the skeletons is_valid_skeleton() accepts, for groupings too wide
+    for rejection sampling. Each note is picked in proportion to completion_counts(),
+    so a draw takes time linear in length and ceiling however rare valid skeletons are.
+    Curation rules the counts do not model are still checked, by rejection.
+
+    Args:
+        string_grouping (int): String group size (between 1 and 6).
+
+        start_fret (int): Starting fret for skeleton.
+
+        length (int): Skeleton length.
+
+        rng (random.Random, optional): Source of randomness. Defaults to the random module.
+
+    Raises:
+        ValueError: If no skeleton satisfies the settings.
+
+    Returns:
+        list[int]: Skeleton.
+    """
+    rules = {rule["name"] for rule in rule_plan(string_grouping, length, start_fret)[1]}
+    slop = "chromatic-slop" in rules
+    every_string = "every-string" in rules
+    counts = completion_counts(string_grouping, length, slop, every_string)
+    if not counts[length - 1][0][0]:
+        raise ValueError(
+            f"No valid skeletons of length {length} for a string grouping of "
+            f"{string_grouping} at fret {start_fret}."
+        )
+    while True:
+        skeleton, run = [0], 0
+        for remaining in range(length - 2, -1, -1):
+            note = skeleton[-1]
+            choices, weights = [], []
+            for after in range(note + 1, temperament.ceilings[string_grouping] + 1):
+                step = run + 1 if after == note + 1 else 0
+                if (slop and step == 3) or (
+                    every_string
+                    and after // temperament.string_steps > note // temperament.string_steps + 1
+                ):
+                    continue
+                choices.append((after, step))
+                weights.append(counts[remaining][after][step])
+            note, run = rng.choices(choices, weights)[0]
+            skeleton.append(note)
+        if rules <= {"chromatic-slop", "every-string"} or is_valid_skeleton(skeleton, string_grouping, start_fret):
+            return skeleton
+
+
+def skeleton_edits(skeleton, string_grouping: int):
+    """Skeletons one edit away: a note added, a note removed or a note shifted by a semitone.
+    The root stays at 0, notes stay distinct and within the grouping's ceiling,
+    and lengths stay within lengths.
+
+    Yields:
+        tuple[str, int, list]: Edit ("add", "remove" or "shift"), index of the edit
+        in the new skeleton, new skeleton.
+    """
+    ceiling = temperament.ceilings[string_grouping]
+    present = set(skeleton)
+    if len(skeleton) + 1 in temperament.lengths[string_grouping]:
+        for note in range(1, ceiling + 1):
+            if note not in present:
+                index = next((i for i, old in enumerate(skeleton) if old > note), len(skeleton))
+                yield "add", index, [*skeleton[:index], note, *skeleton[index:]]
+    if len(skeleton) - 1 in temperament.lengths[string_grouping]:
+        for index in range(1, len(skeleton)):
+            yield "remove", index, [*skeleton[:index], *skeleton[index + 1:]]
+    for index in range(1, len(skeleton)):
+        for note in (skeleton[index] - 1, skeleton[index] + 1):
+            if 0 < note <= ceiling and note not in present:
+                yield "shift", index, [*skeleton[:index], note, *skeleton[index + 1:]]
+
+
+def valid_neighbours(skeleton, string_grouping: int, start_fret: int) -> list:
+    """Every skeleton_edits() neighbour of a valid skeleton that is_valid_skeleton() accepts,
+    for "next exercise is slightly harder (or easier)" flows.
+
+    Cataloged groupings look each neighbour up in its (sorted) valid_skeletons() stratum,
+    built once per setting; wider groupings run is_valid_skeleton() on every neighbour.
+
+    Args:
+        skeleton (list): A skeleton valid at these settings (e.g. from form_skeleton()).
+
+        string_grouping (int): String group size (between 1 and 6).
+
+        start_fret (int): Starting fret for skeleton.
+
+    Returns:
+        list[tuple[str, int, list]]: (edit, index, skeleton), as from skeleton_edits().
+    """
+    edits = skeleton_edits(list(skeleton), string_grouping)
+    if string_grouping not in temperament.catalog_groupings:
+        return [
+            (edit, index, child) for edit, index, child in edits
+            if is_valid_skeleton(child, string_grouping, start_fret)
+        ]
+    catalogs = {
+        length: valid_skeletons(string_grouping, start_fret, length)
+        for length in range(len(skeleton) - 1, len(skeleton) + 2)
+        if length in temperament.lengths[string_grouping]
+    }
+    neighbours = []
+    for edit, index, child in edits:
+        catalog = catalogs[len(child)]
+        key = tuple(child)
+        position = bisect.bisect_left(catalog, key)
+        if position < len(catalog) and catalog[position] == key:
+            neighbours.append((edit, index, child))
+    return neighbours
+
+def skeleton_space(string_groupings=None, frets=None):
+    """Walks the valid-skeleton space in catalog order:
+    string grouping, then start fret, then length, then valid_skeletons() order.
+
+    Args:
+        string_groupings (iterable, optional): Groupings to cover. Defaults to all.
+
+        frets (iterable, optional): Start frets to cover. Defaults to start_frets.
+
+    Yields:
+        tuple[list, int, int]: skeleton, string_grouping, start_fret (as form_skeleton() returns).
+    """
+    for string_grouping in string_groupings or temperament.catalog_groupings:
+        for start_fret in frets or temperament.start_frets:
+            for length in temperament.lengths[string_grouping]:
+                for skeleton in valid_skeletons(string_grouping, start_fret, length):
+                    yield list(skeleton), string_grouping, start_fret
+
+
+def sample_skeleton(
+    start_fret: int | str = "r",
+    length: int | str = "r",
+    string_grouping: int = "r",
+    rng: random.Random = random,
+):
+    """Catalog-based drop-in for form_skeleton(). Picks uniformly from valid_skeletons()
+    instead of rejection sampling, which gives the same distribution.
+
+    Args:
+        As for form_skeleton().
+
+    Raises:
+        ValueError: If no skeleton satisfies the settings
+        (form_skeleton() would search forever).
+
+    Returns:
+        As for form_skeleton().
+    """
+    start_fret = set_start_fret(start_fret, rng)
+    if string_grouping in ["r", ""]:
+        string_grouping = rng.choice(range(1, 4))
+    if string_grouping not in temperament.ceilings:
+        sys.exit(
+            "Error. String grouping: 1 to 6 or 'r' for random (no argument defaults to random)."
+        )
+    length = set_length(length, string_grouping, rng)
+    if string_grouping not in temperament.catalog_groupings:
+        return draw_skeleton(string_grouping, start_fret, length, rng), string_grouping, start_fret
+    catalog = valid_skeletons(string_grouping, start_fret, length)
+    if not catalog:
+        raise ValueError(
+            f"No valid skeletons of length {length} for a string grouping of "
+            f"{string_grouping} at fret {start_fret}."
+        )
+    return list(rng.choice(catalog)), string_grouping, start_fret
+
+
+# Fast implementations checked by differential_check(), keyed by the legacy function they replace
+# (batch paths, which replace a per-skeleton loop, by their own name).
+# Each must take the same arguments and return the same values as its legacy function;
+# batch paths take the arguments as columns and must agree skeleton for skeleton.
+fast_paths = {
+    "form_skeleton": sample_skeleton,
+    "get_skel_notes": lookup_skel_notes,
+}
+if np is not None:
+    fast_paths["fretboard_batch"] = fretboard_batch
+
+
+def check_stratum(stratum: tuple[int, int]) -> dict:
+    """differential_check() worker for the deterministic stages over one
+    (string_grouping, start_fret) slice of the valid-skeleton space.
+
+    Returns:
+        dict: Per stage, as returned by compare_outputs().
+    """
+    string_grouping, start_fret = stratum
+    skeletons = list(skeleton_space([string_grouping], [start_fret]))
+    report = {}
+
+    legacy, elapsed = timed_map(skeleton_to_fretboard, skeletons)
+    fretboards = legacy
+    if "fretboard_batch" in fast_paths:
+        start = time.perf_counter()
+        frets, string_lengths, tab_prints = fast_paths["fretboard_batch"](
+            *zip(*skeletons), tab=True
+        )
+        fast_elapsed = time.perf_counter() - start
+        fast = [
+            (tab_print, [string[:length] for string, length in zip(row, row_lengths)])
+            for tab_print, row, row_lengths in zip(
+                tab_prints, frets.tolist(), string_lengths.tolist()
+            )
+        ]
+        report["fretboard_batch"] = compare_outputs(
+            skeletons,
+            [(fretboard[0], string_frets(fretboard[1], fretboard[4])) for fretboard in legacy],
+            fast, elapsed, fast_elapsed,
+        )
+
+    for shflat in ("#", "b"):
+        arguments = [
+            (cipher, starting_notes, fret, grouping, shflat)
+            for _, cipher, starting_notes, fret, grouping, _ in fretboards
+        ]
+        legacy, elapsed = timed_map(get_skel_notes, arguments)
+        if "get_skel_notes" in fast_paths:
+            fast, fast_elapsed = timed_map(fast_paths["get_skel_notes"], arguments)
+            compared = compare_outputs(skeletons, legacy, fast, elapsed, fast_elapsed)
+            if "get_skel_notes" in report:
+                report["get_skel_notes"] = [
+                    a + b for a, b in zip(report["get_skel_notes"], compared)
+                ]
+            else:
+                report["get_skel_notes"] = compared
+
+    return report
+
+
+def timed_map(function, arguments: list) -> tuple[list, float]:
+    """Calls function(*args) for every args in arguments. Returns the results and the seconds taken."""
+    start = time.perf_counter()
+    results = [function(*args) for args in arguments]
+    return results, time.perf_counter() - start
+
+
+def compare_outputs(inputs, legacy, fast, elapsed, fast_elapsed) -> list:
+    """Counts the inputs whose fast output differs from the legacy one.
+
+    Returns:
+        list: Outputs compared, mismatches, the first few mismatch descriptions,
+        legacy seconds and fast seconds.
+    """
+    mismatches = [
+        f"{inputs[i]}: {legacy[i]!r} != {fast[i]!r}"
+        for i in range(len(legacy))
+        if legacy[i] != fast[i]
+    ]
+    return [len(legacy), len(mismatches), mismatches[:5], elapsed, fast_elapsed]
+
+
+def sample_counts(task: tuple[str, int, int]) -> tuple:
+    """differential_check() worker for the samplers. Draws count random skeletons
+    with the named sampler and tallies strata and skeletons. The fast sampler's catalogs
+    are built (once per worker) before the draws are timed.
+
+    Returns:
+        tuple[collections.Counter, collections.Counter, float, float]: Stratum counts
+        (string_grouping, length, start_fret), skeleton counts, seconds spent warming up
+        and seconds spent drawing.
+    """
+    name, seed, count = task
+    sampler = form_skeleton if name == "legacy" else fast_paths["form_skeleton"]
+    rng = random.Random(seed)
+    strata = collections.Counter()
+    skeletons = collections.Counter()
+    start = time.perf_counter()
+    if name != "legacy":
+        for string_grouping in temperament.catalog_groupings:
+            for start_fret in temperament.start_frets:
+                for length in temperament.lengths[string_grouping]:
+                    valid_skeletons(string_grouping, start_fret, length)
+    warm_up = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(count):
+        skeleton, string_grouping, start_fret = sampler("r", "r", "r", rng)
+        strata[string_grouping, len(skeleton), start_fret] += 1
+        skeletons[string_grouping, start_fret, tuple(skeleton)] += 1
+    return strata, skeletons, warm_up, time.perf_counter() - start
+
+
+def chi_square_p_value(
+    counts: collections.Counter, other_counts: collections.Counter, min_expected: int = 5
+) -> float:
+    """Two-sample chi-square test of homogeneity. Cells expected to hold fewer than
+    min_expected draws are pooled together. The p-value uses the Wilson-Hilferty approximation.
+
+    Returns:
+        float: Probability of differences at least this large if both samples share a distribution.
+    """
+    total, other_total = sum(counts.values()), sum(other_counts.values())
+    if not total or not other_total:
+        return 1.0
+    share = total / (total + other_total)
+    cells, pooled = [], [0, 0]
+    for key in counts.keys() | other_counts.keys():
+        observed = counts[key], other_counts[key]
+        if min(sum(observed) * share, sum(observed) * (1 - share)) < min_expected:
+            pooled = [pooled[0] + observed[0], pooled[1] + observed[1]]
+        else:
+            cells.append(observed)
+    if sum(pooled):
+        cells.append(pooled)
+    degrees = len(cells) - 1
+    if degrees < 1:
+        return 1.0
+    statistic = 0.0
+    for observed, other_observed in cells:
+        expected = (observed + other_observed) * share
+        other_expected = (observed + other_observed) * (1 - share)
+        statistic += (observed - expected) ** 2 / expected
+        statistic += (other_observed - other_expected) ** 2 / other_expected
+    z = (
+        (statistic / degrees) ** (1 / 3) - (1 - 2 / (9 * degrees))
+    ) / math.sqrt(2 / (9 * degrees))
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def differential_check(
+    samples: int = 20000, workers: int | None = None, seed: int | None = None,
+    alpha: float = 0.001,
+) -> bool:
+    """Differential equivalence and speed harness for the fast paths in fast_paths.
+    Deterministic stages (fretboard_batch(), get_skel_notes()) must
+    match their legacy output exactly over the whole valid-skeleton space; the sampler must match
+    form_skeleton()'s distribution (chi-square over strata and skeletons).
+    Work is split across a process pool and a report is printed.
+
+    Args:
+        samples (int, optional): Draws per sampler. Defaults to 20000.
+
+        workers (int | None, optional): Worker processes. Defaults to the number of CPUs.
+
+        seed (int | None, optional): Seed for the samplers' random streams. Defaults to random.
+
+        alpha (float, optional): Significance level for the distribution checks. Defaults to 0.001.
+
+    Returns:
+        bool: True if every fast path agrees with its legacy function.
+    """
+    workers = workers or os.cpu_count() or 1
+    seed = random.randrange(2**32) if seed is None else seed
+    strata = [
+        (string_grouping, fret)
+        for string_grouping in temperament.catalog_groupings
+        for fret in temperament.start_frets
+    ]
+    chunks = max(workers * 4, 1)
+    sample_tasks = [
+        (name, seed * 2 + offset + 2 * chunk, samples // chunks + (chunk < samples % chunks))
+        for offset, name in enumerate(["legacy", "fast"])
+        for chunk in range(chunks)
+    ]
+
+    if workers > 1:
+        with multiprocessing.Pool(workers) as pool:
+            reports = pool.map(check_stratum, strata)
+            draws = pool.map(sample_counts, sample_tasks)
+    else:
+        reports = list(map(check_stratum, strata))
+        draws = list(map(sample_counts, sample_tasks))
+
+    passed = True
+    print(f"Differential check ({workers} workers, seed {seed})")
+    for stage in ("fretboard_batch", "get_skel_notes"):
+        if stage not in fast_paths:
+            continue
+        compared, mismatches, examples, elapsed, fast_elapsed = [0, 0, [], 0.0, 0.0]
+        for report in reports:
+            compared += report[stage][0]
+            mismatches += report[stage][1]
+            examples += report[stage][2]
+            elapsed += report[stage][3]
+            fast_elapsed += report[stage][4]
+        passed = passed and not mismatches
+        print(
+            f"{stage}: {compared} outputs, {mismatches} mismatches, "
+            f"speedup {elapsed / max(fast_elapsed, 1e-9):.1f}x"
+        )
+        for mismatch in examples[:5]:
+            print(f"  {mismatch}")
+
+    totals = {}
+    for offset, name in enumerate(["legacy", "fast"]):
+        strata_counts, skeleton_counts, warm_up, elapsed = (
+            collections.Counter(), collections.Counter(), 0.0, 0.0
+        )
+        for task, (task_strata, task_skeletons, task_warm_up, task_elapsed) in zip(
+            sample_tasks, draws
+        ):
+            if task[0] == name:
+                strata_counts.update(task_strata)
+                skeleton_counts.update(task_skeletons)
+                warm_up = max(warm_up, task_warm_up)
+                elapsed += task_elapsed
+        totals[name] = strata_counts, skeleton_counts, warm_up, elapsed
+    strata_p = chi_square_p_value(totals["legacy"][0], totals["fast"][0])
+    skeleton_p = chi_square_p_value(totals["legacy"][1], totals["fast"][1])
+    passed = passed and strata_p >= alpha and skeleton_p >= alpha
+    print(
+        f"form_skeleton: {samples} draws each, strata p={strata_p:.3f}, "
+        f"skeletons p={skeleton_p:.3f}, "
+        f"speedup {totals["legacy"][3] / max(totals["fast"][3], 1e-9):.1f}x "
+        f"(after {totals["fast"][2]:.1f}s warm-up per worker)"
+    )
+    print("PASS" if passed else "FAIL")
+    return passed
+
+
+def hand_position(cipher: list) -> tuple[int, int]:
+    """Lowest and highest fretted notes of a cipher (open strings need no hand).
+
+    Args:
+        cipher (list): As returned by skeleton_to_fretboard().
+
+    Returns:
+        tuple[int, int]: Lowest and highest fret, or (0, 0) if every note is an open string.
+    """
+    frets = [fret for string in cipher for fret in string if fret > 0] or [0]
+    return min(frets), max(frets)
+
+
+def movement(position: tuple[int, int], other_position: tuple[int, int]) -> int:
+    """Hand movement cost between two hand positions. Both edges of the hand count,
+    squared, so that one big jump costs more than several small ones.
+    """
+    return (
+        (position[0] - other_position[0]) ** 2 + (position[1] - other_position[1]) ** 2
+    )
+
+
+def skeleton_voicings(skeleton: list, string_grouping: int | None = None, start_fret=None):
+    """Every (string_grouping, start_fret) at which form_skeleton() could return the skeleton.
+
+    Args:
+        skeleton (list): Skeleton intervals.
+
+        string_grouping (int | None, optional): Only this grouping. Defaults to all.
+
+        start_fret (int | None, optional): Only this starting fret. Defaults to all.
+
+    Returns:
+        list[tuple[list, int, int, tuple[int, int]]]: skeleton, string_grouping,
+        start_fret and hand_position() of each voicing.
+    """
+    voicings = []
+    for grouping in [string_grouping] if string_grouping else temperament.catalog_groupings:
+        if (
+            len(skeleton) not in temperament.lengths[grouping]
+            or skeleton[-1] > temperament.ceilings[grouping]
+        ):
+            continue
+        for fret in temperament.start_frets if start_fret is None else [start_fret]:
+            if is_valid_skeleton(skeleton, grouping, fret):
+                cipher = skeleton_to_fretboard(skeleton, grouping, fret)[1]
+                voicings.append((skeleton, grouping, fret, hand_position(cipher)))
+    return voicings
+
+
+def voice_lead(skeletons: list, string_grouping: int | None = None, start_fret=None) -> list:
+    """Minimum-movement voicing of a sequence of skeletons. Dynamic programming
+    (Viterbi) over every valid voicing of each skeleton, keeping the skeletons' order.
+
+    Args:
+        skeletons (list): Skeletons (intervals) in practice order.
+
+        string_grouping (int | None, optional): Only voice with this grouping. Defaults to any.
+
+        start_fret (int | None, optional): Starting fret of the first skeleton. Defaults to any.
+
+    Raises:
+        ValueError: If a skeleton has no valid voicing.
+
+    Returns:
+        list[tuple[list, int, int]]: skeleton, string_grouping, start_fret (as form_skeleton() returns).
+    """
+    layers = []
+    for i, skeleton in enumerate(skeletons):
+        layer = skeleton_voicings(skeleton, string_grouping, start_fret if i == 0 else None)
+        if not layer:
+            raise ValueError(f"No valid voicing for skeleton {skeleton}.")
+        layers.append(layer)
+    if not layers:
+        return []
+
+    costs = [0] * len(layers[0])
+    back = []
+    for previous, layer in zip(layers, layers[1:]):
+        steps = [
+            min(
+                range(len(previous)),
+                key=lambda j: costs[j] + movement(previous[j][3], voicing[3]),
+            )
+            for voicing in layer
+        ]
+        costs = [
+            costs[j] + movement(previous[j][3], voicing[3])
+            for j, voicing in zip(steps, layer)
+        ]
+        back.append(steps)
+
+    best = min(range(len(costs)), key=costs.__getitem__)
+    path = [best]
+    for steps in reversed(back):
+        path.append(steps[path[-1]])
+    path.reverse()
+    return [layer[i][:3] for layer, i in zip(layers, path)]
+
+
+@tuning_cache
+def voicing_buckets() -> dict:
+    """Voicings of the whole valid-skeleton space, bucketed by (start_fret, hand_position()).
+    Built once and shared by every voicing_graph() view.
+
+    Returns:
+        dict: (start_fret, (lowest, highest)) -> list of (skeleton, string_grouping, start_fret).
+    """
+    voicings = list(skeleton_space())
+    if np is None:
+        positions = [
+            hand_position(skeleton_to_fretboard(*voicing)[1]) for voicing in voicings
+        ]
+    else:
+        # hand_position() over the whole batch: fretted notes only, (0, 0) if there are none.
+        frets = fretboard_batch(*zip(*voicings))[0] if voicings else np.zeros((0, 6, 1), int)
+        fretted = (frets > 0).any(axis=(1, 2))
+        lowest = np.where(frets > 0, frets, frets.max(initial=0) + 1).min(axis=(1, 2))
+        positions = zip(
+            np.where(fretted, lowest, 0).tolist(),
+            np.where(fretted, frets.max(axis=(1, 2)), 0).tolist(),
+        )
+    buckets = {}
+    for voicing, position in zip(voicings, positions):
+        buckets.setdefault((voicing[2], tuple(position)), []).append(tuple(voicing))
+    return buckets
+
+
+def voicing_graph(string_grouping: int | None = None, length: int | None = None) -> dict:
+    """Voicings of the valid-skeleton space, bucketed by (start_fret, hand_position()).
+    Voicings in a bucket are interchangeable for hand movement, so edges are only needed
+    between buckets (a few hundred) rather than between voicings (hundreds of thousands).
+    Every selection is read from the one cached voicing_buckets().
+
+    Args:
+        string_grouping (int | None, optional): Only this grouping. Defaults to all.
+
+        length (int | None, optional): Only skeletons of this length. Defaults to all.
+
+    Returns:
+        dict: (start_fret, (lowest, highest)) -> list of (skeleton, string_grouping, start_fret).
+    """
+    if string_grouping is None and length is None:
+        return voicing_buckets()
+    buckets = {}
+    for key, bucket in voicing_buckets().items():
+        selected = [
+            voicing for voicing in bucket
+            if string_grouping in (None, voicing[1]) and length in (None, len(voicing[0]))
+        ]
+        if selected:
+            buckets[key] = selected
+    return buckets
+
+
+def practice_tour(
+    count: int,
+    start_fret: int | None = None,
+    end_fret: int | None = None,
+    string_grouping: int | None = None,
+    length: int | None = None,
+    rng: random.Random = random,
+    pace: float = 1.0,
+) -> list:
+    """Target-length practice tour with the smallest total hand movement.
+    Dynamic programming over voicing_graph() buckets, then distinct voicings are drawn
+    at random from each bucket the tour passes through. A tour between two frets also
+    pays for straying from an even pace between them (squared frets off the pace,
+    times pace), so it keeps moving instead of idling at one end.
+
+    Args:
+        count (int): Number of skeletons in the tour.
+
+        start_fret (int | None, optional): Starting fret of the first skeleton. Defaults to any.
+
+        end_fret (int | None, optional): Starting fret of the last skeleton. Defaults to any.
+
+        string_grouping (int | None, optional): Only this grouping. Defaults to all.
+
+        length (int | None, optional): Only skeletons of this length. Defaults to all.
+
+        rng (random.Random, optional): Source of randomness. Defaults to the random module.
+
+        pace (float, optional): Weight of the pace term; 0 minimises movement alone.
+        Defaults to 1.0.
+
+    Raises:
+        ValueError: If no tour satisfies the settings.
+
+    Returns:
+        list[tuple[list, int, int]]: skeleton, string_grouping, start_fret (as form_skeleton() returns).
+    """
+    if count < 1:
+        return []
+    buckets = voicing_graph(string_grouping, length)
+    keys = list(buckets)
+    costs = [
+        0 if start_fret is None or key[0] == start_fret else math.inf for key in keys
+    ]
+    back = []
+    for step in range(1, count):
+        if start_fret is None or end_fret is None:
+            pace_costs = [0] * len(keys)
+        else:
+            target = start_fret + (end_fret - start_fret) * step / (count - 1)
+            pace_costs = [pace * (key[0] - target) ** 2 for key in keys]
+        steps = [
+            min(
+                range(len(keys)),
+                key=lambda i: costs[i] + movement(keys[i][1], key[1]),
+            )
+            for key in keys
+        ]
+        costs = [
+            costs[i] + movement(keys[i][1], key[1]) + pace_cost
+            for i, key, pace_cost in zip(steps, keys, pace_costs)
+        ]
+        back.append(steps)
+
+    ends = [
+        i for i, key in enumerate(keys)
+        if costs[i] < math.inf and (end_fret is None or key[0] == end_fret)
+    ]
+    if not ends:
+        raise ValueError("No practice tour satisfies these settings.")
+    lowest = min(costs[i] for i in ends)
+    path = [rng.choice([i for i in ends if costs[i] == lowest])]
+    for steps in reversed(back):
+        path.append(steps[path[-1]])
+    path.reverse()
+
+    visits = collections.Counter(path)
+    drawn = {}
+    for i, visit_count in visits.items():
+        bucket = buckets[keys[i]]
+        drawn[i] = rng.sample(bucket, min(visit_count, len(bucket)))
+        # Small buckets are revisited in turn once every voicing has been used.
+        drawn[i] *= -(-visit_count // len(drawn[i]))
+    return [drawn[i].pop() for i in path]
+
+
+def layout_fret(skeleton: list, string_grouping: int, start_fret: int) -> int:
+    """Lowest starting fret whose fretboard layout skeleton_to_fretboard() shifts unchanged
+    to start_fret. Only low frets on two-string groupings have layouts of their own
+    (and window layouts never do).
+    """
+    if string_grouping not in temperament.hand_layout_groupings:
+        return 0
+    if string_grouping == 2 and len(skeleton) == 3:
+        return min(start_fret, 5)
+    if string_grouping == 2 and len(skeleton) >= 4:
+        return min(start_fret, 3)
+    return 0
+
+
+def skeleton_positions(skeleton: list, string_grouping: int) -> list:
+    """A skeleton at every starting fret where it is valid, in one pass. Validity is checked
+    for all starting frets together, and skeleton_to_fretboard() only runs once per distinct
+    layout; other positions shift that layout along the neck.
+
+    Args:
+        skeleton (list): Skeleton intervals.
+
+        string_grouping (int): String group size (between 1 and 6).
+
+    Returns:
+        list[tuple[int, list, list]]: start_fret, cipher and starting_notes per valid position.
+    """
+    positions = []
+    layouts = {}
+    for start_fret in temperament.start_frets:
+        if not is_valid_skeleton(skeleton, string_grouping, start_fret):
+            continue
+        base = layout_fret(skeleton, string_grouping, start_fret)
+        if base not in layouts:
+            cipher = skeleton_to_fretboard(skeleton, string_grouping, base)[1]
+            layouts[base] = [[fret - base for fret in string] for string in cipher]
+        positions.append(
+            (
+                start_fret,
+                [[start_fret + fret for fret in string] for string in layouts[base]],
+                list(starting_notes_at(start_fret)),
+            )
+        )
+    return positions
+
+
+def neck_chart(skeleton: list, string_grouping: int) -> str:
+    """Compact chart of a skeleton at every valid starting fret:
+    one row per position, one column per string (lowest first).
+
+    Args:
+        skeleton (list): Skeleton intervals.
+
+        string_grouping (int): String group size (between 1 and 6).
+
+    Returns:
+        str: Ready-to-print chart.
+    """
+    positions = skeleton_positions(skeleton, string_grouping)
+    rows = [
+        [str(start_fret)]
+        + ["-".join(map(str, string)) for string in string_frets(cipher, string_grouping)]
+        for start_fret, cipher, _ in positions
+    ]
+    header = ["Fret", "E", "A", "D", "g", "b", "e"]
+    widths = [max(len(row[i]) for row in rows + [header]) for i in range(len(header))]
+    lines = [
+        f"Skeleton: {", ".join(map(str, skeleton))} (string grouping {string_grouping})",
+        " | ".join(f"{cell:<{width}}" for cell, width in zip(header, widths)).rstrip(),
+    ]
+    lines += [
+        " | ".join(f"{cell:<{width}}" for cell, width in zip(row, widths)).rstrip()
+        for row in rows
+    ]
+    unplayable = sorted(
+        set(temperament.start_frets) - {start_fret for start_fret, _, _ in positions}
+    )
+    if unplayable:
+        lines.append(f"Not valid at frets: {", ".join(map(str, unplayable))}")
+    return "\n".join(lines)
+
+
+# Widest pitch-class masks (divisions) served by tables over every mask; wider ones
+# (19-, 22- and 24-TET) are tested mask by mask instead, and memoised.
+table_bits = 16
+
+
+def pitch_class_mask(skeleton: list) -> int:
+    """divisions-bit mask of a skeleton's intervals reduced mod divisions (bit 0: the root)."""
+    mask = 0
+    for interval in skeleton:
+        mask |= 1 << interval % temperament.divisions
+    return mask
+
+
+def rotate_mask(mask: int, steps: int) -> int:
+    """Rotates a pitch-class mask down by steps (semitones in 12-TET),
+    so that the pitch class at bit steps becomes the root.
+    """
+    steps %= temperament.divisions
+    divisions = temperament.divisions
+    return ((mask >> steps) | (mask << (divisions - steps))) & ((1 << divisions) - 1)
+
+
+@tuning_cache
+def mode_class_table() -> tuple[int, ...]:
+    """Canonical mode (rotation) class of every pitch-class mask: the smallest of its rotations
+    that keep a pitch class on the root. Only built for masks up to table_bits wide.
+    """
+    return tuple(
+        min(
+            (
+                rotate_mask(mask, steps)
+                for steps in range(temperament.divisions) if mask >> steps & 1
+            ),
+            default=0,
+        )
+        for mask in range(1 << temperament.divisions)
+    )
+
+
+@tuning_cache(maxsize=1 << 16)
+def mode_class(mask: int) -> int:
+    """Canonical mode class of one pitch-class mask, as in mode_class_table()."""
+    if temperament.divisions <= table_bits:
+        return mode_class_table()[mask]
+    return min(
+        (rotate_mask(mask, steps) for steps in range(temperament.divisions) if mask >> steps & 1),
+        default=0,
+    )
+
+
+def skeleton_family(skeleton: list, kind: str = "mode") -> int:
+    """Family of a skeleton as a pitch-class mask.
+
+    Args:
+        skeleton (list): Skeleton intervals.
+
+        kind (str, optional): "transposition" for the pitch-class set above the root,
+        "mode" for its rotation class. Defaults to "mode".
+
+    Raises:
+        ValueError: If kind is neither.
+
+    Returns:
+        int: Canonical mask shared by every member of the family.
+    """
+    mask = pitch_class_mask(skeleton)
+    if kind == "transposition":
+        return mask
+    elif kind == "mode":
+        return mode_class(mask)
+    raise ValueError("Family: 'transposition' or 'mode'.")
+
+
+@tuning_cache
+def family_index(kind: str = "mode") -> dict:
+    """Members of every family over the valid-skeleton space.
+
+    Args:
+        kind (str, optional): As for skeleton_family(). Defaults to "mode".
+
+    Returns:
+        dict: Family mask -> list of (skeleton, string_grouping, start_fret) in catalog order.
+    """
+    index = {}
+    for skeleton, string_grouping, start_fret in skeleton_space():
+        index.setdefault(skeleton_family(skeleton, kind), []).append(
+            (skeleton, string_grouping, start_fret)
+        )
+    return index
+
+
+@tuning_cache
+def family_keys(kind: str = "mode") -> tuple[int, ...]:
+    """Family masks of family_index(), for constant-time random choice."""
+    return tuple(family_index(kind))
+
+
+def family_members(skeleton: list, kind: str = "mode") -> list:
+    """Every voicing in the valid-skeleton space from the skeleton's family.
+
+    Returns:
+        list: (skeleton, string_grouping, start_fret) tuples (empty if none are valid).
+    """
+    return family_index(kind).get(skeleton_family(skeleton, kind), [])
+
+
+def sample_by_family(kind: str = "mode", rng: random.Random = random) -> tuple:
+    """Family-aware sampling: picks a family uniformly, then one of its voicings.
+
+    Returns:
+        tuple[list, int, int]: skeleton, string_grouping, start_fret (as form_skeleton() returns).
+    """
+    skeleton, string_grouping, start_fret = rng.choice(
+        family_index(kind)[rng.choice(family_keys(kind))]
+    )
+    return list(skeleton), string_grouping, start_fret
+
+
+def unique_families(skeletons, kind: str = "mode"):
+    """Lazy stage for iter_skeletons(): drops skeletons whose family has already been yielded.
+    Settings with fewer families than the skeletons asked for will wait forever on an endless input.
+
+    Args:
+        skeletons (iterable): (skeleton, string_grouping, start_fret) tuples.
+
+        kind (str, optional): As for skeleton_family(). Defaults to "mode".
+
+    Yields:
+        tuple: The first skeleton seen from each family.
+    """
+    seen = set()
+    for item in skeletons:
+        family = skeleton_family(item[0], kind)
+        if family not in seen:
+            seen.add(family)
+            yield item
+
+
+# Audio rendering: MIDI number of note index 0 (C3), and harmonic amplitudes of each tone.
+audio_base_note = 48
+audio_harmonics = (1.0, 0.5, 0.33, 0.25, 0.2, 0.16)
+
+
+@tuning_cache
+def pitch_wavetables(
+    sample_rate: int = 44100, note_seconds: float = 1.0, stereo: bool = False, lowest: int = 0
+):
+    """One precomputed tone per note index from lowest to the last entry of notes: additive
+    synthesis (audio_harmonics) with a plucked (exponentially decaying) envelope.
+    Row 0 is note index lowest. A final silent row pads short skeletons.
+
+    Args:
+        sample_rate (int, optional): Samples per second. Defaults to 44100.
+
+        note_seconds (float, optional): Length of each tone. Defaults to 1.0.
+
+        stereo (bool, optional): Pan each pitch from left (low) to right (high). Defaults to False.
+
+        lowest (int, optional): Lowest note index, which may be below 0 (C3): layouts that
+        reach back from the starting fret play below it. Defaults to 0.
+
+    Raises:
+        ValueError: If lowest is above 0.
+
+    Returns:
+        np.ndarray: Tones (shape: len(notes) - lowest + 1 x samples x channels), float32.
+    """
+    require_numpy()
+    if lowest > 0:
+        raise ValueError("Wavetables start at note index 0 or below.")
+    time_axis = np.arange(int(sample_rate * note_seconds)) / sample_rate
+    semitones = np.arange(lowest, len(temperament.notes)) * 12 / temperament.divisions
+    frequencies = 440.0 * 2 ** ((audio_base_note + semitones - 69) / 12)
+    phases = 2 * np.pi * frequencies[:, None] * time_axis[None, :]
+    tones = sum(
+        amplitude * np.sin(harmonic * phases)
+        for harmonic, amplitude in enumerate(audio_harmonics, start=1)
+    )
+    envelope = np.exp(-4.0 * time_axis / note_seconds) * np.minimum(time_axis * 200.0, 1.0)
+    tones = (tones * envelope / sum(audio_harmonics)).astype(np.float32)
+    tones = np.vstack([tones, np.zeros_like(tones[:1])])
+
+    if not stereo:
+        return tones[:, :, None]
+    # Notes below index 0 stay hard left with the lowest of notes.
+    pan = np.concatenate(
+        [np.zeros(-lowest), np.linspace(0.0, 1.0, len(temperament.notes)), [0.5]]
+    ) * np.pi / 2
+    return np.stack(
+        [tones * np.cos(pan)[:, None], tones * np.sin(pan)[:, None]], axis=2
+    ).astype(np.float32)
+
+
+def render_skeletons(
+    index_lists: list,
+    sample_rate: int = 44100,
+    note_seconds: float = 1.0,
+    step_seconds: float = 0.25,
+    stereo: bool = False,
+):
+    """Renders a batch of skeletons as arpeggios, mixed together in one preallocated buffer.
+    Each note starts step_seconds after the previous one; the n-th note of every skeleton
+    in the batch is mixed in a single vectorised step.
+
+    Args:
+        index_lists (list): Note indices per skeleton, e.g. from get_skel_note_indices().
+        Indices below 0 (notes under C3) get wavetable rows of their own.
+
+        sample_rate (int, optional): Samples per second. Defaults to 44100.
+
+        note_seconds (float, optional): Length of each tone. Defaults to 1.0.
+
+        step_seconds (float, optional): Time between note onsets. Defaults to 0.25.
+
+        stereo (bool, optional): Two channels instead of one. Defaults to False.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: 16-bit frames (shape: skeletons x samples x channels)
+        and the number of samples used by each skeleton.
+    """
+    lowest = min((min(indices, default=0) for indices in index_lists), default=0)
+    tones = pitch_wavetables(sample_rate, note_seconds, stereo, min(lowest, 0))
+    silent = len(tones) - 1
+    longest = max((len(indices) for indices in index_lists), default=0)
+    indices = np.full((len(index_lists), longest), silent)
+    for row, skeleton_indices in enumerate(index_lists):
+        indices[row, :len(skeleton_indices)] = np.subtract(skeleton_indices, min(lowest, 0))
+
+    step = int(sample_rate * step_seconds)
+    tone_length = tones.shape[1]
+    buffer = np.zeros(
+        (len(index_lists), step * max(longest - 1, 0) + tone_length, tones.shape[2]),
+        dtype=np.float32,
+    )
+    for position in range(longest):
+        buffer[:, position * step:position * step + tone_length] += tones[indices[:, position]]
+
+    peaks = np.abs(buffer).max(axis=(1, 2), keepdims=True)
+    buffer *= 0.9 / np.maximum(peaks, 1e-9)
+    lengths = np.array(
+        [step * max(len(skeleton_indices) - 1, 0) + tone_length for skeleton_indices in index_lists]
+    )
+    return (buffer * 32767).astype(np.int16), lengths
+
+
+def write_wav(path: str, frames, sample_rate: int = 44100):
+    """Writes 16-bit frames (shape: samples x channels) to a WAV file."""
+    with wave.open(path, "wb") as file:
+        file.setnchannels(frames.shape[1])
+        file.setsampwidth(2)
+        file.setframerate(sample_rate)
+        file.writeframes(frames.tobytes())
+
+
+def write_wav_batch(
+    fretboards,
+    directory: str,
+    sample_rate: int = 44100,
+    stereo: bool = False,
+    batch_size: int = 32,
+) -> int:
+    """Output writer for with_fretboard(): one WAV file per skeleton
+    (skeleton-00001.wav, ...), rendered batch_size skeletons at a time.
+
+    Args:
+        fretboards (iterable): Tuples as yielded by with_fretboard().
+
+        directory (str): Output directory (created if missing).
+
+        sample_rate (int, optional): Samples per second. Defaults to 44100.
+
+        stereo (bool, optional): Two channels instead of one. Defaults to False.
+
+        batch_size (int, optional): Skeletons mixed per vectorised call. Defaults to 32
+        (long skeletons take several seconds of audio each).
+
+    Returns:
+        int: Number of files written.
+    """
+    os.makedirs(directory, exist_ok=True)
+    written = 0
+    for batch in batched(fretboards, batch_size):
+        index_lists = [
+            get_skel_note_indices(cipher, starting_notes, start_fret, string_grouping)
+            for _, cipher, starting_notes, start_fret, string_grouping, _ in batch
+        ]
+        frames, lengths = render_skeletons(index_lists, sample_rate, stereo=stereo)
+        for skeleton_frames, length in zip(frames, lengths):
+            written += 1
+            write_wav(
+                os.path.join(directory, f"skeleton-{written:05}.wav"),
+                skeleton_frames[:length],
+                sample_rate,
+            )
+    return written
+
+
+# Exercise patterns expand_exercises() knows: runs up and down, groups of n notes
+# (up and down), skips of n notes (up and down) and every ordering of n-note cells.
+exercise_patterns = ("ascending", "descending", "groups-3", "groups-4", "skips-2")
+
+
+def parse_pattern(pattern: str) -> tuple[str, int]:
+    """Kind and size of an exercise pattern such as "groups-3" (size 0 for runs).
+
+    Raises:
+        ValueError: If the pattern is unknown.
+    """
+    kind, _, size = pattern.partition("-")
+    if kind in ("ascending", "descending") and not size:
+        return kind, 0
+    if kind in ("groups", "skips", "permutations") and size.isdigit() and int(size) > 0:
+        return kind, int(size)
+    raise ValueError(
+        f"Unknown pattern '{pattern}'. Patterns: ascending, descending, "
+        "groups-n, skips-n, permutations-n."
+    )
+
+
+def skeleton_events(fretboard: tuple) -> list[tuple[int, int]]:
+    """(string, fret) of every note of a with_fretboard() tuple, strings numbered from 0 (E),
+    in the order get_skel_notes() lists them.
+    """
+    _, cipher, _, _, string_grouping, _ = fretboard
+    return [
+        (string, fret)
+        for string, frets in enumerate(string_frets(cipher, string_grouping))
+        for fret in frets
+    ]
+
+
+def expand_exercises(events: list, patterns=exercise_patterns):
+    """Lazy exercises over a skeleton's events. Each exercise's events are a generator,
+    and permutations are produced one at a time, so nothing is built in advance.
+
+    Args:
+        events (list): (string, fret) events, as from skeleton_events().
+
+        patterns (iterable, optional): Pattern names. Defaults to exercise_patterns.
+
+    Yields:
+        tuple[str, generator]: Exercise name and its (string, fret) events.
+    """
+    for pattern in patterns:
+        kind, size = parse_pattern(pattern)
+        if kind == "ascending":
+            yield "ascending", (event for event in events)
+        elif kind == "descending":
+            yield "descending", (event for event in reversed(events))
+        elif kind == "groups" and len(events) >= size:
+            for direction, run in (("up", events), ("down", events[::-1])):
+                yield f"groups of {size} {direction}", cell_events(
+                    run, range(len(run) - size + 1), range(size)
+                )
+        elif kind == "skips" and len(events) > size:
+            for direction, run in (("up", events), ("down", events[::-1])):
+                yield f"skips of {size} {direction}", cell_events(
+                    run, range(len(run) - size), (0, size)
+                )
+        elif kind == "permutations" and len(events) >= size:
+            for order in itertools.permutations(range(size)):
+                yield f"cells of {size} {"".join(str(j + 1) for j in order)}", cell_events(
+                    events, range(len(events) - size + 1), order
+                )
+
+
+def cell_events(run: list, starts, offsets):
+    """Lazy events run[start + offset] for each start, offsets in turn. Taking the arguments
+    as parameters fixes them, so an exercise reads the same events however late it is consumed.
+    """
+    return (run[start + offset] for start in starts for offset in offsets)
+
+
+def exercise_count(note_count: int, patterns=exercise_patterns) -> tuple[int, int]:
+    """Fast path for counting expand_exercises() output: exercises and events
+    for a skeleton of note_count notes, from closed forms (nothing is expanded).
+    """
+    exercises = events = 0
+    for pattern in patterns:
+        kind, size = parse_pattern(pattern)
+        if kind in ("ascending", "descending"):
+            exercises, events = exercises + 1, events + note_count
+        elif kind == "groups" and note_count >= size:
+            exercises, events = exercises + 2, events + 2 * size * (note_count - size + 1)
+        elif kind == "skips" and note_count > size:
+            exercises, events = exercises + 2, events + 4 * (note_count - size)
+        elif kind == "permutations" and note_count >= size:
+            cells = math.factorial(size)
+            exercises, events = exercises + cells, events + cells * size * (note_count - size + 1)
+    return exercises, events
+
+
+def write_exercises(
+    annotated, patterns=exercise_patterns, file=sys.stdout, fingering: bool = False,
+    json_lines: bool = False,
+):
+    """Output writer for with_notes(): each skeleton as by write_skeletons(), followed by
+    one line per exercise (events as string name and fret, e.g. "A7"); or with json_lines,
+    skeleton_record()s with an "exercises" field of [name, [[string, fret], ...]] pairs.
+    """
+    for item in annotated:
+        exercises = expand_exercises(skeleton_events(item[:6]), patterns)
+        if json_lines:
+            record = skeleton_record(item, fingering)
+            record["exercises"] = [
+                [name, [list(event) for event in events]] for name, events in exercises
+            ]
+            file.write(json.dumps(record) + "\n")
+            continue
+        write_skeletons([item], file, fingering)
+        for name, events in exercises:
+            file.write(f"{name}: {" ".join(f"{"EADgbe"[s]}{fret}" for s, fret in events)}\n")
+
+
+# SVG diagram geometry, in pixels: fret spacing, string spacing and margins.
+svg_fret_width = 48
+svg_string_gap = 20
+svg_left = 36
+svg_top = 20
+
+
+def svg_window(cipher: list) -> tuple[int, int]:
+    """First fret and number of frets an SVG diagram shows for a cipher (at least five)."""
+    fretted = [fret for string in cipher for fret in string if fret > 0] or [1]
+    first = min(fretted)
+    return first, max(5, max(fretted) - first + 1)
+
+
+@functools.cache
+def svg_background(first_fret: int, fret_count: int) -> str:
+    """Static part of an SVG diagram for a six-string neck showing fret_count frets
+    from first_fret: opening tag, strings, fret wires, nut or fret number. Built once per window.
+    """
+    width = svg_left + fret_count * svg_fret_width + 12
+    height = svg_top * 2 + svg_string_gap * 5 + 14
+    bottom = svg_top + svg_string_gap * 5
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'viewBox="0 0 {width} {height}" font-family="sans-serif" font-size="10">',
+        '<g stroke="#444">',
+    ]
+    for string in range(6):
+        y = svg_top + string * svg_string_gap
+        parts.append(
+            f'<line x1="{svg_left}" y1="{y}" x2="{svg_left + fret_count * svg_fret_width}" '
+            f'y2="{y}" stroke-width="{1 + (5 - string) * 0.25}"/>'
+        )
+    for wire in range(fret_count + 1):
+        x = svg_left + wire * svg_fret_width
+        thick = 4 if wire == 0 and first_fret == 1 else 1
+        parts.append(
+            f'<line x1="{x}" y1="{svg_top}" x2="{x}" y2="{bottom}" stroke-width="{thick}"/>'
+        )
+    parts.append("</g>")
+    if first_fret > 1:
+        parts.append(
+            f'<text x="{svg_left + svg_fret_width // 2}" y="{bottom + 18}" '
+            f'text-anchor="middle">{first_fret}fr</text>'
+        )
+    return "".join(parts)
+
+
+def fretboard_svg(fretboard: tuple, shflat: str = "#") -> str:
+    """SVG fretboard diagram of a with_fretboard() tuple: the cached svg_background() for its
+    window plus one labelled marker per note (hollow left of the nut for open strings).
+
+    Args:
+        fretboard (tuple): As yielded by with_fretboard().
+
+        shflat (str, optional): "#" for sharps, "b" for flats. Defaults to "#".
+
+    Returns:
+        str: SVG document.
+    """
+    _, cipher, starting_notes, start_fret, string_grouping, _ = fretboard
+    first_fret, fret_count = svg_window(cipher)
+    parts = [svg_background(first_fret, fret_count)]
+    for string, frets in enumerate(string_frets(cipher, string_grouping)):
+        y = svg_top + (5 - string) * svg_string_gap
+        for fret in frets:
+            names = temperament.notes[
+                (starting_notes[string] - start_fret + fret) % temperament.divisions
+            ]
+            name = names[1] if len(names) == 2 and shflat == "b" else names[0]
+            if fret == 0:
+                x, fill, color = svg_left - 14, "white", "black"
+            else:
+                x = svg_left + (fret - first_fret) * svg_fret_width + svg_fret_width // 2
+                fill, color = "black", "white"
+            parts.append(
+                f'<circle cx="{x}" cy="{y}" r="8" fill="{fill}" stroke="black"/>'
+                f'<text x="{x}" y="{y + 3.5}" text-anchor="middle" fill="{color}">{name}</text>'
+            )
+    parts.append("</svg>\n")
+    return "".join(parts)
+
+
+def write_svg_batch(fretboards, directory: str, shflat: str = "#") -> int:
+    """Output writer for with_fretboard(): one SVG diagram per skeleton
+    (skeleton-00001.svg, ...). Backgrounds come from svg_background()'s cache,
+    so each file costs its markers and one write.
+
+    Args:
+        fretboards (iterable): Tuples as yielded by with_fretboard().
+
+        directory (str): Output directory (created if missing).
+
+        shflat (str, optional): "#" for sharps, "b" for flats. Defaults to "#".
+
+    Returns:
+        int: Number of files written.
+    """
+    os.makedirs(directory, exist_ok=True)
+    written = 0
+    for fretboard in fretboards:
+        written += 1
+        with open(os.path.join(directory, f"skeleton-{written:05}.svg"), "w") as file:
+            file.write(fretboard_svg(fretboard, shflat))
+    return written
+
+
+# Chord and scale types by name, as intervals above their root.
+chord_types = {
+    "major": (0, 4, 7),
+    "minor": (0, 3, 7),
+    "diminished": (0, 3, 6),
+    "augmented": (0, 4, 8),
+    "sus2": (0, 2, 7),
+    "sus4": (0, 5, 7),
+    "maj7": (0, 4, 7, 11),
+    "7": (0, 4, 7, 10),
+    "m7": (0, 3, 7, 10),
+    "m7b5": (0, 3, 6, 10),
+    "dim7": (0, 3, 6, 9),
+    "mmaj7": (0, 3, 7, 11),
+}
+scale_types = {
+    "major": (0, 2, 4, 5, 7, 9, 11),
+    "dorian": (0, 2, 3, 5, 7, 9, 10),
+    "phrygian": (0, 1, 3, 5, 7, 8, 10),
+    "lydian": (0, 2, 4, 6, 7, 9, 11),
+    "mixolydian": (0, 2, 4, 5, 7, 9, 10),
+    "minor": (0, 2, 3, 5, 7, 8, 10),
+    "locrian": (0, 1, 3, 5, 6, 8, 10),
+    "harmonic-minor": (0, 2, 3, 5, 7, 8, 11),
+    "melodic-minor": (0, 2, 3, 5, 7, 9, 11),
+    "major-pentatonic": (0, 2, 4, 7, 9),
+    "minor-pentatonic": (0, 3, 5, 7, 10),
+    "blues": (0, 3, 5, 6, 7, 10),
+    "whole-tone": (0, 2, 4, 6, 8, 10),
+}
+
+
+@tuning_cache
+def harmonic_tables(kind: str) -> tuple:
+    """Every chord or scale type in every key, and for each pitch-class mask the bitset
+    of those it relates to: chords the mask contains, or scales that contain the mask.
+    Outside 12-TET each interval takes the nearest step. The per-mask bitsets are only
+    built for masks up to table_bits wide; see harmonic_bitset().
+
+    Args:
+        kind (str): "chord" or "scale".
+
+    Returns:
+        tuple[list[str], list[int], tuple[int, ...] | None]: Names ("D minor", ...), their
+        masks, and the bitset (bit i: names[i]) for every mask (None for wider masks).
+    """
+    types = chord_types if kind == "chord" else scale_types
+    names, masks = [], []
+    for type_name, intervals in types.items():
+        for root in range(temperament.divisions):
+            names.append(f"{temperament.notes[root][0]} {type_name}")
+            steps = [round(interval * temperament.divisions / 12) for interval in intervals]
+            masks.append(pitch_class_mask([root + step for step in steps]))
+    if temperament.divisions > table_bits:
+        return names, masks, None
+
+    bitsets = []
+    for mask in range(1 << temperament.divisions):
+        bitset = 0
+        for i, harmonic_mask in enumerate(masks):
+            if (
+                harmonic_mask & mask == harmonic_mask
+                if kind == "chord"
+                else mask & harmonic_mask == mask
+            ):
+                bitset |= 1 << i
+        bitsets.append(bitset)
+    return names, masks, tuple(bitsets)
+
+
+def harmonic_bitset(kind: str, mask: int) -> int:
+    """Bitset (as in harmonic_tables()) of the chords a pitch-class mask contains,
+    or the scales containing it: a table lookup, or tested type by type for wider masks.
+    """
+    _, masks, bitsets = harmonic_tables(kind)
+    if bitsets is not None:
+        return bitsets[mask]
+    return sum(
+        1 << i
+        for i, harmonic_mask in enumerate(masks)
+        if (
+            harmonic_mask & mask == harmonic_mask
+            if kind == "chord"
+            else mask & harmonic_mask == mask
+        )
+    )
+
+
+def note_positions(token: str) -> list[int]:
+    """Pitch classes whose names in notes include token, in any case ("db", "F#", "^c")."""
+    token = token.lower()
+    return [
+        pos for pos in range(temperament.divisions)
+        if token in (name.lower() for name in temperament.notes[pos])
+    ]
+
+
+def harmonic_query(text: str, kind: str) -> int:
+    """Bitset (as in harmonic_tables()) of the chords or scales a name matches.
+    "D dorian" matches one scale, "dorian" matches it in every key.
+
+    Raises:
+        ValueError: If the name is not a known chord or scale type, or the root is not in notes.
+    """
+    types = chord_types if kind == "chord" else scale_types
+    words = text.split()
+    type_name = words[-1].lower() if words else ""
+    if type_name not in types or len(words) > 2:
+        raise ValueError(f"Unknown {kind} '{text}'. Types: {", ".join(types)}.")
+    roots = range(temperament.divisions)
+    if len(words) == 2:
+        roots = note_positions(words[0])
+        if not roots:
+            raise ValueError(f"Unknown root note '{words[0]}'.")
+    names = harmonic_tables(kind)[0]
+    wanted = {f"{temperament.notes[root][0]} {type_name}" for root in roots}
+    return sum(1 << i for i, name in enumerate(names) if name in wanted)
+
+
+def played_mask(cipher: list, starting_notes: list, start_fret: int, string_grouping: int) -> int:
+    """Pitch-class mask of every note played, as listed by get_skel_notes()."""
+    return pitch_class_mask(
+        get_skel_note_indices(cipher, starting_notes, start_fret, string_grouping)
+    )
+
+
+def harmonic_content(mask: int) -> tuple[list[str], list[str]]:
+    """Chords contained in, and scales containing, a pitch-class mask (e.g. from played_mask()).
+
+    Returns:
+        tuple[list[str], list[str]]: Chord names and scale names.
+    """
+    content = []
+    for kind in ("chord", "scale"):
+        names = harmonic_tables(kind)[0]
+        bitset = harmonic_bitset(kind, mask)
+        content.append([name for i, name in enumerate(names) if bitset >> i & 1])
+    return content[0], content[1]
+
+
+@tuning_cache
+def harmonic_match_table(contains_chord: str | None, within_scale: str | None) -> tuple[bool, ...]:
+    """Whether each pitch-class mask (up to table_bits wide) passes the chord and scale queries."""
+    chords = harmonic_query(contains_chord, "chord") if contains_chord else None
+    scales = harmonic_query(within_scale, "scale") if within_scale else None
+    chord_bitsets, scale_bitsets = harmonic_tables("chord")[2], harmonic_tables("scale")[2]
+    return tuple(
+        (chords is None or bool(chord_bitsets[mask] & chords))
+        and (scales is None or bool(scale_bitsets[mask] & scales))
+        for mask in range(1 << temperament.divisions)
+    )
+
+
+@tuning_cache
+def harmonic_mask_test(contains_chord: str | None, within_scale: str | None):
+    """Whether a pitch-class mask passes the chord and scale queries, as a function of the mask:
+    harmonic_match_table() lookups, or memoised harmonic_bitset() tests for wider masks.
+    """
+    if temperament.divisions <= table_bits:
+        return harmonic_match_table(contains_chord, within_scale).__getitem__
+    chords = harmonic_query(contains_chord, "chord") if contains_chord else None
+    scales = harmonic_query(within_scale, "scale") if within_scale else None
+
+    @functools.lru_cache(maxsize=1 << 16)
+    def passes(mask: int) -> bool:
+        return (chords is None or bool(harmonic_bitset("chord", mask) & chords)) and (
+            scales is None or bool(harmonic_bitset("scale", mask) & scales)
+        )
+    return passes
+
+
+def harmonic_matches(masks, contains_chord: str | None = None, within_scale: str | None = None):
+    """Bulk chord and scale filter: one table lookup per mask. Masks wider than table_bits
+    are instead tested against each wanted chord or scale, across the whole array at once.
+
+    Args:
+        masks (np.ndarray): Pitch-class masks, e.g. from played_mask().
+
+        contains_chord (str | None, optional): As for harmonic_query(). Defaults to no filter.
+
+        within_scale (str | None, optional): As for harmonic_query(). Defaults to no filter.
+
+    Returns:
+        np.ndarray: Boolean array, True where a mask passes.
+    """
+    require_numpy()
+    masks = np.asarray(masks)
+    if temperament.divisions <= table_bits:
+        return np.array(harmonic_match_table(contains_chord, within_scale))[masks]
+    passes = np.ones(masks.shape, dtype=bool)
+    for kind, query in (("chord", contains_chord), ("scale", within_scale)):
+        if not query:
+            continue
+        wanted = harmonic_query(query, kind)
+        related = np.zeros(masks.shape, dtype=bool)
+        for i, harmonic_mask in enumerate(harmonic_tables(kind)[1]):
+            if wanted >> i & 1:
+                related |= (
+                    masks & harmonic_mask == harmonic_mask
+                    if kind == "chord"
+                    else masks & ~harmonic_mask == 0
+                )
+        passes &= related
+    return passes
+
+
+def filter_harmonic(fretboards, contains_chord: str | None = None, within_scale: str | None = None):
+    """Lazy stage for with_fretboard(): keeps skeletons whose notes contain a chord
+    and/or fit within a scale (see harmonic_query()). The chord and scale are read
+    straight away; only the filtering is lazy.
+
+    Raises:
+        ValueError: If the chord or scale is unknown.
+
+    Returns:
+        generator: The with_fretboard() tuples that pass.
+    """
+    passes = harmonic_mask_test(contains_chord, within_scale)
+    return (
+        fretboard for fretboard in fretboards
+        if passes(played_mask(*fretboard[1:5]))
+    )
+
+
+def finger_cipher(cipher: list, string_grouping: int) -> list[list[int]]:
+    """Left-hand fingering for a cipher (see finger_shape()).
+    Shapes are normalised to their lowest fretted note first, so the same shape anywhere
+    on the neck is only solved once.
+
+    Args:
+        cipher (list): As returned by skeleton_to_fretboard().
+
+        string_grouping (int): As returned by skeleton_to_fretboard().
+
+    Returns:
+        list[list[int]]: Finger (1-4, or 0 for an open string) for every fret, indexed like cipher.
+    """
+    order = cipher_string_order[string_grouping]
+    strings = [cipher[i] for i in order]
+    lowest = min((fret for string in strings for fret in string if fret > 0), default=1)
+    shape = tuple(
+        tuple(fret - lowest + 1 if fret > 0 else 0 for fret in string) for string in strings
+    )
+    fingers = [None] * len(cipher)
+    for string_fingers, i in zip(finger_shape(shape), order):
+        fingers[i] = list(string_fingers)
+    return fingers
+
+
+def finger_move_cost(fret: int, finger: int, next_fret: int, next_finger: int) -> int:
+    """Cost of playing next_fret with next_finger straight after fret with finger.
+    The hand's position is where its index finger sits (fret - finger): moving it by one fret
+    is a stretch, by more is a shift. Reusing a finger on another fret costs a jump.
+    """
+    move = abs((next_fret - next_finger) - (fret - finger))
+    cost = move + (2 if move > 1 else 0)
+    if finger == next_finger and fret != next_fret:
+        cost += 3
+    return cost
+
+
+@functools.cache
+def finger_shape(shape: tuple) -> tuple:
+    """Minimum-cost fingering of a normalised shape by dynamic programming over its
+    fretted notes in playing order (lowest string first), one state per finger.
+
+    Args:
+        shape (tuple): Frets per string, lowest string first; 0 for open strings.
+
+    Returns:
+        tuple: Fingers per string, shaped like shape.
+    """
+    frets = [fret for string in shape for fret in string if fret > 0]
+    if not frets:
+        return tuple(tuple(0 for _ in string) for string in shape)
+
+    costs = [0] * 4
+    back = []
+    for fret, next_fret in zip(frets, frets[1:]):
+        steps = [
+            min(
+                range(4),
+                key=lambda f: costs[f] + finger_move_cost(fret, f + 1, next_fret, next_finger + 1),
+            )
+            for next_finger in range(4)
+        ]
+        costs = [
+            costs[f] + finger_move_cost(fret, f + 1, next_fret, next_finger + 1)
+            for next_finger, f in enumerate(steps)
+        ]
+        back.append(steps)
+
+    path = [min(range(4), key=costs.__getitem__)]
+    for steps in reversed(back):
+        path.append(steps[path[-1]])
+    fingers = iter(reversed(path))
+    return tuple(
+        tuple(next(fingers) + 1 if fret > 0 else 0 for fret in string) for string in shape
+    )
+
+
+def fingering_batch(fretboards) -> list:
+    """finger_cipher() for a batch of (cipher, string_grouping) pairs.
+    Repeated shapes across the batch (and earlier batches) are served from finger_shape()'s cache.
+    """
+    return [finger_cipher(cipher, string_grouping) for cipher, string_grouping in fretboards]
+
+
+def fingering_row(fingers: list, string_grouping: int) -> str:
+    """Extra tab row of fingers for a finger_cipher() result, strings in tab_print order
+    (e down to E, as cipher_string_order places them) separated by slashes.
+    """
+    return "f | " + " / ".join(
+        "--".join(map(str, fingers[i])) for i in reversed(cipher_string_order[string_grouping])
+    )
+
+
+@tuning_cache
+def starting_notes_at(start_fret: int) -> tuple[int, ...]:
+    """Starting notes of every string at a starting fret (the skeleton_to_fretboard() math)."""
+    return tuple(
+        (open_string + start_fret - 1) % temperament.divisions + 1
+        # For each string in indices of notes in E standard
+        for open_string in temperament.open_strings
+    )
+
+
+def temperament_note_names(steps: int) -> list[list[str]]:
+    """Names of each pitch class of an equal temperament in ups-and-downs notation:
+    the seven nominals are placed by the temperament's best fifth, a sharp or flat moves
+    by seven fifths less four octaves, and each ^ or v adds a step up or down.
+    Spellings with the fewest ups and downs, then the fewest accidentals, are kept;
+    a tie keeps two names (sharp first), as in notes.
+    """
+    fifth = round(steps * math.log2(3 / 2))
+    sharp = 7 * fifth - 4 * steps
+    nominals = {
+        "C": 0, "D": 2 * fifth, "E": 4 * fifth, "F": -fifth,
+        "G": fifth, "A": 3 * fifth, "B": 5 * fifth,
+    }
+    names = []
+    for pitch in range(steps):
+        spellings = []
+        for letter, nominal in nominals.items():
+            for accidentals, sign in ((0, ""), (1, "#"), (-1, "b")):
+                ups = (pitch - nominal - accidentals * sharp + steps // 2) % steps - steps // 2
+                name = f"{"^" * ups or "v" * -ups}{letter}{sign}"
+                spellings.append((abs(ups), abs(accidentals), -accidentals, name))
+        spellings.sort()
+        names.append(
+            [name for ups, sharps, _, name in spellings if (ups, sharps) == spellings[0][:2]][:2]
+        )
+    return names
+
+
+@functools.cache
+def temperament_tables(steps: int) -> dict:
+    """The pitch-model tables (as in standard_temperament) for steps divisions of the octave.
+    12-TET keeps the tables as written. Other temperaments tune their strings in the fourth
+    their best fifth implies (string_steps), with the B string a fourth below the top E,
+    and have no hand-tuned layouts: every grouping is laid out by window, takes the lengths
+    chromatic-slop leaves room for, and is cataloged if its intervals fit 15 bits,
+    as 12-TET's three narrowest do. Frets keep their 12-TET share of the neck.
+
+    Args:
+        steps (int): Divisions of the octave, e.g. 19, 22 or 24.
+
+    Raises:
+        ValueError: If steps is not between 5 and 72.
+
+    Returns:
+        dict: Table name -> table.
+    """
+    if steps == standard_temperament["divisions"]:
+        return standard_temperament
+    if not 5 <= steps <= 72:
+        raise ValueError("Divisions per octave: 5 to 72.")
+    names = temperament_note_names(steps)
+    fourth = steps - round(steps * math.log2(3 / 2))
+    low = next(pitch for pitch, name in enumerate(names) if "E" in name)
+    neck = round(21 * steps / 12)
+    ceilings = {strings: fourth * strings - 1 for strings in range(1, 7)}
+    lengths = {
+        strings: range(max(strings, 2), ceiling + 1 - (ceiling + 1) // 4 + 1)
+        for strings, ceiling in ceilings.items()
+    }
+    return {
+        "divisions": steps,
+        "notes": {pitch: names[pitch % steps] for pitch in range(3 * steps + 1)},
+        "string_steps": fourth,
+        "open_strings": tuple(
+            (low + offset) % steps
+            for offset in (0, fourth, 2 * fourth, 3 * fourth, 2 * steps - fourth, 0)
+        ),
+        "ceilings": ceilings,
+        "lengths": lengths,
+        "random_lengths": lengths,
+        "catalog_groupings": tuple(
+            strings for strings, ceiling in ceilings.items() if ceiling < 15
+        ),
+        "hand_layout_groupings": (),
+        "start_frets": range(0, neck - (fourth - 1) + 1),
+        "random_start_frets": range(0, neck - (fourth - 1)),
+        "group_positions": {
+            strings: [
+                (tuple(range(position, 6, strings)), -fourth * position)
+                for position in range(strings)
+            ]
+            for strings in ceilings
+        },
+        "finger_span": round(4 * steps / 12),
+    }
+
+
+def set_temperament(steps: int):
+    """Switches the pitch model to steps divisions of the octave (see temperament_tables()).
+    Tables built from it are cached per temperament (see tuning_cache()), so none built
+    with the old tables is served afterwards.
+
+    Raises:
+        ValueError: If steps is not between 5 and 72.
+    """
+    vars(temperament).update(temperament_tables(steps))
+
+
+def parse_pitch_classes(text: str) -> int:
+    """Pitch-class mask of a note list such as "C E G A", "Db F Ab" or "0 4 7 9".
+
+    Raises:
+        ValueError: If a note is not in notes.
+    """
+    mask = 0
+    for token in text.replace(",", " ").split():
+        if token.isdigit():
+            mask |= 1 << int(token) % temperament.divisions
+            continue
+        matches = note_positions(token)
+        if not matches:
+            raise ValueError(f"Unknown note '{token}'.")
+        mask |= 1 << matches[0]
+    return mask
+
+
+def find_realizations(query: str | int, mode: str = "exact", string_groupings=None) -> list:
+    """Reverse search: every voicing in the valid-skeleton space whose get_skel_notes()
+    output plays exactly (mode "exact") or only (mode "within") the query's pitch classes.
+
+    For each grouping and starting fret, an interval can only appear if some string
+    position plays it inside the query from every string at that position
+    (starting_notes_at()); skeletons are only built from those intervals,
+    and survivors are checked against their actual notes.
+
+    Args:
+        query (str | int): Notes for parse_pitch_classes(), or a pitch-class mask.
+
+        mode (str, optional): "exact" or "within". Defaults to "exact".
+
+        string_groupings (iterable, optional): Groupings to search. Defaults to all.
+
+    Returns:
+        list[tuple[list, int, int]]: skeleton, string_grouping, start_fret in catalog order.
+    """
+    wanted = parse_pitch_classes(query) if isinstance(query, str) else query
+    found = []
+    for string_grouping in string_groupings or temperament.catalog_groupings:
+        if string_grouping not in temperament.catalog_groupings:
+            raise ValueError(f"String grouping {string_grouping} is too wide to search.")
+        for start_fret in temperament.start_frets:
+            roots = starting_notes_at(start_fret)
+            allowed = 0
+            for strings, offset in temperament.group_positions[string_grouping]:
+                position_allowed = (1 << temperament.divisions) - 1
+                for string in strings:
+                    position_allowed &= rotate_mask(wanted, roots[string] + offset)
+                allowed |= position_allowed
+            if not allowed & 1:
+                continue
+            intervals = [
+                i for i in range(1, temperament.ceilings[string_grouping] + 1)
+                if allowed >> i % temperament.divisions & 1
+            ]
+            for length in temperament.lengths[string_grouping]:
+                for rest in itertools.combinations(intervals, length - 1):
+                    skeleton = [0, *rest]
+                    if not is_valid_skeleton(skeleton, string_grouping, start_fret):
+                        continue
+                    _, cipher, starting_notes, _, _, _ = skeleton_to_fretboard(
+                        skeleton, string_grouping, start_fret
+                    )
+                    played = played_mask(cipher, starting_notes, start_fret, string_grouping)
+                    if played == wanted or (mode == "within" and played & ~wanted == 0):
+                        found.append((skeleton, string_grouping, start_fret))
+    return found
+
+
+def parse_quotas(texts: list[str]) -> dict:
+    """Parses --quota values ("grouping,length,fret=count") into a quotas dict.
+
+    Raises:
+        ValueError: If a value is malformed, or asks for skeletons from an empty stratum.
+    """
+    quotas = {}
+    for text in texts:
+        try:
+            stratum, count = text.split("=")
+            string_grouping, length, start_fret = map(int, stratum.split(","))
+            quotas[string_grouping, length, start_fret] = int(count)
+        except ValueError:
+            raise ValueError(f"Quota '{text}': use grouping,length,fret=count.") from None
+        if int(count) > 0 and not stratum_has_skeletons(string_grouping, length, start_fret):
+            raise ValueError(
+                f"Quota '{text}': no valid skeletons of length {length} for a string grouping "
+                f"of {string_grouping} at fret {start_fret}."
+            )
+    return quotas
+
+
+def stratum_has_skeletons(string_grouping: int, length: int, start_fret: int) -> bool:
+    """Whether any skeleton is valid for a (string_grouping, length, start_fret) stratum:
+    its catalog for cataloged groupings, completion_counts() (as draw_skeleton() checks) for the rest.
+    """
+    if (
+        string_grouping not in temperament.ceilings
+        or length not in temperament.lengths[string_grouping]
+        or start_fret not in temperament.start_frets
+    ):
+        return False
+    if string_grouping in temperament.catalog_groupings:
+        return bool(valid_skeletons(string_grouping, start_fret, length))
+    rules = {rule["name"] for rule in rule_plan(string_grouping, length, start_fret)[1]}
+    counts = completion_counts(
+        string_grouping, length, "chromatic-slop" in rules, "every-string" in rules
+    )
+    return bool(counts[length - 1][0][0])
+
+
+def strata(string_grouping: int | None = None, length: int | None = None, start_fret=None) -> list:
+    """(string_grouping, length, start_fret) strata form_skeleton() draws from at random,
+    narrowed to any settings given. Strata without valid skeletons are left out.
+    """
+    return [
+        (grouping, skeleton_length, fret)
+        for grouping in ([string_grouping] if string_grouping else temperament.catalog_groupings)
+        for skeleton_length in (
+            [length] if length in temperament.lengths[grouping]
+            else temperament.random_lengths[grouping]
+        )
+        for fret in ([start_fret] if start_fret is not None else temperament.random_start_frets)
+        if stratum_has_skeletons(grouping, skeleton_length, fret)
+    ]
+
+
+def apportion(total: int, weights: dict) -> dict:
+    """Splits total into integer shares proportional to weights (largest remainder method)."""
+    weight_sum = sum(weights.values())
+    if not weight_sum:
+        raise ValueError("Nothing to share the skeletons between.")
+    shares = {key: total * weight / weight_sum for key, weight in weights.items()}
+    quotas = {key: int(share) for key, share in shares.items()}
+    leftovers = sorted(shares, key=lambda key: quotas[key] - shares[key])
+    for key in leftovers[:total - sum(quotas.values())]:
+        quotas[key] += 1
+    return quotas
+
+
+def balanced_quotas(
+    total: int,
+    policy: str = "legacy",
+    string_grouping: int | None = None,
+    length: int | None = None,
+    start_fret: int | None = None,
+) -> dict:
+    """Exact quotas per stratum (see strata()) adding up to total.
+
+    Args:
+        total (int): Number of skeletons.
+
+        policy (str, optional): "legacy" matches the mix form_skeleton()'s independent random
+        choices give on average, "uniform" gives every stratum the same share, and
+        "proportional" shares by number of valid skeletons. Defaults to "legacy".
+
+        string_grouping, length, start_fret (optional): Narrow the strata.
+
+    Raises:
+        ValueError: If no stratum has valid skeletons, or the policy is unknown.
+
+    Returns:
+        dict: (string_grouping, length, start_fret) -> count.
+    """
+    keys = strata(string_grouping, length, start_fret)
+    if not keys:
+        raise ValueError("No valid skeletons for these settings.")
+    if policy == "uniform":
+        weights = {key: 1 for key in keys}
+    elif policy == "proportional":
+        weights = {key: len(valid_skeletons(key[0], key[2], key[1])) for key in keys}
+    elif policy == "legacy":
+        per_grouping = collections.Counter(key[0] for key in keys)
+        weights = {key: 1 / per_grouping[key[0]] for key in keys}
+    else:
+        raise ValueError("Policy: 'legacy', 'uniform' or 'proportional'.")
+    return apportion(total, weights)
+
+
+def stratified_skeletons(quotas: dict, rng: random.Random = random, pilot: int = 64):
+    """Generates exactly quotas[stratum] skeletons per (string_grouping, length, start_fret).
+    A short pilot run estimates each stratum's acceptance rate; strata where rejection
+    sampling would cost more than enumerating the stratum are drawn exactly from
+    valid_skeletons() instead. The costliest strata are scheduled first.
+
+    Args:
+        quotas (dict): (string_grouping, length, start_fret) -> count.
+
+        rng (random.Random, optional): Source of randomness. Defaults to the random module.
+
+        pilot (int, optional): Rejection-sampling trials per stratum for the estimate. Defaults to 64.
+
+    Raises:
+        ValueError: If a stratum with a quota has no valid skeletons.
+
+    Yields:
+        tuple[list, int, int]: skeleton, string_grouping, start_fret (as form_skeleton() returns).
+    """
+    plans = []
+    for (string_grouping, length, start_fret), quota in quotas.items():
+        if quota <= 0:
+            continue
+        if string_grouping not in temperament.catalog_groupings:
+            plans.append((0, None, string_grouping, length, start_fret, quota))
+            continue
+        ceiling = temperament.ceilings[string_grouping]
+        accepted = sum(
+            is_valid_skeleton(unearth_skeleton(length, ceiling, rng), string_grouping, start_fret)
+            for _ in range(pilot)
+        )
+        rejection_cost = quota * pilot / accepted if accepted else math.inf
+        exact_cost = math.comb(ceiling, length - 1) + quota
+        plans.append(
+            (min(rejection_cost, exact_cost), rejection_cost > exact_cost,
+             string_grouping, length, start_fret, quota)
+        )
+
+    for _, exact, string_grouping, length, start_fret, quota in sorted(plans, reverse=True):
+        if exact is None:
+            for _ in range(quota):
+                skeleton = draw_skeleton(string_grouping, start_fret, length, rng)
+                yield skeleton, string_grouping, start_fret
+            continue
+        if exact:
+            catalog = valid_skeletons(string_grouping, start_fret, length)
+            if not catalog:
+                raise ValueError(
+                    f"No valid skeletons of length {length} for a string grouping of "
+                    f"{string_grouping} at fret {start_fret}."
+                )
+            for _ in range(quota):
+                yield list(rng.choice(catalog)), string_grouping, start_fret
+            continue
+        for _ in range(quota):
+            while True:
+                skeleton = unearth_skeleton(length, temperament.ceilings[string_grouping], rng)
+                if is_valid_skeleton(skeleton, string_grouping, start_fret):
+                    yield skeleton, string_grouping, start_fret
+                    break
+
+
+@tuning_cache
+def voicing_catalog() -> tuple[list, dict]:
+    """Numbered catalog of the valid-skeleton space, in skeleton_space() order.
+
+    Returns:
+        tuple[list, dict]: (skeleton, string_grouping, start_fret) tuples by catalog index,
+        and the index of each of them (skeleton as a tuple).
+    """
+    voicings = [
+        (tuple(skeleton), string_grouping, start_fret)
+        for skeleton, string_grouping, start_fret in skeleton_space()
+    ]
+    return voicings, {voicing: i for i, voicing in enumerate(voicings)}
+
+
+def catalog_key() -> str:
+    """Identifies the current catalog numbering: its size, the enabled curation rules and
+    a digest of their source (so editing a rule changes the key), and outside 12-TET
+    the temperament.
+    """
+    rules = [
+        rule for rule in curation_rules.values()
+        if rule["enabled"]
+        and rule["groupings"]
+        & {rule_grouping(grouping) for grouping in temperament.catalog_groupings}
+    ]
+    digest = hashlib.sha256()
+    for rule in rules:
+        try:
+            source = inspect.getsource(rule["check"])
+        except (OSError, TypeError):  # No source to read (e.g. a rule built at runtime).
+            source = rule["check"].__qualname__
+        digest.update(source.encode())
+    enabled = ",".join(rule["name"] for rule in rules)
+    tuning = "" if temperament.divisions == 12 else f"{temperament.divisions}-TET:"
+    return f"{tuning}{len(voicing_catalog()[0])}:{enabled}:{digest.hexdigest()[:16]}"
+
+
+class PracticeLog:
+    """SQLite-backed record of the voicings each user has practised.
+
+    Every sighting is logged in the seen table; each user's coverage is also kept as a bitmap
+    over catalog indices (one bit per voicing), so loading a user is one read.
+    Unseen voicings are held in an in-memory pool with swap-and-pop removal,
+    which makes drawing a random unseen voicing O(1). A drawn voicing leaves the pool
+    (so it is not dealt twice) but only counts as seen once record() is called for it.
+    """
+
+    def __init__(self, path: str):
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS seen (
+                user TEXT, voicing INTEGER, seen_at REAL, PRIMARY KEY (user, voicing)
+            );
+            CREATE TABLE IF NOT EXISTS coverage (user TEXT PRIMARY KEY, bitmap BLOB);
+            """
+        )
+        key = catalog_key()
+        stored = self.connection.execute(
+            "SELECT value FROM meta WHERE key = 'catalog'"
+        ).fetchone()
+        if stored is None:
+            self.connection.execute("INSERT INTO meta VALUES ('catalog', ?)", (key,))
+            self.connection.commit()
+        elif stored[0] != key:
+            raise ValueError(
+                "Practice log was built for a different catalog (curation rules changed)."
+            )
+        self.size = len(voicing_catalog()[0])
+        self.users = {}
+
+    def load(self, user: str) -> tuple:
+        """Coverage bitmap, unseen pool and pool positions (-1: seen) for a user."""
+        if user not in self.users:
+            row = self.connection.execute(
+                "SELECT bitmap FROM coverage WHERE user = ?", (user,)
+            ).fetchone()
+            bitmap = bytearray(row[0]) if row else bytearray((self.size + 7) // 8)
+            pool = array.array(
+                "l", (i for i in range(self.size) if not bitmap[i >> 3] >> (i & 7) & 1)
+            )
+            positions = array.array("l", [-1]) * self.size
+            for position, i in enumerate(pool):
+                positions[i] = position
+            self.users[user] = bitmap, pool, positions
+        return self.users[user]
+
+    def seen_count(self, user: str) -> int:
+        """Number of distinct voicings the user has seen."""
+        return int.from_bytes(self.load(user)[0]).bit_count()
+
+    def take(self, user: str, i: int):
+        """Removes catalog index i from the user's unseen pool (if it is still there)."""
+        pool, positions = self.load(user)[1:]
+        if positions[i] < 0:
+            return
+        last = pool.pop()
+        if last != i:
+            pool[positions[i]] = last
+            positions[last] = positions[i]
+        positions[i] = -1
+
+    def record(self, user: str, voicings):
+        """Marks (skeleton, string_grouping, start_fret) voicings as seen by the user."""
+        bitmap = self.load(user)[0]
+        index = voicing_catalog()[1]
+        now = time.time()
+        rows = []
+        for skeleton, string_grouping, start_fret in voicings:
+            i = index[tuple(skeleton), string_grouping, start_fret]
+            rows.append((user, i, now))
+            bitmap[i >> 3] |= 1 << (i & 7)
+            self.take(user, i)
+        self.connection.executemany("INSERT OR IGNORE INTO seen VALUES (?, ?, ?)", rows)
+        self.connection.execute(
+            "INSERT OR REPLACE INTO coverage VALUES (?, ?)", (user, bytes(bitmap))
+        )
+        self.connection.commit()
+
+    def draw_unseen(self, user: str, rng: random.Random = random):
+        """A random voicing the user has not seen (nor been dealt by this log), or None
+        once the pool is empty. The voicing is taken from the pool but not recorded.
+
+        Returns:
+            tuple[list, int, int] | None: skeleton, string_grouping, start_fret.
+        """
+        pool = self.load(user)[1]
+        if not pool:
+            return None
+        i = pool[rng.randrange(len(pool))]
+        self.take(user, i)
+        skeleton, string_grouping, start_fret = voicing_catalog()[0][i]
+        return list(skeleton), string_grouping, start_fret
+
+    def close(self):
+        self.connection.close()
+
+
+def unseen_skeletons(log: PracticeLog, user: str, rng: random.Random = random):
+    """Draws voicings the user has not seen from a practice log, each at most once,
+    until none is left. Nothing is recorded: see record_seen().
+
+    Yields:
+        tuple[list, int, int]: skeleton, string_grouping, start_fret (as form_skeleton() returns).
+    """
+    while (voicing := log.draw_unseen(user, rng)) is not None:
+        yield voicing
+    print(f"No unseen skeletons left for {user}.", file=sys.stderr)
+
+
+def record_seen(fretboards, log: PracticeLog, user: str):
+    """Passes with_fretboard() tuples through, recording each voicing as seen by the user
+    once the consumer has taken it and asks for the next, so voicings dropped by filters
+    (or never reached) stay unseen.
+
+    Yields:
+        tuple: The with_fretboard() tuples, unchanged.
+    """
+    for fretboard in fretboards:
+        yield fretboard
+        start_fret, string_grouping, skeleton = fretboard[3:6]
+        log.record(user, [(skeleton, string_grouping, start_fret)])
+
+
+def prime_form(mask: int) -> str:
+    """Set class of a pitch-class mask: its prime form under transposition and inversion
+    (Rahn's convention), written with t and e for 10 and 11, e.g. "037". Temperaments
+    with more than 12 steps join the steps with dashes instead, e.g. "0-6-11".
+    """
+    pitches = [pitch for pitch in range(temperament.divisions) if mask >> pitch & 1]
+    forms = [
+        sorted((sign * (pitch - root)) % temperament.divisions for pitch in pitches)
+        for root in pitches
+        for sign in (1, -1)
+    ]
+    best = min(forms or [[]], key=lambda form: form[::-1])
+    if temperament.divisions > 12:
+        return "-".join(map(str, best))
+    return "".join("0123456789te"[pitch] for pitch in best)
+
+
+def voicing_attribute(voicing: tuple, attribute: str) -> list:
+    """Values a catalog voicing has for an attribute_bitmaps() attribute."""
+    skeleton, string_grouping, start_fret = voicing
+    match attribute:
+        case "length":
+            return [len(skeleton)]
+        case "grouping":
+            return [string_grouping]
+        case "fret":
+            return [start_fret]
+        case "has":
+            return list(skeleton[1:])
+        case "ic":
+            pitches = {i % temperament.divisions for i in skeleton}
+            return sorted(
+                {
+                    min((b - a) % temperament.divisions, (a - b) % temperament.divisions)
+                    for a in pitches for b in pitches
+                }
+                - {0}
+            )
+        case "span":
+            cipher = skeleton_to_fretboard(list(skeleton), string_grouping, start_fret)[1]
+            low, high = hand_position(cipher)
+            return [high - low]
+        case "class":
+            return [prime_form(pitch_class_mask(skeleton))]
+    raise ValueError(
+        f"Unknown attribute '{attribute}'. Attributes: {", ".join(where_attributes)}."
+    )
+
+
+# Attributes --where can filter on: length, string grouping, starting fret, intervals present
+# (above the root), interval classes between any two notes, hand span in frets, set class.
+where_attributes = ("length", "grouping", "fret", "has", "ic", "span", "class")
+
+
+@tuning_cache
+def attribute_bitmaps(attribute: str) -> dict:
+    """Bitmap index of an attribute over voicing_catalog(): for each value, an int whose
+    bit i is set if voicing i has that value. Built on first use, so a filter only builds
+    the attributes it names. Spans are read off voicing_buckets(), whose hand positions
+    come from one fretboard_batch() call rather than a layout per voicing; interval and
+    set classes depend on the pitch-class set alone and are worked out once per set.
+    """
+    voicings, numbers = voicing_catalog()
+    size = len(voicings)
+    if attribute == "span":
+        pairs = (
+            (numbers[tuple(skeleton), string_grouping, start_fret], [high - low])
+            for (_, (low, high)), bucket in voicing_buckets().items()
+            for skeleton, string_grouping, start_fret in bucket
+        )
+    elif attribute in ("ic", "class"):
+        values_by_mask = {}
+        pairs = []
+        for i, voicing in enumerate(voicings):
+            mask = pitch_class_mask(voicing[0])
+            if mask not in values_by_mask:
+                values_by_mask[mask] = voicing_attribute(voicing, attribute)
+            pairs.append((i, values_by_mask[mask]))
+    else:
+        pairs = (
+            (i, voicing_attribute(voicing, attribute)) for i, voicing in enumerate(voicings)
+        )
+    bitsets = {}
+    for i, values in pairs:
+        for value in values:
+            if value not in bitsets:
+                bitsets[value] = bytearray((size + 7) // 8)
+            bitsets[value][i >> 3] |= 1 << (i & 7)
+    return {value: int.from_bytes(bitset, "little") for value, bitset in bitsets.items()}
+
+
+def bitmap_indices(bitmap: int) -> list[int]:
+    """Catalog indices of the set bits of a bitmap, in order."""
+    indices = []
+    for byte_index, byte in enumerate(bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")):
+        while byte:
+            low = byte & -byte
+            indices.append(byte_index * 8 + low.bit_length() - 1)
+            byte ^= low
+    return indices
+
+
+def where_bitmap(expression: str) -> int:
+    """Compiles a --where filter over the catalog to one bitmap of matching voicings.
+
+    Comparisons (attribute, operator, value) select the union of an attribute's value
+    bitmaps that satisfy them; "and" (or ",") intersects, "or" unites and "not" complements,
+    with parentheses for grouping. For example:
+    "length >= 5 and has = 7 and span <= 4 and grouping = 3 and not ic = 6".
+
+    Args:
+        expression (str): Filter expression over where_attributes,
+        with operators =, !=, <, <=, > and >= (class takes = and != only).
+
+    Raises:
+        ValueError: If the expression is malformed.
+
+    Returns:
+        int: Bitmap of matching catalog indices.
+    """
+    tokens = re.findall(r"\s*(<=|>=|!=|==|[=<>(),]|[\w-]+)", expression)
+    if "".join(tokens) != re.sub(r"\s+", "", expression):
+        raise ValueError(f"Where: cannot read '{expression}'.")
+    universe = (1 << len(voicing_catalog()[0])) - 1
+    position = 0
+    compare = {
+        "=": operator.eq, "==": operator.eq, "!=": operator.ne,
+        "<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge,
+    }
+
+    def peek():
+        return tokens[position].lower() if position < len(tokens) else None
+
+    def take():
+        nonlocal position
+        position += 1
+        return tokens[position - 1]
+
+    def union():
+        bitmap = intersection()
+        while peek() == "or":
+            take()
+            bitmap |= intersection()
+        return bitmap
+
+    def intersection():
+        bitmap = factor()
+        while peek() in ("and", ","):
+            take()
+            bitmap &= factor()
+        return bitmap
+
+    def factor():
+        if peek() == "not":
+            take()
+            return universe ^ factor()
+        if peek() == "(":
+            take()
+            bitmap = union()
+            if peek() != ")":
+                raise ValueError(f"Where: missing ')' in '{expression}'.")
+            take()
+            return bitmap
+        if position + 3 > len(tokens):
+            raise ValueError(f"Where: incomplete comparison in '{expression}'.")
+        attribute, sign, value = take().lower(), take(), take()
+        if attribute not in where_attributes:
+            raise ValueError(
+                f"Where: unknown attribute '{attribute}'. Attributes: {", ".join(where_attributes)}."
+            )
+        if sign not in compare or (attribute == "class" and sign not in ("=", "==", "!=")):
+            raise ValueError(f"Where: unsupported comparison '{attribute} {sign}'.")
+        if attribute != "class":
+            if not value.isdigit():
+                raise ValueError(f"Where: '{attribute}' takes a number, not '{value}'.")
+            value = int(value)
+        bitmap = 0
+        for candidate, candidate_bitmap in attribute_bitmaps(attribute).items():
+            if compare[sign](candidate, value):
+                bitmap |= candidate_bitmap
+        return bitmap
+
+    bitmap = union()
+    if position != len(tokens):
+        raise ValueError(f"Where: unexpected '{tokens[position]}' in '{expression}'.")
+    return bitmap
+
+
+def where_skeletons(
+    expression: str, count: int, rng: random.Random = random, ordered: bool = False
+):
+    """Voicings matching a where_bitmap() filter: count random draws (independent,
+    like form_skeleton()), or with ordered the first count matches in catalog order.
+    The filter is compiled straight away; only the drawing is lazy.
+
+    Raises:
+        ValueError: If the expression is malformed.
+
+    Returns:
+        generator: skeleton, string_grouping, start_fret tuples (as form_skeleton() returns).
+    """
+    voicings = voicing_catalog()[0]
+    matches = bitmap_indices(where_bitmap(expression))
+    if not matches:
+        print(f"No skeletons match '{expression}'.", file=sys.stderr)
+    chosen = matches[:count] if ordered else (
+        rng.choice(matches) for _ in range(count if matches else 0)
+    )
+    return ((list(voicings[i][0]), *voicings[i][1:]) for i in chosen)
+
+
+def parse_shard(text: str) -> tuple[int, int]:
+    """Shard number and shard count from "k/n" (shards numbered from 0).
+
+    Raises:
+        ValueError: If text is not of that form or k is not below n.
+    """
+    shard, _, shards = text.partition("/")
+    if not (shard.isdigit() and shards.isdigit()) or int(shard) >= int(shards):
+        raise ValueError(f"Shard '{text}': use k/n, with 0 <= k < n.")
+    return int(shard), int(shards)
+
+
+def shard_range(total: int, shard: int, shards: int) -> range:
+    """The items (numbered from 0) of one of shards contiguous, balanced slices of total."""
+    return range(total * shard // shards, total * (shard + 1) // shards)
+
+
+def shard_skeletons(
+    shard: int,
+    shards: int,
+    count: int,
+    seed: int,
+    grouping: int | str = "r",
+    length: int | str = "r",
+    fret: int | str = "r",
+    where: str | None = None,
+    ordered: bool = False,
+) -> tuple:
+    """One shard of a batch, produced without coordination between shards.
+
+    Items are numbered across the whole batch and each shard makes a contiguous slice.
+    Random items are drawn from their own stream, seeded by the batch seed and item number,
+    so item j is the same whichever shard (and however many shards) makes it.
+    With where and ordered, the items are instead index ranges over the catalog matches.
+
+    Args:
+        shard (int): This shard's number (from 0).
+
+        shards (int): Number of shards.
+
+        count (int): Items in the whole batch.
+
+        seed (int): Batch seed, shared by every shard.
+
+        grouping, length, fret (optional): As for iter_skeletons(). Defaults to "r".
+
+        where (str | None, optional): where_bitmap() filter to draw from. Defaults to None.
+
+        ordered (bool, optional): With where, take matches in catalog order. Defaults to False.
+
+    Returns:
+        tuple[int, generator]: Items in the shard, and a generator of
+        (item number, (skeleton, string_grouping, start_fret)).
+    """
+    if where is not None:
+        voicings = voicing_catalog()[0]
+        matches = bitmap_indices(where_bitmap(where))
+        if ordered:
+            items = shard_range(min(count, len(matches)), shard, shards)
+            return len(items), (
+                (j, (list(voicings[matches[j]][0]), *voicings[matches[j]][1:])) for j in items
+            )
+        if not matches:
+            raise ValueError(f"No skeletons match '{where}'.")
+
+        def draw(rng):
+            skeleton, string_grouping, start_fret = voicings[rng.choice(matches)]
+            return list(skeleton), string_grouping, start_fret
+    else:
+        def draw(rng):
+            return form_skeleton(fret, length, grouping, rng)
+
+    items = shard_range(count, shard, shards)
+    return len(items), ((j, draw(random.Random(f"{seed}:{j}"))) for j in items)
+
+
+def write_shard(
+    items, shard: int, shards: int, size: int, file=sys.stdout,
+    shflat: str = "#", fingering: bool = False,
+):
+    """Writes a shard file for merge_shards(): a header line ({"shard", "shards", "items"}),
+    then one skeleton_record() per line with its batch item number as "index".
+
+    Args:
+        items (iterable): (item number, voicing) pairs, as from shard_skeletons().
+
+        shard (int): Shard number.
+
+        shards (int): Number of shards.
+
+        size (int): Items in the shard.
+
+        file (optional): Writable text stream. Defaults to sys.stdout.
+
+        shflat (str, optional): As for with_notes(). Defaults to "#".
+
+        fingering (bool, optional): Include fingering. Defaults to False.
+    """
+    file.write(shard_header(shard, shards, size))
+    for item in items:
+        write_shard_item(item, file, shflat, fingering)
+
+
+def shard_header(shard: int, shards: int, size: int) -> str:
+    """First line of a shard file."""
+    return json.dumps({"shard": shard, "shards": shards, "items": size}) + "\n"
+
+
+def write_shard_item(item: tuple, file, shflat: str = "#", fingering: bool = False):
+    """Writes one (item number, voicing) pair as a shard file line."""
+    j, voicing = item
+    annotated = next(with_notes(with_fretboard([voicing]), shflat))
+    file.write(json.dumps({"index": j, **skeleton_record(annotated, fingering)}) + "\n")
+
+
+def merge_shards(paths: list):
+    """Combines the shard files of one batch into a single stream in item order,
+    reading every file in step (k-way merge), so memory stays constant.
+
+    Raises:
+        ValueError: If the files are not exactly the shards of one batch, or a file is short.
+
+    Yields:
+        tuple[list, int, int]: skeleton, string_grouping, start_fret, in batch order.
+    """
+    files = [open(path) for path in paths]
+    try:
+        headers = [json.loads(file.readline() or "{}") for file in files]
+        shard_counts = {header.get("shards") for header in headers}
+        shard_numbers = sorted(header.get("shard") for header in headers if "shard" in header)
+        if len(shard_counts) != 1 or shard_numbers != list(range(len(files))) or len(
+            files
+        ) != headers[0]["shards"]:
+            raise ValueError(
+                "Merge needs every shard file of one batch (shards 0 to n-1), each once."
+            )
+        expected = sum(header["items"] for header in headers)
+        merged = 0
+        for record in heapq.merge(
+            *((json.loads(line) for line in file) for file in files),
+            key=lambda record: record["index"],
+        ):
+            merged += 1
+            yield record["skeleton"], record["string_grouping"], record["start_fret"]
+        if merged != expected:
+            raise ValueError(f"Shard files hold {merged} of {expected} items; one is incomplete.")
+    finally:
+        for file in files:
+            file.close()
+
+
+def run_fingerprint(args) -> str:
+    """The command-line settings of a run, as recorded in its checkpoint."""
+    return json.dumps(
+        {
+            name: value for name, value in sorted(vars(args).items())
+            if name not in ("checkpoint_every", "workers")
+        },
+        default=str,
+    )
+
+
+def write_checkpointed(
+    items,
+    write_item,
+    count: int,
+    path: str,
+    checkpoint: str,
+    fingerprint: str,
+    every: int = 1000,
+    rng: random.Random | None = None,
+    header: str = "",
+):
+    """Writes count items to path, recording progress in a checkpoint file so that an
+    interrupted run, restarted with the same settings, resumes where it stopped
+    and leaves byte-identical output.
+
+    Every every items the output is flushed to disk and the checkpoint records the items
+    written, the output's size and (if given) rng's state. On resume the output is cut back
+    to that size; with rng, its state is restored and generation continues from there,
+    otherwise the items already written are regenerated and skipped. The checkpoint file
+    is removed once the export completes.
+
+    Args:
+        items (iterable): Items to write, regenerated identically on resume.
+
+        write_item (Callable): write_item(item, file) writes one item.
+
+        count (int): Items to write in all.
+
+        path (str): Output file.
+
+        checkpoint (str): Checkpoint file.
+
+        fingerprint (str): Settings of the run; a checkpoint from other settings is refused.
+
+        every (int, optional): Items between checkpoints. Defaults to 1000.
+
+        rng (random.Random | None, optional): The items' only source of randomness, when
+        items draw from it one at a time (no lookahead). Defaults to None.
+
+        header (str, optional): Written once, at the start of the output. Defaults to "".
+
+    Raises:
+        ValueError: If the checkpoint belongs to other settings.
+    """
+    state = None
+    if os.path.exists(checkpoint):
+        with open(checkpoint) as file:
+            state = json.load(file)
+        if state["fingerprint"] != fingerprint:
+            raise ValueError(
+                f"Checkpoint {checkpoint} belongs to a run with other settings."
+            )
+
+    done = state["items"] if state else 0
+    skip = done
+    if state and rng is not None and state["rng"] is not None:
+        version, internal, gauss_next = state["rng"]
+        rng.setstate((version, tuple(internal), gauss_next))
+        skip = 0
+
+    def save(file):
+        file.flush()
+        os.fsync(file.fileno())
+        progress = {
+            "fingerprint": fingerprint,
+            "items": done,
+            "offset": file.tell(),
+            "rng": None if rng is None else rng.getstate(),
+        }
+        with open(checkpoint + ".tmp", "w") as saved:
+            json.dump(progress, saved)
+        os.replace(checkpoint + ".tmp", checkpoint)
+
+    with open(path, "r+" if state else "w", encoding="utf-8", buffering=1 << 16) as file:
+        if state:
+            file.seek(state["offset"])
+            file.truncate()
+        else:
+            file.write(header)
+        for item in itertools.islice(items, skip, skip + count - done):
+            write_item(item, file)
+            done += 1
+            if done % every == 0:
+                save(file)
+    if os.path.exists(checkpoint):
+        os.remove(checkpoint)
+
+
+class IndexedHeap:
+    """Binary min-heap of keys by priority, with each key's heap position indexed
+    so that any key's priority can be changed in O(log n). The smallest is peeked in O(1).
+    """
+
+    def __init__(self, priorities: dict | None = None):
+        self.priorities = dict(priorities or {})
+        self.heap = sorted(self.priorities, key=self.priorities.__getitem__)
+        self.positions = {key: i for i, key in enumerate(self.heap)}
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __contains__(self, key):
+        return key in self.positions
+
+    def peek(self) -> tuple:
+        """(key, priority) with the smallest priority."""
+        key = self.heap[0]
+        return key, self.priorities[key]
+
+    def push(self, key, priority):
+        """Adds a key, or changes its priority if it is already in the heap."""
+        if key in self.positions:
+            old = self.priorities[key]
+            self.priorities[key] = priority
+            if priority < old:
+                self.sift_up(self.positions[key])
+            else:
+                self.sift_down(self.positions[key])
+            return
+        self.priorities[key] = priority
+        self.heap.append(key)
+        self.positions[key] = len(self.heap) - 1
+        self.sift_up(len(self.heap) - 1)
+
+    def pop(self) -> tuple:
+        """Removes and returns (key, priority) with the smallest priority."""
+        key = self.heap[0]
+        last = self.heap.pop()
+        if self.heap:
+            self.heap[0] = last
+            self.positions[last] = 0
+            self.sift_down(0)
+        del self.positions[key]
+        return key, self.priorities.pop(key)
+
+    def swap(self, i: int, j: int):
+        self.heap[i], self.heap[j] = self.heap[j], self.heap[i]
+        self.positions[self.heap[i]] = i
+        self.positions[self.heap[j]] = j
+
+    def sift_up(self, i: int):
+        while i and self.priorities[self.heap[i]] < self.priorities[self.heap[(i - 1) // 2]]:
+            self.swap(i, (i - 1) // 2)
+            i = (i - 1) // 2
+
+    def sift_down(self, i: int):
+        while True:
+            smallest = i
+            for child in (2 * i + 1, 2 * i + 2):
+                if (
+                    child < len(self.heap)
+                    and self.priorities[self.heap[child]] < self.priorities[self.heap[smallest]]
+                ):
+                    smallest = child
+            if smallest == i:
+                return
+            self.swap(i, smallest)
+            i = smallest
+
+
+class ReviewScheduler:
+    """SM-2 spaced-repetition schedule over skeleton IDs (voicing_catalog() indices),
+    persisted as JSON. Due dates live in an IndexedHeap, so the next due skeleton is
+    found in O(1) and each review reschedules in O(log n).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.cards = {}
+        if os.path.exists(path):
+            with open(path) as file:
+                saved = json.load(file)
+            if saved["catalog"] != catalog_key():
+                raise ValueError(
+                    "Review schedule was built for a different catalog (curation rules changed)."
+                )
+            self.cards = {int(key): card for key, card in saved["cards"].items()}
+        self.due_dates = IndexedHeap({key: card["due"] for key, card in self.cards.items()})
+
+    def add(self, skeleton_id: int, now: float | None = None):
+        """Schedules a new skeleton, due now."""
+        if skeleton_id in self.cards:
+            return
+        if not 0 <= skeleton_id < len(voicing_catalog()[0]):
+            raise ValueError(f"No skeleton with ID {skeleton_id}.")
+        now = time.time() if now is None else now
+        self.cards[skeleton_id] = {"easiness": 2.5, "repetitions": 0, "interval": 0, "due": now}
+        self.due_dates.push(skeleton_id, now)
+
+    def review(self, skeleton_id: int, quality: int, now: float | None = None):
+        """Records a recall grade (0-5, SM-2) and reschedules the skeleton."""
+        if not 0 <= quality <= 5:
+            raise ValueError("Quality: 0 (blackout) to 5 (perfect recall).")
+        now = time.time() if now is None else now
+        self.add(skeleton_id, now)
+        card = self.cards[skeleton_id]
+        if quality < 3:
+            card["repetitions"] = 0
+            card["interval"] = 1
+        else:
+            card["repetitions"] += 1
+            card["interval"] = {1: 1, 2: 6}.get(
+                card["repetitions"], round(card["interval"] * card["easiness"])
+            )
+        card["easiness"] = max(
+            1.3, card["easiness"] + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02)
+        )
+        card["due"] = now + card["interval"] * 86400
+        self.due_dates.push(skeleton_id, card["due"])
+
+    def peek(self) -> tuple | None:
+        """(skeleton ID, due time) of the next skeleton due, or None if nothing is scheduled."""
+        return self.due_dates.peek() if len(self.due_dates) else None
+
+    def due(self, now: float | None = None, limit: int | None = None) -> list[int]:
+        """IDs of skeletons due by now, soonest first (at most limit)."""
+        now = time.time() if now is None else now
+        taken = []
+        while (
+            len(self.due_dates)
+            and self.due_dates.peek()[1] <= now
+            and (limit is None or len(taken) < limit)
+        ):
+            taken.append(self.due_dates.pop())
+        for skeleton_id, due in taken:
+            self.due_dates.push(skeleton_id, due)
+        return [skeleton_id for skeleton_id, _ in taken]
+
+    def save(self):
+        with open(self.path, "w") as file:
+            json.dump({"catalog": catalog_key(), "cards": self.cards}, file)
+
+
+def due_skeletons(path: str, count: int, now: float | None = None):
+    """Skeletons due for review in the schedule at path: an alternative source to form_skeleton().
+
+    Yields:
+        tuple[int, list, int, int]: skeleton ID, skeleton, string_grouping, start_fret.
+    """
+    voicings = voicing_catalog()[0]
+    for skeleton_id in ReviewScheduler(path).due(now, count):
+        skeleton, string_grouping, start_fret = voicings[skeleton_id]
+        yield skeleton_id, list(skeleton), string_grouping, start_fret
+
+
+def review_session(path: str, grades: list[str], count: int, shflat: str = "#", format: str = "tab"):
+    """CLI review mode: records any grades ("id=quality"), then shows the skeletons due.
+
+    Raises:
+        ValueError: If a grade is malformed or names an unknown skeleton.
+    """
+    scheduler = ReviewScheduler(path)
+    for grade in grades:
+        skeleton_id, _, quality = grade.partition("=")
+        if not skeleton_id.isdigit() or not (quality.isdigit() or grade == skeleton_id):
+            raise ValueError(f"Grade '{grade}': use id=quality (0-5), or an id to add.")
+        if quality:
+            scheduler.review(int(skeleton_id), int(quality))
+        else:
+            scheduler.add(int(skeleton_id))
+    scheduler.save()
+
+    due = list(due_skeletons(path, count))
+    if not due:
+        upcoming = scheduler.peek()
+        print(
+            "\nNothing due."
+            if upcoming is None
+            else f"\nNothing due until {time.strftime("%Y-%m-%d %H:%M", time.localtime(upcoming[1]))}."
+        )
+        return
+    annotated = with_notes(
+        with_fretboard(voicing[1:] for voicing in due), shflat
+    )
+    for (skeleton_id, *_), item in zip(due, annotated):
+        if format == "json":
+            print(json.dumps({"id": skeleton_id, **skeleton_record(item)}))
+        else:
+            print(f"\nSkeleton ID: {skeleton_id}")
+            write_skeletons([item])
+
+
+def consonance(fretboard: tuple) -> float:
+    """Objective: mean consonance of every pair of pitch classes played.
+    Thirds, sixths, fourths and fifths score 1; seconds 0; semitones, major sevenths
+    and tritones -1. Outside 12-TET an interval scores as its nearest semitone count
+    (at least one).
+    """
+    _, cipher, starting_notes, start_fret, string_grouping, _ = fretboard
+    mask = played_mask(cipher, starting_notes, start_fret, string_grouping)
+    classes = [pitch for pitch in range(temperament.divisions) if mask >> pitch & 1]
+    pairs = list(itertools.combinations(classes, 2))
+    weights = {1: -1, 2: 0, 3: 1, 4: 1, 5: 1, 6: -1}
+    semitones = [
+        max(1, round(
+            min((b - a) % temperament.divisions, (a - b) % temperament.divisions)
+            * 12 / temperament.divisions
+        ))
+        for a, b in pairs
+    ]
+    return sum(weights[semitone] for semitone in semitones) / max(len(pairs), 1)
+
+
+def compactness(fretboard: tuple) -> float:
+    """Objective: the narrower the hand_position() span, the better."""
+    low, high = hand_position(fretboard[1])
+    return -(high - low)
+
+
+# Built-in objectives for optimize_skeletons(), by --optimize name.
+objectives = {"consonance": consonance, "compact": compactness}
+
+
+def resolve_objective(objective):
+    """An objective as a callable: a name in objectives, "module:function", or a callable."""
+    if callable(objective):
+        return objective
+    if objective in objectives:
+        return objectives[objective]
+    module, _, function = objective.partition(":")
+    if not function:
+        raise ValueError(
+            f"Unknown objective '{objective}'. Objectives: {", ".join(objectives)} "
+            "or 'module:function'."
+        )
+    try:
+        return getattr(importlib.import_module(module), function)
+    except (ImportError, AttributeError) as error:
+        raise ValueError(f"Objective '{objective}': {error}.") from error
+
+
+def score_voicings(task: tuple) -> list[float]:
+    """optimize_skeletons() worker: scores a chunk of (skeleton, string_grouping, start_fret)."""
+    objective, voicings = task
+    objective = resolve_objective(objective)
+    return [
+        float(objective(skeleton_to_fretboard(list(skeleton), string_grouping, start_fret)))
+        for skeleton, string_grouping, start_fret in voicings
+    ]
+
+
+def mutate_voicing(voicing: tuple, rng: random.Random, length=None, start_fret=None) -> tuple:
+    """A random valid neighbour of a voicing: one valid_neighbours() edit (shifts only if
+    length is fixed), or the same skeleton a fret up or down (unless start_fret is fixed).
+    """
+    skeleton, string_grouping, fret = voicing
+    moves = [
+        (tuple(neighbour), string_grouping, fret)
+        for edit, _, neighbour in valid_neighbours(list(skeleton), string_grouping, fret)
+        if length is None or edit == "shift"
+    ]
+    if start_fret is None:
+        moves += [
+            (skeleton, string_grouping, other)
+            for other in (fret - 1, fret + 1)
+            if other in temperament.start_frets
+            and is_valid_skeleton(list(skeleton), string_grouping, other)
+        ]
+    return rng.choice(moves) if moves else voicing
+
+
+def crossover_voicing(voicing: tuple, other: tuple, rng: random.Random) -> tuple | None:
+    """A skeleton of voicing's length and position drawn from both parents' notes,
+    or None if the draw is not valid there.
+    """
+    skeleton, string_grouping, fret = voicing
+    pool = sorted(set(skeleton[1:]) | set(other[0][1:]))
+    if other[1] != string_grouping or max(pool) > temperament.ceilings[string_grouping]:
+        return None
+    child = [0, *sorted(rng.sample(pool, len(skeleton) - 1))]
+    return (tuple(child), string_grouping, fret) if is_valid_skeleton(
+        child, string_grouping, fret
+    ) else None
+
+
+def tournament(individuals: list, scores: dict, rng: random.Random) -> tuple:
+    """optimize_skeletons() selection: the better scored of two random individuals
+    (ties to the greater voicing, so a seed fixes the winner).
+    """
+    return max(rng.sample(individuals, 2), key=lambda v: (scores[v], v))
+
+
+def optimize_skeletons(
+    objective,
+    count: int = 10,
+    string_grouping: int | None = None,
+    length: int | None = None,
+    start_fret: int | None = None,
+    population: int = 64,
+    generations: int = 40,
+    rng: random.Random | int | None = None,
+    workers: int | None = 1,
+) -> list:
+    """Best skeletons for an objective, found by a genetic search over valid voicings.
+
+    Every individual is a (skeleton, string_grouping, start_fret) that is_valid_skeleton()
+    accepts: the first generation comes from form_skeleton(), and children are
+    crossovers of two tournament winners or mutate_voicing() neighbours, so the search
+    never leaves form_skeleton()'s constraints. The best eighth survives each generation.
+    Scoring runs across a process pool; as only the parent process draws random numbers,
+    a seed reproduces the result whatever the number of workers.
+
+    Args:
+        objective (str | Callable): Name in objectives, "module:function", or a callable
+        scoring a with_fretboard() tuple (higher is better). Callables must be
+        module-level functions when workers > 1.
+
+        count (int, optional): Skeletons to return. Defaults to 10.
+
+        string_grouping (int | None, optional): Fixed string grouping. Defaults to any.
+
+        length (int | None, optional): Fixed skeleton length. Defaults to any.
+
+        start_fret (int | None, optional): Fixed starting fret. Defaults to any.
+
+        population (int, optional): Individuals per generation. Defaults to 64.
+
+        generations (int, optional): Generations bred after the first. Defaults to 40.
+
+        rng (random.Random | int | None, optional): Source of randomness,
+        or an int to seed a fresh random.Random. Defaults to the random module.
+
+        workers (int | None, optional): Worker processes. None: the number of CPUs. Defaults to 1.
+
+    Returns:
+        list[tuple[list, int, int]]: skeleton, string_grouping and start_fret,
+        best first (ties in skeleton order).
+    """
+    if population < 2:
+        raise ValueError("Population: at least 2.")
+    resolve_objective(objective)
+    if rng is None:
+        rng = random
+    elif isinstance(rng, int):
+        rng = random.Random(rng)
+    workers = workers or os.cpu_count() or 1
+
+    individuals = [
+        (tuple(skeleton), grouping, fret)
+        for skeleton, grouping, fret in itertools.islice(
+            iter_skeletons(
+                "r" if string_grouping is None else string_grouping,
+                "r" if length is None else length,
+                "r" if start_fret is None else start_fret,
+                rng,
+            ),
+            population,
+        )
+    ]
+    scores = {}
+    pool = multiprocessing.Pool(workers) if workers > 1 else None
+    try:
+        for generation in range(generations + 1):
+            unscored = list(dict.fromkeys(v for v in individuals if v not in scores))
+            chunks = [
+                (objective, unscored[i:i + 16]) for i in range(0, len(unscored), 16)
+            ]
+            results = pool.map(score_voicings, chunks) if pool else map(score_voicings, chunks)
+            for (_, chunk), chunk_scores in zip(chunks, results):
+                scores.update(zip(chunk, chunk_scores))
+            if generation == generations:
+                break
+
+            parents = individuals
+            ranked = sorted(set(parents), key=lambda v: (-scores[v], v))
+            individuals = ranked[:max(population // 8, 1)]
+            while len(individuals) < population:
+                parent = tournament(parents, scores, rng)
+                child = (
+                    crossover_voicing(parent, tournament(parents, scores, rng), rng)
+                    if rng.random() < 0.5 else None
+                )
+                individuals.append(child or mutate_voicing(parent, rng, length, start_fret))
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+
+    best = sorted(scores, key=lambda v: (-scores[v], v))[:count]
+    return [(list(skeleton), grouping, fret) for skeleton, grouping, fret in best]
+
+
 if __name__ == "__main__":
     main()
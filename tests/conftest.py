@@ -0,0 +1,14 @@
+import importlib.util
+import pathlib
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def skel():
+    """skeletons-v2.py, imported as a module (its file name is not importable)."""
+    path = pathlib.Path(__file__).resolve().parent.parent / "skeletons-v2.py"
+    spec = importlib.util.spec_from_file_location("skeletons_v2", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,25 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+
+def test_render_below_table_origin(skel):
+    # A grouping-3 triad at fret 4 reaches back to notes below index 0 (C3).
+    skeleton, string_grouping, start_fret = [0, 1, 6], 3, 4
+    _, cipher, starting_notes, *_ = skel.skeleton_to_fretboard(
+        skeleton, string_grouping, start_fret
+    )
+    indices = skel.get_skel_note_indices(cipher, starting_notes, start_fret, string_grouping)
+    assert min(indices) < 0
+
+    sample_rate = 8000
+    frames, lengths = skel.render_skeletons([indices], sample_rate)
+    assert frames.shape[0] == 1 and lengths.tolist() == [frames.shape[1]]
+
+    # Each note below the origin sounds at its own pitch, not the silent row or a wrapped note.
+    for index in sorted(set(index for index in indices if index < 0)):
+        frames, _ = skel.render_skeletons([[index]], sample_rate)
+        spectrum = np.abs(np.fft.rfft(frames[0, :, 0].astype(float)))
+        peak = np.fft.rfftfreq(frames.shape[1], 1 / sample_rate)[spectrum.argmax()]
+        expected = 440.0 * 2 ** ((skel.audio_base_note + index - 69) / 12)
+        assert abs(peak - expected) <= 1.0
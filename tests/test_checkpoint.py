@@ -0,0 +1,50 @@
+import random
+
+import pytest
+
+
+class Interrupted(Exception):
+    pass
+
+
+def export(skel, path, checkpoint, seed, stop=None, rng_state=True, fingerprint="run"):
+    rng = random.Random(seed)
+    fretboards = skel.with_fretboard(skel.iter_skeletons(rng=rng), 1)
+    if not rng_state:
+        fretboards = skel.filter_playable(fretboards, 4)
+    written = 0
+
+    def write_item(fretboard, file):
+        nonlocal written
+        if written == stop:
+            raise Interrupted
+        written += 1
+        skel.write_skeletons(skel.with_notes([fretboard]), file)
+
+    skel.write_checkpointed(
+        fretboards, write_item, 60, str(path), str(checkpoint), fingerprint, 10,
+        rng if rng_state else None,
+    )
+
+
+@pytest.mark.parametrize("rng_state", [True, False])
+def test_resume_is_byte_identical(skel, tmp_path, rng_state):
+    export(skel, tmp_path / "whole.txt", tmp_path / "whole.ck", 46, rng_state=rng_state)
+
+    output, checkpoint = tmp_path / "out.txt", tmp_path / "out.ck"
+    with pytest.raises(Interrupted):
+        export(skel, output, checkpoint, 46, stop=25, rng_state=rng_state)
+    assert checkpoint.exists()
+    # With rng state saved, a resumed run continues from it whatever its own seed.
+    export(skel, output, checkpoint, 0 if rng_state else 46, rng_state=rng_state)
+
+    assert output.read_bytes() == (tmp_path / "whole.txt").read_bytes()
+    assert not checkpoint.exists()
+
+
+def test_checkpoint_of_other_settings_is_refused(skel, tmp_path):
+    output, checkpoint = tmp_path / "out.txt", tmp_path / "out.ck"
+    with pytest.raises(Interrupted):
+        export(skel, output, checkpoint, 46, stop=15)
+    with pytest.raises(ValueError, match="other settings"):
+        export(skel, output, checkpoint, 46, fingerprint="other")
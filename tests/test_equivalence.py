@@ -0,0 +1,91 @@
+import random
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def catalog(skel):
+    """Every catalog voicing with its fretboard (as skeleton_to_fretboard() returns it)."""
+    return [
+        (voicing, skel.skeleton_to_fretboard(*voicing)) for voicing in skel.skeleton_space()
+    ]
+
+
+def test_form_skeleton_matches_baseline(skel):
+    # Draws of the original form_skeleton() (random.seed(2024), then one call per draw).
+    expected = {
+        ("r", "r", "r"): [
+            ([0, 1, 3, 4], 1, 15), ([0, 3, 4, 5, 9], 2, 15), ([0, 8, 11, 12], 3, 10),
+            ([0, 1, 6, 7, 13, 14], 3, 4), ([0, 2, 3, 4], 1, 14),
+            ([0, 1, 2, 4, 5, 6, 8, 9], 2, 10), ([0, 1, 4, 5, 6, 9, 11, 13, 14], 3, 10),
+            ([0, 4, 10], 3, 6),
+        ],
+        (5, "r", 2): [
+            ([0, 2, 3, 5, 6], 2, 5), ([0, 4, 5, 6, 8], 2, 5), ([0, 1, 3, 4, 5, 7, 9], 2, 5),
+            ([0, 3], 2, 5), ([0, 1, 2, 4, 5, 6, 8, 9], 2, 5), ([0, 1, 4, 7], 2, 5),
+            ([0, 1, 2, 4, 5, 6, 8], 2, 5), ([0, 2, 5, 8, 9], 2, 5),
+        ],
+        ("r", 6, 3): [
+            ([0, 3, 4, 5, 10, 12], 3, 15), ([0, 4, 5, 9, 12, 13], 3, 13),
+            ([0, 4, 6, 7, 9, 10], 3, 15), ([0, 2, 6, 9, 12, 14], 3, 9),
+            ([0, 3, 8, 12, 13, 14], 3, 6), ([0, 1, 6, 7, 13, 14], 3, 6),
+            ([0, 2, 3, 6, 12, 13], 3, 14), ([0, 4, 6, 7, 13, 14], 3, 12),
+        ],
+        (0, 3, 1): [
+            ([0, 1, 4], 1, 0), ([0, 1, 3], 1, 0), ([0, 3, 4], 1, 0), ([0, 3, 4], 1, 0),
+            ([0, 2, 3], 1, 0), ([0, 2, 4], 1, 0), ([0, 3, 4], 1, 0), ([0, 2, 4], 1, 0),
+        ],
+    }
+    for settings, draws in expected.items():
+        rng = random.Random(2024)
+        assert [skel.form_skeleton(*settings, rng) for _ in draws] == draws
+
+
+def test_valid_neighbours_match_revalidation(skel):
+    rng = random.Random(40)
+    voicings = list(skel.skeleton_space())
+    for skeleton, string_grouping, start_fret in rng.sample(voicings, 500):
+        assert skel.valid_neighbours(skeleton, string_grouping, start_fret) == [
+            (edit, index, child)
+            for edit, index, child in skel.skeleton_edits(skeleton, string_grouping)
+            if skel.is_valid_skeleton(child, string_grouping, start_fret)
+        ]
+
+
+@pytest.mark.parametrize(
+    "query, mode",
+    [
+        ("C D E G", "exact"), ("C# D# E F#", "exact"),
+        ("C D E G A", "within"), ("E F# G# A B C#", "within"),
+    ],
+)
+def test_find_realizations_match_brute_force(skel, catalog, query, mode):
+    wanted = skel.parse_pitch_classes(query)
+    expected = []
+    for voicing, (_, cipher, starting_notes, start_fret, string_grouping, _) in catalog:
+        played = skel.pitch_class_mask(
+            skel.get_skel_note_indices(cipher, starting_notes, start_fret, string_grouping)
+        )
+        if played == wanted or (mode == "within" and played & ~wanted == 0):
+            expected.append(voicing)
+    assert expected
+    assert skel.find_realizations(query, mode) == expected
+
+
+def test_fretboard_batch_matches_interpreter(skel, catalog):
+    pytest.importorskip("numpy")
+    rng = random.Random(49)
+    draws = [skel.form_skeleton("r", "r", rng.choice((4, 5, 6)), rng) for _ in range(2000)]
+    wide = [(voicing, skel.skeleton_to_fretboard(*voicing)) for voicing in draws]
+    voicings, fretboards = zip(*catalog, *wide)
+    frets, string_lengths, tab_prints = skel.fretboard_batch(*zip(*voicings), tab=True)
+    mismatches = [
+        voicing
+        for voicing, fretboard, row, row_lengths, tab_print in zip(
+            voicings, fretboards, frets.tolist(), string_lengths.tolist(), tab_prints
+        )
+        if tab_print != fretboard[0]
+        or [string[:length] for string, length in zip(row, row_lengths)]
+        != skel.string_frets(fretboard[1], voicing[1])
+    ]
+    assert mismatches == []
@@ -0,0 +1,25 @@
+import random
+
+
+def test_events_match_tab_lines(skel):
+    rng = random.Random(48)
+    for string_grouping in (1, 2, 3, 4):
+        for _ in range(50):
+            voicing = skel.form_skeleton("r", "r", string_grouping, rng)
+            fretboard = skel.skeleton_to_fretboard(*voicing)
+            tab_lines = {
+                line[0]: line.partition("| ")[2] for line in fretboard[0].splitlines()
+            }
+            events = skel.skeleton_events(fretboard)
+            for string, name in enumerate("EADgbe"):
+                frets = [str(fret) for s, fret in events if s == string]
+                assert tab_lines[name] == "--".join(frets)
+
+
+def test_exercise_counts_match_expansion(skel):
+    patterns = [*skel.exercise_patterns, "groups-5", "skips-3", "permutations-3"]
+    for note_count in range(1, 19):
+        exercises = list(skel.expand_exercises(list(range(note_count)), patterns))
+        assert skel.exercise_count(note_count, patterns) == (
+            len(exercises), sum(len(list(events)) for _, events in exercises)
+        )
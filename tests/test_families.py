@@ -0,0 +1,49 @@
+import itertools
+import random
+
+import pytest
+
+
+def rotations(mask, divisions=12):
+    full = (1 << divisions) - 1
+    return [
+        (mask >> steps | mask << (divisions - steps)) & full
+        for steps in range(divisions) if mask >> steps & 1
+    ]
+
+
+def test_mode_class_is_smallest_rotation(skel):
+    for mask in range(1 << 12):
+        assert skel.mode_class(mask) == min(rotations(mask), default=0)
+
+
+def test_modes_share_a_family(skel):
+    major, first_inversion, second_inversion = [0, 4, 7], [0, 3, 8], [0, 5, 9]
+    family = skel.skeleton_family(major)
+    assert skel.skeleton_family(first_inversion) == family
+    assert skel.skeleton_family(second_inversion) == family
+    assert skel.skeleton_family([0, 3, 7]) != family
+    assert skel.skeleton_family(major, "transposition") != skel.skeleton_family(
+        first_inversion, "transposition"
+    )
+    with pytest.raises(ValueError):
+        skel.skeleton_family(major, "inversion")
+
+
+@pytest.mark.parametrize("kind", ["mode", "transposition"])
+def test_family_members(skel, kind):
+    members = skel.family_members([0, 4, 7], kind)
+    assert members
+    family = skel.skeleton_family([0, 4, 7], kind)
+    assert all(skel.skeleton_family(skeleton, kind) == family for skeleton, _, _ in members)
+
+
+def test_unique_families_keeps_first_of_each(skel):
+    skeletons = list(itertools.islice(skel.iter_skeletons(3, 4, rng=random.Random(32)), 300))
+    kept = list(skel.unique_families(skeletons))
+    families = [skel.skeleton_family(skeleton) for skeleton, _, _ in kept]
+    assert len(set(families)) == len(families)
+    firsts = {}
+    for item in skeletons:
+        firsts.setdefault(skel.skeleton_family(item[0]), item)
+    assert kept == list(firsts.values())
@@ -0,0 +1,34 @@
+import functools
+import io
+import random
+
+
+def tab_and_fingers(text):
+    lines = text.splitlines()
+    tab = [line for line in lines if line[:4] in {f"{name} | " for name in "ebgDAE"}]
+    row = next(line for line in lines if line.startswith("f | "))
+    return tab, row.partition("| ")[2].split(" / ")
+
+
+def test_fingering_row_matches_tab_lines(skel):
+    writers = [
+        skel.write_skeletons,
+        functools.partial(skel.write_worksheet, columns=1, width=200),
+    ]
+    rng = random.Random(35)
+    for string_grouping in range(1, 7):
+        for _ in range(50):
+            fretboard = skel.skeleton_to_fretboard(
+                *skel.form_skeleton("r", "r", string_grouping, rng)
+            )
+            for write in writers:
+                out = io.StringIO()
+                write(skel.with_notes([fretboard]), out, fingering=True)
+                tab, fingers = tab_and_fingers(out.getvalue())
+                assert len(tab) == len(fingers) == 6
+                for line, string_fingers in zip(tab, fingers):
+                    frets = line.partition("| ")[2].split("--")
+                    string_fingers = string_fingers.split("--")
+                    assert len(frets) == len(string_fingers), (line, fingers)
+                    for fret, finger in zip(frets, string_fingers):
+                        assert (fret == "0") == (finger == "0"), (line, fingers)
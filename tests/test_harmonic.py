@@ -0,0 +1,44 @@
+import itertools
+import random
+
+import pytest
+
+
+def pitch_classes(skel, fretboard):
+    return {note % 12 for note in skel.get_skel_note_indices(*fretboard[1:5])}
+
+
+def transposed(intervals, root):
+    return {(root + interval) % 12 for interval in intervals}
+
+
+@pytest.fixture(scope="module")
+def fretboards(skel):
+    skeletons = skel.iter_skeletons(rng=random.Random(34))
+    return list(skel.with_fretboard(itertools.islice(skeletons, 2000), 256))
+
+
+@pytest.mark.parametrize(
+    "contains_chord, within_scale, wanted",
+    [
+        ("C major", None, lambda pcs: transposed((0, 4, 7), 0) <= pcs),
+        ("m7", None, lambda pcs: any(transposed((0, 3, 7, 10), r) <= pcs for r in range(12))),
+        (None, "A minor-pentatonic", lambda pcs: pcs <= transposed((0, 3, 5, 7, 10), 9)),
+        (
+            "minor", "D dorian",
+            lambda pcs: pcs <= transposed((0, 2, 3, 5, 7, 9, 10), 2)
+            and any(transposed((0, 3, 7), r) <= pcs for r in range(12)),
+        ),
+    ],
+)
+def test_filter_harmonic_matches_note_sets(skel, fretboards, contains_chord, within_scale, wanted):
+    expected = [fretboard for fretboard in fretboards if wanted(pitch_classes(skel, fretboard))]
+    kept = list(skel.filter_harmonic(iter(fretboards), contains_chord, within_scale))
+    assert kept == expected
+    assert expected
+
+
+def test_unknown_chord_or_scale_fails_up_front(skel):
+    for contains_chord, within_scale in (("C nonsense", None), (None, "H major"), ("a b c", None)):
+        with pytest.raises(ValueError):
+            skel.filter_harmonic(iter([]), contains_chord, within_scale)
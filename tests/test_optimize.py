@@ -0,0 +1,32 @@
+import itertools
+import random
+
+import pytest
+
+
+def test_seeded_search_is_reproducible(skel):
+    settings = dict(count=5, string_grouping=2, length=5, population=16, generations=4)
+    best = skel.optimize_skeletons("compact", rng=41, **settings)
+    assert best == skel.optimize_skeletons("compact", rng=41, **settings)
+    assert len(best) == 5
+    scores = skel.score_voicings(("compact", [(tuple(s), g, f) for s, g, f in best]))
+    assert scores == sorted(scores, reverse=True)
+    for skeleton, string_grouping, start_fret in best:
+        assert string_grouping == 2 and len(skeleton) == 5
+        assert skel.is_valid_skeleton(list(skeleton), string_grouping, start_fret)
+
+
+def test_search_beats_its_first_generation(skel):
+    # optimize_skeletons() draws its first generation just as this does.
+    first = itertools.islice(skel.iter_skeletons(1, "r", "r", random.Random(41)), 16)
+    start = max(skel.score_voicings(("consonance", [(tuple(s), g, f) for s, g, f in first])))
+    best = skel.optimize_skeletons(
+        "consonance", 1, string_grouping=1, population=16, generations=6, rng=41
+    )[0]
+    assert skel.score_voicings(("consonance", [(tuple(best[0]), *best[1:])]))[0] >= start
+
+
+@pytest.mark.parametrize("objective", ["loudness", "no_such_module:f", "random:no_such"])
+def test_unknown_objectives_are_refused(skel, objective):
+    with pytest.raises(ValueError):
+        skel.optimize_skeletons(objective, population=4, generations=1, rng=1)
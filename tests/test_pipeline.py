@@ -0,0 +1,25 @@
+import itertools
+import random
+
+
+def test_iter_skeletons_is_repeated_form_skeleton(skel):
+    rng = random.Random(26)
+    expected = [skel.form_skeleton("r", "r", 3, rng) for _ in range(20)]
+    assert list(itertools.islice(skel.iter_skeletons(3, "r", "r", 26), 20)) == expected
+
+
+def test_stages_pull_only_what_is_consumed(skel):
+    pulled = []
+
+    def source():
+        for skeleton in skel.iter_skeletons(rng=26):
+            pulled.append(skeleton)
+            yield skeleton
+
+    for batch_size in (1, 8):
+        pulled.clear()
+        annotated = skel.with_notes(skel.with_fretboard(source(), batch_size))
+        taken = list(itertools.islice(annotated, 5))
+        assert len(taken) == 5
+        assert len(pulled) == max(batch_size, 5)
+        assert [item[5] for item in taken] == [skeleton for skeleton, _, _ in pulled[:5]]
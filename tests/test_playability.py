@@ -0,0 +1,49 @@
+import itertools
+import random
+
+import pytest
+
+
+def reference_scores(skel, cipher, string_grouping):
+    strings = skel.string_frets(cipher, string_grouping)
+    fretted = [[fret for fret in string if fret > 0] for string in strings]
+    spans = [max(frets) - min(frets) if frets else 0 for frets in fretted]
+    stretch = max(
+        (max(low + high) - min(low + high) if low + high else 0)
+        for low, high in zip(fretted, fretted[1:])
+    )
+    position, shifts = None, 0
+    for fret in itertools.chain.from_iterable(strings):
+        if fret <= 0:
+            continue
+        if position is None:
+            position = fret
+        elif fret < position:
+            position, shifts = fret, shifts + 1
+        elif fret > position + skel.temperament.finger_span:
+            position, shifts = fret - skel.temperament.finger_span, shifts + 1
+    return spans, stretch, shifts
+
+
+@pytest.fixture(scope="module")
+def fretboards(skel):
+    skeletons = skel.iter_skeletons(rng=random.Random(27))
+    return list(skel.with_fretboard(itertools.islice(skeletons, 300), 64))
+
+
+def test_playability_matches_reference(skel, fretboards):
+    for fretboard in fretboards:
+        cipher, string_grouping = fretboard[1], fretboard[4]
+        assert skel.playability(cipher, string_grouping) == reference_scores(
+            skel, cipher, string_grouping
+        )
+
+
+@pytest.mark.parametrize("max_stretch, batch_size", [(0, 64), (3, 7), (5, 1)])
+def test_filter_playable_keeps_order(skel, fretboards, max_stretch, batch_size):
+    expected = [
+        fretboard for fretboard in fretboards
+        if reference_scores(skel, fretboard[1], fretboard[4])[1] <= max_stretch
+    ]
+    kept = list(skel.filter_playable(iter(fretboards), max_stretch, batch_size))
+    assert kept == expected
@@ -0,0 +1,27 @@
+import itertools
+import random
+
+
+def test_only_output_voicings_are_recorded(skel, tmp_path):
+    log = skel.PracticeLog(str(tmp_path / "log.db"))
+    try:
+        drawn = skel.with_fretboard(skel.unseen_skeletons(log, "ann", random.Random(38)))
+        kept = (fretboard for fretboard in drawn if fretboard[4] == 2)
+        output = list(skel.record_seen(itertools.islice(kept, 5), log, "ann"))
+        assert len(output) == 5
+        assert log.seen_count("ann") == 5
+        index = skel.voicing_catalog()[1]
+        bitmap = log.load("ann")[0]
+        for _, _, _, start_fret, string_grouping, skeleton in output:
+            i = index[tuple(skeleton), string_grouping, start_fret]
+            assert bitmap[i >> 3] >> (i & 7) & 1
+    finally:
+        log.close()
+
+    # A new session sees the record; voicings drawn but dropped stay unseen.
+    log = skel.PracticeLog(str(tmp_path / "log.db"))
+    try:
+        assert log.seen_count("ann") == 5
+        assert len(log.load("ann")[1]) == len(skel.voicing_catalog()[0]) - 5
+    finally:
+        log.close()
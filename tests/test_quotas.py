@@ -0,0 +1,46 @@
+import collections
+import random
+
+import pytest
+
+
+@pytest.mark.parametrize("policy", ["legacy", "uniform", "proportional"])
+def test_balanced_quotas_add_up(skel, policy):
+    quotas = skel.balanced_quotas(1000, policy)
+    assert sum(quotas.values()) == 1000
+    assert set(quotas) == set(skel.strata())
+    if policy == "uniform":
+        assert max(quotas.values()) - min(quotas.values()) <= 1
+    if policy == "legacy":
+        # Each grouping gets an equal part, shared evenly between its strata.
+        per_grouping = collections.Counter(string_grouping for string_grouping, _, _ in quotas)
+        for (string_grouping, _, _), count in quotas.items():
+            assert abs(count - 1000 / len(per_grouping) / per_grouping[string_grouping]) < 1
+
+
+def test_balanced_quotas_narrowed(skel):
+    quotas = skel.balanced_quotas(50, "proportional", 2, 5)
+    assert sum(quotas.values()) == 50
+    assert {(string_grouping, length) for string_grouping, length, _ in quotas} == {(2, 5)}
+    with pytest.raises(ValueError):
+        skel.balanced_quotas(50, "even")
+
+
+def test_parse_quotas(skel):
+    assert skel.parse_quotas(["2,4,0=3", "3,6,5=2"]) == {(2, 4, 0): 3, (3, 6, 5): 2}
+    for text in ("2,4=3", "2,4,0=x", "2,4,0", "1,9,0=1"):
+        with pytest.raises(ValueError, match="^Quota "):
+            skel.parse_quotas([text])
+
+
+def test_stratified_counts_are_exact(skel):
+    # Catalog strata (sampled or enumerated) and a grouping drawn by completion counts.
+    quotas = skel.parse_quotas(["1,2,0=4", "2,8,3=7", "3,5,12=9", "4,6,2=3", "2,4,1=0"])
+    drawn = list(skel.stratified_skeletons(quotas, random.Random(37)))
+    counts = collections.Counter(
+        (string_grouping, len(skeleton), start_fret)
+        for skeleton, string_grouping, start_fret in drawn
+    )
+    assert counts == {stratum: count for stratum, count in quotas.items() if count}
+    for skeleton, string_grouping, start_fret in drawn:
+        assert skel.is_valid_skeleton(skeleton, string_grouping, start_fret)
@@ -0,0 +1,68 @@
+import random
+
+import pytest
+
+DAY = 86400
+
+
+def test_indexed_heap_pops_in_priority_order(skel):
+    rng = random.Random(39)
+    heap = skel.IndexedHeap({key: rng.random() for key in range(50)})
+    expected = dict(heap.priorities)
+    for _ in range(500):
+        key = rng.randrange(80)
+        priority = rng.random()
+        heap.push(key, priority)
+        expected[key] = priority
+        if rng.random() < 0.2:
+            key, priority = heap.pop()
+            assert priority == min(expected.values())
+            assert expected.pop(key) == priority
+        assert len(heap) == len(expected)
+        assert heap.peek()[1] == min(expected.values())
+    popped = [heap.pop() for _ in range(len(heap))]
+    assert popped == sorted(expected.items(), key=lambda item: item[1])
+
+
+def test_sm2_rescheduling(skel, tmp_path):
+    scheduler = skel.ReviewScheduler(str(tmp_path / "review.json"))
+    now = 1_000_000.0
+    scheduler.review(7, 5, now)
+    card = scheduler.cards[7]
+    assert (card["repetitions"], card["interval"], card["due"]) == (1, 1, now + DAY)
+    assert card["easiness"] == pytest.approx(2.6)
+    scheduler.review(7, 4, now)
+    assert (card["repetitions"], card["interval"]) == (2, 6)
+    assert card["easiness"] == pytest.approx(2.6)
+    scheduler.review(7, 3, now)
+    assert (card["repetitions"], card["interval"]) == (3, round(6 * 2.6))
+    assert card["easiness"] == pytest.approx(2.46)
+    # A failed recall starts the card over, and easiness never drops below 1.3.
+    for _ in range(10):
+        scheduler.review(7, 0, now)
+    assert (card["repetitions"], card["interval"], card["easiness"]) == (0, 1, 1.3)
+
+    with pytest.raises(ValueError):
+        scheduler.review(7, 6, now)
+    with pytest.raises(ValueError):
+        scheduler.add(len(skel.voicing_catalog()[0]))
+
+
+def test_due_skeletons_soonest_first(skel, tmp_path):
+    path = str(tmp_path / "review.json")
+    scheduler = skel.ReviewScheduler(path)
+    now = 1_000_000.0
+    for skeleton_id, offset in ((3, 30), (1, 10), (2, 20), (4, 10 * DAY)):
+        scheduler.add(skeleton_id, now + offset)
+    scheduler.review(5, 1, now)  # Due in a day.
+    assert scheduler.due(now + 25) == [1, 2]
+    assert scheduler.due(now + 2 * DAY) == [1, 2, 3, 5]
+    assert scheduler.due(now + 2 * DAY, limit=2) == [1, 2]
+    scheduler.save()
+
+    # The schedule survives a reload, and due_skeletons() reads it.
+    assert skel.ReviewScheduler(path).due(now + 2 * DAY) == [1, 2, 3, 5]
+    voicings = skel.voicing_catalog()[0]
+    assert list(skel.due_skeletons(path, 2, now + 2 * DAY)) == [
+        (i, list(voicings[i][0]), *voicings[i][1:]) for i in (1, 2)
+    ]
@@ -0,0 +1,35 @@
+import random
+
+
+def fixed_order_valid(skel, skeleton, string_grouping, start_fret):
+    """is_valid_skeleton() without a plan: every applicable rule, in registration order."""
+    for rule in skel.curation_rules.values():
+        if (
+            rule["enabled"]
+            and skel.rule_grouping(string_grouping) in rule["groupings"]
+            and (rule["lengths"] is None or len(skeleton) in rule["lengths"])
+            and (rule["start_frets"] is None or start_fret in rule["start_frets"])
+            and rule["check"](skeleton, string_grouping, start_fret)
+        ):
+            return False
+    return True
+
+
+def test_adaptive_plan_matches_fixed_order(skel, monkeypatch):
+    # Re-order and time the plans every few validations so the sample sees many orders.
+    monkeypatch.setattr(skel, "reorder_interval", 7)
+    monkeypatch.setattr(skel, "timing_interval", 3)
+    skel.rule_plans.clear()
+    rng = random.Random(31)
+    try:
+        for _ in range(20000):
+            string_grouping = rng.choice(skel.temperament.catalog_groupings)
+            start_fret = rng.choice(skel.temperament.start_frets)
+            length = rng.choice(skel.temperament.lengths[string_grouping])
+            ceiling = skel.temperament.ceilings[string_grouping]
+            skeleton = skel.unearth_skeleton(length, ceiling, rng)
+            assert skel.is_valid_skeleton(skeleton, string_grouping, start_fret) == (
+                fixed_order_valid(skel, skeleton, string_grouping, start_fret)
+            ), (skeleton, string_grouping, start_fret)
+    finally:
+        skel.rule_plans.clear()
@@ -0,0 +1,45 @@
+import pytest
+
+
+def write_shards(skel, directory, shards, count=40, seed=45, **options):
+    paths = []
+    for shard in range(shards):
+        size, items = skel.shard_skeletons(shard, shards, count, seed, **options)
+        path = directory / f"{shards}-{shard}.jsonl"
+        with open(path, "w") as file:
+            skel.write_shard(items, shard, shards, size, file)
+        paths.append(str(path))
+    return paths
+
+
+@pytest.mark.parametrize(
+    "options",
+    [{}, {"grouping": 2, "length": 4}, {"where": "length = 3"},
+     {"where": "length = 3", "ordered": True}],
+)
+def test_merged_shards_match_one_run(skel, tmp_path, options):
+    whole = list(skel.merge_shards(write_shards(skel, tmp_path, 1, **options)))
+    # Shard files given in any order merge back into batch order.
+    merged = list(skel.merge_shards(write_shards(skel, tmp_path, 3, **options)[::-1]))
+    assert len(whole) == 40
+    assert merged == whole
+
+
+def test_merge_rejects_missing_or_short_shards(skel, tmp_path):
+    paths = write_shards(skel, tmp_path, 3)
+    with pytest.raises(ValueError, match="every shard file"):
+        list(skel.merge_shards(paths[:2]))
+    with open(paths[1]) as file:
+        lines = file.readlines()
+    with open(paths[1], "w") as file:
+        file.writelines(lines[:-1])
+    with pytest.raises(ValueError, match="39 of 40"):
+        list(skel.merge_shards(paths))
+
+
+def test_parse_shard(skel):
+    assert skel.parse_shard("2/5") == (2, 5)
+    for text in ("5/5", "1", "-1/2", "a/b"):
+        with pytest.raises(ValueError):
+            skel.parse_shard(text)
+
@@ -0,0 +1,24 @@
+def tables(skel):
+    catalog, _ = skel.voicing_catalog()
+    return (
+        len(catalog),
+        skel.starting_notes_at(3),
+        skel.note_names("#"),
+        skel.completion_counts(1, 3, True, False),
+        skel.rule_plan(1, 3, 0)[1],
+    )
+
+
+def test_caches_follow_temperament(skel):
+    standard = tables(skel)
+    try:
+        skel.set_temperament(19)
+        assert skel.temperament.divisions == 19
+        nineteen = tables(skel)
+        assert nineteen[:4] != standard[:4]
+        skel.set_temperament(12)
+        assert tables(skel) == standard
+        skel.set_temperament(19)
+        assert tables(skel) == nineteen
+    finally:
+        skel.set_temperament(12)
@@ -0,0 +1,34 @@
+import itertools
+import random
+
+
+def total_movement(skel, voicings):
+    positions = [skel.hand_position(skel.skeleton_to_fretboard(*voicing)[1]) for voicing in voicings]
+    return sum(itertools.starmap(skel.movement, zip(positions, positions[1:])))
+
+
+def test_voice_lead_is_optimal(skel):
+    skeletons = [[0, 5], [0, 7, 9], [0, 3], [0, 4, 7]]
+    led = skel.voice_lead(skeletons, 2)
+    assert [skeleton for skeleton, _, _ in led] == skeletons
+    layers = [skel.skeleton_voicings(skeleton, 2) for skeleton in skeletons]
+    best = min(
+        total_movement(skel, [voicing[:3] for voicing in path])
+        for path in itertools.product(*layers)
+    )
+    assert total_movement(skel, led) == best
+
+
+def test_voice_lead_honours_start_fret(skel):
+    led = skel.voice_lead([[0, 2], [0, 4]], 1, start_fret=9)
+    assert led[0][2] == 9
+
+
+def test_practice_tour_between_frets(skel):
+    tour = skel.practice_tour(8, 0, 12, 2, 4, random.Random(29))
+    assert len(tour) == 8
+    assert tour[0][2] == 0 and tour[-1][2] == 12
+    assert len({(tuple(skeleton), *rest) for skeleton, *rest in tour}) == 8
+    for skeleton, string_grouping, start_fret in tour:
+        assert string_grouping == 2 and len(skeleton) == 4
+        assert skel.is_valid_skeleton(skeleton, string_grouping, start_fret)
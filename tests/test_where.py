@@ -0,0 +1,70 @@
+import random
+
+import pytest
+
+
+def brute_force(skel, predicate):
+    values = {}
+
+    def value(voicing, attribute):
+        key = voicing, attribute
+        if key not in values:
+            values[key] = skel.voicing_attribute(voicing, attribute)
+        return values[key]
+
+    voicings = skel.voicing_catalog()[0]
+    return [i for i, voicing in enumerate(voicings) if predicate(lambda a: value(voicing, a))]
+
+
+@pytest.mark.parametrize(
+    "expression, predicate",
+    [
+        (
+            "length >= 5 and has = 7 and grouping = 3 and not ic = 6",
+            lambda v: v("length")[0] >= 5 and 7 in v("has") and v("grouping")[0] == 3
+            and 6 not in v("ic"),
+        ),
+        (
+            "(fret < 2 or fret > 15), length = 3",
+            lambda v: (v("fret")[0] < 2 or v("fret")[0] > 15) and v("length")[0] == 3,
+        ),
+        (
+            "class = 037 or grouping == 1 and has != 1",
+            lambda v: v("class")[0] == "037" or (v("grouping")[0] == 1 and any(
+                note != 1 for note in v("has")
+            )),
+        ),
+    ],
+)
+def test_where_matches_brute_force(skel, expression, predicate):
+    assert skel.bitmap_indices(skel.where_bitmap(expression)) == brute_force(skel, predicate)
+
+
+def test_span_bitmaps_match_layouts(skel):
+    voicings = skel.voicing_catalog()[0]
+    by_index = {}
+    for span, bitmap in skel.attribute_bitmaps("span").items():
+        for i in skel.bitmap_indices(bitmap):
+            by_index.setdefault(i, []).append(span)
+    for i in random.Random(44).sample(range(len(voicings)), 2000):
+        assert by_index[i] == skel.voicing_attribute(voicings[i], "span")
+
+
+@pytest.mark.parametrize(
+    "expression",
+    ["len = 3", "length = x", "length = 3 and", "(length = 3", "length = 3 )",
+     "class < 037", "length = 3 $"],
+)
+def test_where_rejects_malformed(skel, expression):
+    with pytest.raises(ValueError, match="^Where: "):
+        skel.where_bitmap(expression)
+
+
+def test_where_skeletons_draws_matches(skel):
+    matches = set(skel.bitmap_indices(skel.where_bitmap("length = 4 and grouping = 2")))
+    index = skel.voicing_catalog()[1]
+    drawn = list(skel.where_skeletons("length = 4 and grouping = 2", 50, random.Random(1)))
+    assert len(drawn) == 50
+    assert all(index[tuple(skeleton), *rest] in matches for skeleton, *rest in drawn)
+    ordered = list(skel.where_skeletons("length = 4 and grouping = 2", 5, ordered=True))
+    assert [index[tuple(skeleton), *rest] for skeleton, *rest in ordered] == sorted(matches)[:5]
@@ -0,0 +1,24 @@
+import io
+
+
+def test_pages_never_run_over(skel):
+    voicings = [(list(skeleton), 3, 5) for skeleton in skel.valid_skeletons(3, 5, 12)[:5]]
+    fretboards = [skel.skeleton_to_fretboard(*voicing) for voicing in voicings]
+    for columns, width, page_lines in ((1, 24, 16), (2, 60, 16), (3, 80, 30)):
+        out = io.StringIO()
+        skel.write_worksheet(skel.with_notes(fretboards), out, True, columns, width, page_lines)
+        pages = out.getvalue().split("\f")
+        assert pages[-1] == ""
+        for page in pages[:-1]:
+            assert len(page.splitlines()) <= page_lines
+
+        if columns == 1:
+            # Tall exercises carry on over the next page, line for line.
+            column_width = skel.worksheet_column_width(columns, width, page_lines)
+            expected = [
+                line.rstrip()
+                for number, item in enumerate(skel.with_notes(fretboards), start=1)
+                for line in skel.worksheet_cell(number, item, column_width, True)
+            ]
+            written = [line for page in pages[:-1] for line in page.splitlines()[2:]]
+            assert [line for line in written if line] == [line for line in expected if line]